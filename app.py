@@ -1,12 +1,6 @@
-from app import create_app, db
+from app import create_app
 
 app = create_app()
 
-@app.cli.command("init-db")
-def init_db():
-    """Initialize the database."""
-    db.create_all()
-    print("Database initialized!")
-
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)
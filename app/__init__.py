@@ -1,11 +1,17 @@
 from flask import Flask, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 import os
 import logging
 from app.utils.swagger import setup_swagger
+from app.utils.json_provider import FastJSONProvider
+from app.utils.compression import init_compression
+from app.utils.metrics import init_metrics
+from app.utils.db_routing import RoutingSession, init_db_routing, REPLICA_BIND
+from app.config import profile_settings, engine_options
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
 
 def create_app():
@@ -13,6 +19,46 @@ def create_app():
     
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'postgresql://postgres:postgres@db:5432/postgres')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'],
+        profile_settings()
+    )
+    replica_url = os.getenv('DATABASE_REPLICA_URL')
+    if replica_url:
+        app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND: {'url': replica_url, **engine_options(replica_url, profile_settings())}
+        }
+    app.config['REPLICA_STICKY_SECONDS'] = float(os.getenv('REPLICA_STICKY_SECONDS', 5))
+    app.config['LIWC_DICTIONARY_FILE'] = os.getenv(
+        'LIWC_DICTIONARY_FILE',
+        os.path.join(app.root_path, 'data', 'liwc_dictionary.bin')
+    )
+    app.config['DICTIONARY_CHECK_INTERVAL'] = float(os.getenv('DICTIONARY_CHECK_INTERVAL', 5))
+    app.config['DICTIONARY_BACKGROUND_RELOAD'] = os.getenv('DICTIONARY_BACKGROUND_RELOAD', '1') == '1'
+    app.config['DICTIONARY_LISTEN'] = os.getenv('DICTIONARY_LISTEN', '1') == '1'
+    app.config['JOURNAL_BATCH_MAX_SIZE'] = int(os.getenv('JOURNAL_BATCH_MAX_SIZE', 500))
+    app.config['JOURNAL_PAGE_SIZE'] = int(os.getenv('JOURNAL_PAGE_SIZE', 50))
+    app.config['JOURNAL_PAGE_MAX_SIZE'] = int(os.getenv('JOURNAL_PAGE_MAX_SIZE', 500))
+    app.config['JOURNAL_ASYNC_SCORING'] = os.getenv('JOURNAL_ASYNC_SCORING', '0') == '1'
+    app.config['SCORING_WORKERS'] = int(os.getenv('SCORING_WORKERS', 2))
+    app.config['SCORING_BATCH_SIZE'] = int(os.getenv('SCORING_BATCH_SIZE', 100))
+    app.config['SCORING_POLL_INTERVAL'] = float(os.getenv('SCORING_POLL_INTERVAL', 5))
+    app.config['SCORE_MEMO_SIZE'] = int(os.getenv('SCORE_MEMO_SIZE', 10000))
+    app.config['SCORE_MEMO_DATABASE'] = os.getenv('SCORE_MEMO_DATABASE', '0') == '1'
+    app.config['AUTH_PRINCIPAL_TTL'] = float(os.getenv('AUTH_PRINCIPAL_TTL', 60))
+    app.config['AUTH_TOKEN_CLAIMS'] = os.getenv('AUTH_TOKEN_CLAIMS', '0') == '1'
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 16))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+    app.config['JSON_BACKEND'] = os.getenv('JSON_BACKEND', 'auto')
+    app.config['COMPRESSION_MIN_SIZE'] = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    app.config['GZIP_LEVEL'] = int(os.getenv('GZIP_LEVEL', 6))
+    app.config['BROTLI_QUALITY'] = int(os.getenv('BROTLI_QUALITY', 4))
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_BODY_SIZE', 32 * 1024 * 1024))
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', '1') == '1'
+    
+    app.json = FastJSONProvider(app)
     
     db.init_app(app)
     
@@ -24,12 +70,31 @@ def create_app():
     from app.routes.health import health_bp
     from app.routes.auth import auth_bp
     from app.routes.journal import journal_bp
+    from app.routes.dictionary import dictionary_bp
     
     app.register_blueprint(health_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(journal_bp)
+    app.register_blueprint(dictionary_bp)
+    
+    if app.config['METRICS_ENABLED']:
+        from app.routes.metrics import metrics_bp
+        app.register_blueprint(metrics_bp)
+        init_metrics(app)
+    
+    @app.errorhandler(RequestEntityTooLarge)
+    def body_too_large(error):
+        return jsonify({
+            'status': 'error',
+            'message': f"Request body exceeds the limit of {app.config['MAX_CONTENT_LENGTH']} bytes"
+        }), 413
     
     setup_swagger(app)
+    init_compression(app)
+    init_db_routing(app)
+    
+    from app.commands import register_commands
+    register_commands(app)
     
     bcrypt.init_app(app)
     
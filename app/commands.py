@@ -0,0 +1,145 @@
+import click
+import time
+from contextlib import contextmanager
+from flask import current_app
+from sqlalchemy import event, text
+from app import db
+from app.models.user import User
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app.services.dictionary_import import DictionaryImportError
+from app.services.scoring_queue import drain
+from app.services.rescoring import rescore_journals
+from app.services.rollups import rebuild_rollups
+from app.services.score_memo import score_memo
+from app.services.migrations import run_migrations, migration_status
+
+@contextmanager
+def lifted_statement_timeout():
+    """
+    Lift the statement timeout of the engine profile for every transaction the
+    session begins inside the block, on PostgreSQL, like run_migrations does, so
+    long maintenance statements are not cancelled
+    """
+    session = db.session()
+
+    def lift(session, transaction, connection):
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text('SET LOCAL statement_timeout = 0'))
+
+    event.listen(session, 'after_begin', lift)
+    if session.in_transaction():
+        lift(session, None, session.connection())
+    try:
+        yield
+    finally:
+        event.remove(session, 'after_begin', lift)
+
+def register_commands(app):
+    """Register the Flask CLI commands on the app"""
+
+    @app.cli.command("init-db")
+    def init_db():
+        """Initialize the database."""
+        run_migrations()
+        print("Database initialized!")
+
+    @app.cli.command("migrate")
+    @click.option("--status", is_flag=True, help="List migrations and whether they are applied.")
+    def migrate(status):
+        """Apply pending schema migrations."""
+        if status:
+            for version, description, applied in migration_status():
+                print(f"[{'x' if applied else ' '}] {version}: {description}")
+            return
+        applied = run_migrations()
+        print(f"Applied {len(applied)} migration(s)")
+
+    @app.cli.command("build-dictionary")
+    @click.option("--output", default=None, help="Path of the compiled dictionary file.")
+    def build_dictionary(output):
+        """Compile the LIWC dictionary into a memory-mapped file."""
+        with lifted_statement_timeout():
+            LIWCAnalyzer.build_dictionary_file(output)
+
+    @app.cli.command("import-dictionary")
+    @click.argument("path")
+    @click.option("--merge", is_flag=True, help="Only add the file's categories and words, keep the others.")
+    @click.option("--no-build", is_flag=True, help="Do not recompile the memory-mapped dictionary file.")
+    def import_dictionary(path, merge, no_build):
+        """Load a LIWC .dic or JSON dictionary into the database."""
+        with lifted_statement_timeout():
+            try:
+                LIWCAnalyzer.import_dictionary(path, replace=not merge)
+            except (OSError, DictionaryImportError) as e:
+                raise click.ClickException(str(e))
+            if not no_build:
+                LIWCAnalyzer.build_dictionary_file()
+
+    @app.cli.command("set-admin")
+    @click.argument("username")
+    @click.option("--revoke", is_flag=True, help="Remove administrator access instead of granting it.")
+    def set_admin(username, revoke):
+        """Grant or revoke administrator access for a user."""
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"User {username} not found")
+        user.is_admin = not revoke
+        db.session.commit()
+        print(f"{username} is {'no longer' if revoke else 'now'} an administrator")
+
+    @app.cli.command("score-worker")
+    @click.option("--batch-size", default=None, type=int, help="Journals scored per transaction.")
+    @click.option("--poll-interval", default=None, type=float, help="Seconds to wait when the queue is empty.")
+    @click.option("--once", is_flag=True, help="Exit once the queue is empty.")
+    def score_worker(batch_size, poll_interval, once):
+        """Score journals submitted in async mode."""
+        batch_size = batch_size or current_app.config['SCORING_BATCH_SIZE']
+        poll_interval = poll_interval or current_app.config['SCORING_POLL_INTERVAL']
+        while True:
+            processed = drain(batch_size)
+            if processed:
+                print(f"Scored {processed} journals")
+            db.session.remove()
+            if once:
+                break
+            time.sleep(poll_interval)
+
+    @app.cli.command("rescore-journals")
+    @click.option("--user-id", type=int, default=None, help="Only rescore journals of this user.")
+    @click.option("--since", type=click.DateTime(), default=None, help="Only journals created at or after this date.")
+    @click.option("--until", type=click.DateTime(), default=None, help="Only journals created before this date.")
+    @click.option("--all", "rescore_all", is_flag=True, help="Also rescore journals already scored with the current dictionary.")
+    @click.option("--chunk-size", default=1000, show_default=True, help="Rows read and scored per chunk.")
+    @click.option("--workers", type=int, default=None, help="Scoring processes (defaults to the CPU count).")
+    @click.option("--commit-every", default=10, show_default=True, help="Chunks written per commit.")
+    @click.option("--checkpoint", default=None, help="File recording progress, used to resume an interrupted run.")
+    def rescore(user_id, since, until, rescore_all, chunk_size, workers, commit_every, checkpoint):
+        """Rescore journals after a dictionary change."""
+        with lifted_statement_timeout():
+            rescore_journals(
+                user_id=user_id,
+                since=since,
+                until=until,
+                stale_only=not rescore_all,
+                chunk_size=chunk_size,
+                workers=workers,
+                commit_every=commit_every,
+                checkpoint=checkpoint
+            )
+
+    @app.cli.command("rebuild-rollups")
+    @click.option("--user-id", type=int, default=None, help="Only rebuild the rollups of this user.")
+    def rebuild(user_id):
+        """Recompute the daily trend rollups from the stored scores."""
+        with lifted_statement_timeout():
+            days = rebuild_rollups(user_id)
+            db.session.commit()
+            print(f"Rebuilt {days} daily rollups")
+
+    @app.cli.command("prune-score-memo")
+    def prune_score_memo():
+        """Delete memoized scores of older dictionary versions."""
+        with lifted_statement_timeout():
+            deleted = score_memo.prune(LIWCAnalyzer.snapshot().version)
+            db.session.commit()
+            print(f"Deleted {deleted} memoized scores")
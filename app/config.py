@@ -0,0 +1,79 @@
+import os
+
+# Defaults of each APP_ENV profile; every value can be overridden by the
+# environment variable of the same name
+PROFILES = {
+    'production': {
+        'DB_POOL_SIZE': 10,
+        'DB_MAX_OVERFLOW': 10,
+        'DB_POOL_TIMEOUT': 10,
+        'DB_POOL_RECYCLE': 1800,
+        'DB_POOL_PRE_PING': True,
+        'DB_STATEMENT_TIMEOUT_MS': 30000,
+        'DB_LOCK_TIMEOUT_MS': 5000
+    },
+    'development': {
+        'DB_POOL_SIZE': 5,
+        'DB_MAX_OVERFLOW': 10,
+        'DB_POOL_TIMEOUT': 30,
+        'DB_POOL_RECYCLE': 1800,
+        'DB_POOL_PRE_PING': True,
+        'DB_STATEMENT_TIMEOUT_MS': 0,
+        'DB_LOCK_TIMEOUT_MS': 0
+    }
+}
+
+def profile_settings(profile=None, environ=os.environ):
+    """
+    Settings of the APP_ENV profile (production by default) with environment
+    overrides applied
+    """
+    profile = profile or environ.get('APP_ENV', 'production')
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown APP_ENV {profile!r}, expected one of {', '.join(PROFILES)}")
+
+    settings = {}
+    for name, default in PROFILES[profile].items():
+        value = environ.get(name)
+        if value is None:
+            settings[name] = default
+        elif isinstance(default, bool):
+            settings[name] = value == '1'
+        else:
+            settings[name] = type(default)(value)
+    return settings
+
+def engine_options(database_url, settings):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for a database URL.
+
+    - pool_size / max_overflow: connections kept per process and allowed on top;
+      size them for the gunicorn threads plus the scoring worker threads
+    - pool_timeout: seconds to wait for a free connection before failing
+    - pool_pre_ping: test connections on checkout, so a database restart or a
+      dropped idle connection does not fail a request
+    - pool_recycle: replace connections older than this many seconds
+    - statement and lock timeouts (PostgreSQL) bound runaway queries
+    SQLite keeps its own pooling and gets no options.
+    """
+    if database_url.startswith('sqlite'):
+        return {}
+
+    options = {
+        'pool_size': settings['DB_POOL_SIZE'],
+        'max_overflow': settings['DB_MAX_OVERFLOW'],
+        'pool_timeout': settings['DB_POOL_TIMEOUT'],
+        'pool_recycle': settings['DB_POOL_RECYCLE'],
+        'pool_pre_ping': settings['DB_POOL_PRE_PING']
+    }
+
+    if database_url.startswith('postgresql'):
+        server_options = []
+        if settings['DB_STATEMENT_TIMEOUT_MS'] > 0:
+            server_options.append(f"-c statement_timeout={settings['DB_STATEMENT_TIMEOUT_MS']}")
+        if settings['DB_LOCK_TIMEOUT_MS'] > 0:
+            server_options.append(f"-c lock_timeout={settings['DB_LOCK_TIMEOUT_MS']}")
+        if server_options:
+            options['connect_args'] = {'options': ' '.join(server_options)}
+
+    return options
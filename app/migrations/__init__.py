@@ -0,0 +1,11 @@
+"""
+Versioned schema migrations, applied in order by app.services.migrations.
+
+Each module named mNNNN_<name>.py defines:
+- description: one line shown by `flask migrate --status`
+- upgrade(connection): applies the change on a SQLAlchemy connection
+- transactional (optional, default True): False for steps that cannot run in
+  a transaction, such as CREATE INDEX CONCURRENTLY on PostgreSQL. Such steps
+  run in autocommit mode and must be idempotent, since a crash before the
+  version is recorded makes them run again.
+"""
@@ -0,0 +1,16 @@
+from app import db
+from app.models.user import User
+from app.models.journal import Journal, JournalScore
+from app.models.category import Category, Word
+from app.models.rollup import DailyRollup, DailyCategoryRollup
+from app.models.score_memo import StoredScore
+
+description = 'Create missing tables'
+
+def upgrade(connection):
+    """
+    Baseline: create every table that does not exist yet. Databases created by
+    init_db.py before migrations existed keep their tables; the following
+    migrations bring them up to date.
+    """
+    db.metadata.create_all(connection, checkfirst=True)
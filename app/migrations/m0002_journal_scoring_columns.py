@@ -0,0 +1,20 @@
+from sqlalchemy import inspect, text
+
+description = 'Add scoring status, dictionary version, word count and revision to journals'
+
+COLUMNS = [
+    ('score_status', "VARCHAR(16) NOT NULL DEFAULT 'done'"),
+    ('dictionary_version', 'VARCHAR(32)'),
+    ('word_count', 'INTEGER'),
+    ('revision', 'INTEGER NOT NULL DEFAULT 1')
+]
+
+def upgrade(connection):
+    """
+    Add the columns that journals gained since the original schema. Constant
+    defaults make this a metadata-only change on PostgreSQL 11+.
+    """
+    existing = {column['name'] for column in inspect(connection).get_columns('journals')}
+    for name, definition in COLUMNS:
+        if name not in existing:
+            connection.execute(text(f'ALTER TABLE journals ADD COLUMN {name} {definition}'))
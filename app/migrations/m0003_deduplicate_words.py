@@ -0,0 +1,9 @@
+from sqlalchemy import text
+
+description = 'Remove duplicate dictionary words before making (text, category_id) unique'
+
+def upgrade(connection):
+    connection.execute(text(
+        'DELETE FROM words WHERE id NOT IN '
+        '(SELECT MIN(id) FROM words GROUP BY text, category_id)'
+    ))
@@ -0,0 +1,57 @@
+from sqlalchemy import text
+
+description = 'Index journal listing, the pending scoring queue and dictionary words'
+
+transactional = False
+
+# name, table, columns, unique, partial index condition, PostgreSQL INCLUDE columns
+INDEXES = [
+    (
+        'ix_journals_user_created', 'journals', 'user_id, created_at, id', False, None,
+        'revision, dictionary_version, score_status'
+    ),
+    ('ix_journals_pending', 'journals', 'id', False, "score_status = 'pending'", None),
+    ('uq_words_text_category', 'words', 'text, category_id', True, None, None)
+]
+
+def upgrade(connection):
+    """
+    Build the indexes without blocking writes.
+
+    ix_journals_user_created serves GET /journals (filter on user_id, keyset on
+    created_at and id) and date-range statistics; on PostgreSQL it also covers
+    the columns the ETag check reads, so a 304 is an index-only scan.
+    ix_journals_pending keeps the scoring queue lookup small however many
+    journals are scored. uq_words_text_category makes dictionary entries unique
+    and serves lookups by text.
+
+    On PostgreSQL the indexes are built CONCURRENTLY; an invalid index left by
+    an interrupted build is dropped and rebuilt.
+    """
+    postgresql = connection.dialect.name == 'postgresql'
+    for name, table, columns, unique, where, include in INDEXES:
+        statement = f"CREATE {'UNIQUE ' if unique else ''}INDEX "
+        if postgresql:
+            _drop_if_invalid(connection, name)
+            statement += 'CONCURRENTLY '
+        statement += f'IF NOT EXISTS {name} ON {table} ({columns})'
+        if include and postgresql:
+            statement += f' INCLUDE ({include})'
+        if where:
+            statement += f' WHERE {where}'
+        connection.execute(text(statement))
+
+    if postgresql:
+        connection.execute(text('ANALYZE journals'))
+        connection.execute(text('ANALYZE words'))
+
+def _drop_if_invalid(connection, name):
+    valid = connection.execute(
+        text(
+            'SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid '
+            'WHERE c.relname = :name'
+        ),
+        {'name': name}
+    ).scalar()
+    if valid is False:
+        connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {name}'))
@@ -0,0 +1,20 @@
+from sqlalchemy import inspect, text
+from app.models.category import DictionaryGeneration
+
+description = 'Add the dictionary generation counter and administrator users'
+
+def upgrade(connection):
+    """
+    Create the single-row dictionary_generation table, which workers poll to
+    notice dictionary changes, and add users.is_admin for the endpoints that
+    edit the dictionary.
+    """
+    DictionaryGeneration.__table__.create(connection, checkfirst=True)
+    connection.execute(text(
+        'INSERT INTO dictionary_generation (id, generation) '
+        'SELECT 1, 0 WHERE NOT EXISTS (SELECT 1 FROM dictionary_generation WHERE id = 1)'
+    ))
+
+    existing = {column['name'] for column in inspect(connection).get_columns('users')}
+    if 'is_admin' not in existing:
+        connection.execute(text('ALTER TABLE users ADD COLUMN is_admin BOOLEAN NOT NULL DEFAULT false'))
@@ -0,0 +1,58 @@
+from datetime import datetime
+from sqlalchemy import inspect, text
+
+description = 'Backfill and require journals.created_at'
+
+transactional = False
+
+BACKFILL = 'UPDATE journals SET created_at = :now WHERE created_at IS NULL'
+
+# SQLite triggers standing in for the constraint: name, event
+TRIGGERS = [
+    ('journals_created_at_not_null_insert', 'INSERT'),
+    ('journals_created_at_not_null_update', 'UPDATE OF created_at')
+]
+
+def upgrade(connection):
+    """
+    Give journals without a creation time the time of the migration, and make
+    the column NOT NULL: the keyset pagination of GET /journals and the daily
+    rollups both rely on it. Run `flask rebuild-rollups` afterwards if any
+    journal was backfilled, since none of them was counted in a rollup.
+
+    On PostgreSQL the constraint is first added as NOT VALID and validated,
+    which only blocks writes for a moment; SET NOT NULL then uses the validated
+    check instead of scanning the table. SQLite cannot change the nullability
+    of a column in place, so triggers reject NULLs instead.
+    """
+    connection.execute(text(BACKFILL), {'now': datetime.utcnow()})
+    if connection.dialect.name == 'postgresql':
+        _set_not_null(connection)
+    elif _is_nullable(connection):
+        for name, event in TRIGGERS:
+            connection.execute(text(
+                f'CREATE TRIGGER IF NOT EXISTS {name} BEFORE {event} ON journals '
+                'WHEN NEW.created_at IS NULL '
+                "BEGIN SELECT RAISE(ABORT, 'NOT NULL constraint failed: journals.created_at'); END"
+            ))
+
+def _is_nullable(connection):
+    columns = inspect(connection).get_columns('journals')
+    return next(column['nullable'] for column in columns if column['name'] == 'created_at')
+
+def _set_not_null(connection):
+    if not _is_nullable(connection):
+        return
+    exists = connection.execute(text(
+        "SELECT 1 FROM pg_constraint WHERE conname = 'journals_created_at_not_null'"
+    )).scalar()
+    if not exists:
+        connection.execute(text(
+            'ALTER TABLE journals ADD CONSTRAINT journals_created_at_not_null '
+            'CHECK (created_at IS NOT NULL) NOT VALID'
+        ))
+    # Rows written with NULL between the first backfill and the constraint
+    connection.execute(text(BACKFILL), {'now': datetime.utcnow()})
+    connection.execute(text('ALTER TABLE journals VALIDATE CONSTRAINT journals_created_at_not_null'))
+    connection.execute(text('ALTER TABLE journals ALTER COLUMN created_at SET NOT NULL'))
+    connection.execute(text('ALTER TABLE journals DROP CONSTRAINT journals_created_at_not_null'))
@@ -1,4 +1,5 @@
 from app import db
+from datetime import datetime
 
 class Category(db.Model):
     __tablename__ = 'categories'
@@ -21,6 +22,9 @@ class Category(db.Model):
 
 class Word(db.Model):
     __tablename__ = 'words'
+    __table_args__ = (
+        db.Index('uq_words_text_category', 'text', 'category_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.String(50), nullable=False)
@@ -35,3 +39,17 @@ class Word(db.Model):
             'text': self.text,
             'category_id': self.category_id
         }
+
+class DictionaryGeneration(db.Model):
+    """
+    Single-row counter bumped by every change to the categories/words tables,
+    which tells worker processes that their compiled dictionary is outdated
+    """
+    __tablename__ = 'dictionary_generation'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    generation = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DictionaryGeneration {self.generation}>'
@@ -1,26 +1,79 @@
 from app import db
+from app.utils.json_provider import RawJSON
 from datetime import datetime
 import json
 
 class Journal(db.Model):
     __tablename__ = 'journals'
     
+    SCORE_PENDING = 'pending'
+    SCORE_DONE = 'done'
+    SCORE_FAILED = 'failed'
+    
+    # Created online by migration m0004_hot_path_indexes on existing databases
+    __table_args__ = (
+        db.Index(
+            'ix_journals_user_created', 'user_id', 'created_at', 'id',
+            postgresql_include=['revision', 'dictionary_version', 'score_status']
+        ),
+        db.Index(
+            'ix_journals_pending', 'id',
+            postgresql_where=db.text("score_status = 'pending'"),
+            sqlite_where=db.text("score_status = 'pending'")
+        ),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.Text, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     scores = db.Column(db.Text, nullable=True)
+    score_status = db.Column(db.String(16), nullable=False, default=SCORE_DONE, server_default=SCORE_DONE)
+    dictionary_version = db.Column(db.String(32), nullable=True)
+    word_count = db.Column(db.Integer, nullable=True)
+    revision = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     user = db.relationship('User', backref=db.backref('journals', lazy=True))
     
     def __repr__(self):
         return f'<Journal {self.id}>'
     
-    def set_scores(self, scores):
+    @staticmethod
+    def dump_scores(scores):
+        """
+        Serialize LIWC analysis scores for the scores column
+        """
+        return json.dumps(scores)
+    
+    def set_scores(self, scores, dictionary_version=None):
+        """
+        Save LIWC analysis scores as JSON string and mark the journal as scored
+        with the given dictionary version
+        """
+        self.scores = self.dump_scores(scores)
+        self.word_count = scores.get('word_count')
+        self.score_status = self.SCORE_DONE
+        self.dictionary_version = dictionary_version
+        self.bump_revision()
+    
+    def mark_failed(self):
+        """
+        Mark the journal as failed to score
+        """
+        self.score_status = self.SCORE_FAILED
+        self.bump_revision()
+    
+    def bump_revision(self):
         """
-        Save LIWC analysis scores as JSON string
+        Count a change of the scores; the revision is part of the journal's ETag
         """
-        self.scores = json.dumps(scores)
+        self.revision = (self.revision or 0) + 1
+    
+    def is_stale(self, dictionary_version):
+        """
+        Check whether the stored scores were produced by another dictionary version
+        """
+        return self.score_status == self.SCORE_DONE and self.dictionary_version != dictionary_version
     
     def get_scores(self):
         """
@@ -30,12 +83,36 @@ class Journal(db.Model):
             return json.loads(self.scores)
         return None
     
-    def to_dict(self):
-        scores_dict = self.get_scores() if self.scores else None
+    def to_dict(self, raw_scores=False):
+        """
+        Serializable representation of the journal. With raw_scores, the stored
+        scores JSON is passed through as RawJSON for the app's JSON provider to
+        splice into the response without decoding it.
+        """
+        if raw_scores:
+            scores_dict = RawJSON(self.scores) if self.scores else None
+        else:
+            scores_dict = self.get_scores() if self.scores else None
         return {
             'id': self.id,
             'text': self.text,
             'user_id': self.user_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'scores': scores_dict
+            'scores': scores_dict,
+            'score_status': self.score_status,
+            'dictionary_version': self.dictionary_version
         }
+
+class JournalScore(db.Model):
+    """
+    Per-category match count of a journal, stored alongside the scores JSON so
+    that analytics can aggregate in the database. Only non-zero counts are stored.
+    """
+    __tablename__ = 'journal_scores'
+    
+    journal_id = db.Column(db.Integer, db.ForeignKey('journals.id', ondelete='CASCADE'), primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
+    
+    def __repr__(self):
+        return f'<JournalScore {self.journal_id}:{self.category_id}>'
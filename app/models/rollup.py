@@ -0,0 +1,30 @@
+from app import db
+
+class DailyRollup(db.Model):
+    """
+    Number of scored journals and words a user wrote on a day (UTC), kept up
+    to date whenever a journal is scored, rescored or deleted
+    """
+    __tablename__ = 'user_daily_rollups'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    entries = db.Column(db.Integer, nullable=False, default=0)
+    words = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DailyRollup {self.user_id}:{self.day}>'
+
+class DailyCategoryRollup(db.Model):
+    """
+    Sum of a category's match counts over a user's journals of a day (UTC)
+    """
+    __tablename__ = 'user_daily_category_rollups'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DailyCategoryRollup {self.user_id}:{self.day}:{self.category_id}>'
@@ -0,0 +1,17 @@
+from app import db
+from datetime import datetime
+
+class StoredScore(db.Model):
+    """
+    Second tier of the analysis memo: scores of a normalized text hash for a
+    dictionary version, shared by all processes
+    """
+    __tablename__ = 'score_memo'
+    
+    text_hash = db.Column(db.String(64), primary_key=True)
+    dictionary_version = db.Column(db.String(32), primary_key=True)
+    scores = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StoredScore {self.text_hash[:8]}:{self.dictionary_version}>'
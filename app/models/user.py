@@ -1,11 +1,9 @@
 from app import db
-from flask_bcrypt import Bcrypt
+from app.services.password_hashing import password_hasher
 from datetime import datetime, timedelta
 import jwt
 import os
 
-bcrypt = Bcrypt()
-
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -13,21 +11,39 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    is_admin = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     
     def __init__(self, username, password):
         self.username = username
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.set_password(password)
+    
+    def set_password(self, password):
+        """
+        Hash the password with the configured bcrypt cost factor (BCRYPT_LOG_ROUNDS)
+        """
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.check(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """
+        Check whether the stored hash was made with another cost factor than the configured one
+        """
+        return password_hasher.needs_rehash(self.password_hash)
     
-    def generate_token(self):
-        """Generate JWT token for the user"""
+    def generate_token(self, include_claims=False):
+        """
+        Generate JWT token for the user, optionally carrying the user fields that
+        protected routes need so they can skip the users table
+        """
         payload = {
             'exp': datetime.utcnow() + timedelta(days=1),
             'iat': datetime.utcnow(),
             'sub': self.id
         }
+        if include_claims:
+            payload['username'] = self.username
         return jwt.encode(
             payload,
             os.getenv('SECRET_KEY', 'dev-secret-key'),
@@ -37,13 +53,20 @@ class User(db.Model):
     @staticmethod
     def decode_token(token):
         """Decode JWT token and return user ID"""
+        payload = User.decode_token_claims(token)
+        if isinstance(payload, str):
+            return payload
+        return payload['sub']
+    
+    @staticmethod
+    def decode_token_claims(token):
+        """Decode JWT token and return all of its claims"""
         try:
-            payload = jwt.decode(
+            return jwt.decode(
                 token, 
                 os.getenv('SECRET_KEY', 'dev-secret-key'),
                 algorithms=['HS256']
             )
-            return payload['sub']
         except jwt.ExpiredSignatureError:
             return 'Token expired. Please log in again.'
         except jwt.InvalidTokenError:
@@ -1,6 +1,7 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models.user import User
+from app.services.password_hashing import PasswordHasherBusy
 from sqlalchemy.exc import IntegrityError
 
 auth_bp = Blueprint('auth', __name__)
@@ -25,6 +26,7 @@ def register_user():
     - 201: User created successfully
     - 400: Invalid request (missing fields)
     - 409: Username already exists
+    - 503: Too many concurrent password hashing requests, retry later
     """
     data = request.get_json()
     
@@ -61,6 +63,10 @@ def register_user():
             'message': 'Username already exists'
         }), 409
     
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return _busy(e)
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -74,6 +80,7 @@ def login():
     Authenticate user and return JWT token.
     
     Authenticates a user with username and password and returns a JWT token for accessing protected routes.
+    A password hashed with another bcrypt cost factor than BCRYPT_LOG_ROUNDS is rehashed on success.
     
     Required JSON body:
     - username: Username of the account
@@ -89,6 +96,7 @@ def login():
     - 200: Login successful
     - 400: Invalid request (missing fields)
     - 401: Authentication failed (invalid credentials)
+    - 503: Too many concurrent password hashing requests, retry later
     """
     data = request.get_json()
     
@@ -111,7 +119,11 @@ def login():
         user = User.query.filter_by(username=username).first()
         
         if user and user.check_password(password):
-            token = user.generate_token()
+            if user.password_needs_rehash():
+                user.set_password(password)
+                db.session.commit()
+            
+            token = user.generate_token(include_claims=current_app.config['AUTH_TOKEN_CLAIMS'])
             
             return jsonify({
                 'status': 'success',
@@ -125,8 +137,21 @@ def login():
             'message': 'Invalid credentials'
         }), 401
     
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return _busy(e)
+    
     except Exception as e:
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
+
+def _busy(error):
+    """503 response asking the client to retry once the hashing queue drains"""
+    response = jsonify({
+        'status': 'error',
+        'message': str(error)
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
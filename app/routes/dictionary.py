@@ -0,0 +1,89 @@
+from flask import Blueprint, request, jsonify
+from sqlalchemy import select
+from app import db
+from app.models.category import Category, Word
+from app.utils.auth import admin_required
+from app.services.dictionary_cache import dictionary_cache
+from app.services.dictionary_edits import parse_edits, edit_words, DictionaryEditError
+from app.services.dictionary_generation import read_generation
+
+dictionary_bp = Blueprint('dictionary', __name__)
+
+@dictionary_bp.route('/dictionary', methods=['GET'])
+@admin_required
+def get_dictionary(current_user):
+    """
+    Get the LIWC dictionary.
+
+    Lists every category with its words, as stored in the database. Only
+    administrators may call this endpoint.
+
+    Returns:
+    - generation: Dictionary generation, bumped by every change
+    - categories: Object mapping category names to their words
+
+    Status Codes:
+    - 200: Success
+    - 403: The user is not an administrator
+    """
+    categories = {
+        name: []
+        for name in db.session.execute(select(Category.name).order_by(Category.id)).scalars()
+    }
+    rows = db.session.execute(
+        select(Category.name, Word.text).join(Word, Word.category_id == Category.id).order_by(Word.id)
+    )
+    for name, text in rows:
+        categories[name].append(text)
+
+    return jsonify({
+        'status': 'success',
+        'generation': read_generation(),
+        'categories': categories
+    }), 200
+
+@dictionary_bp.route('/dictionary/words', methods=['POST'])
+@admin_required
+def edit_dictionary_words(current_user):
+    """
+    Add, remove and move dictionary words.
+
+    The changes are applied in one transaction and bump the dictionary generation,
+    so every worker rebuilds its compiled dictionary in the background and swaps
+    it in, without a restart. Only administrators may call this endpoint.
+
+    JSON body, each list being optional:
+    - add: [{"word": ..., "category": ...}]
+    - remove: [{"word": ..., "category": ...}]
+    - move: [{"word": ..., "from": ..., "to": ...}]
+
+    Returns:
+    - added, removed, moved: Number of words changed
+    - generation: New dictionary generation
+
+    Status Codes:
+    - 200: Dictionary updated
+    - 400: Invalid request or unknown category
+    - 403: The user is not an administrator
+    """
+    try:
+        add, remove, move = parse_edits(request.get_json(silent=True))
+        counts = edit_words(add, remove, move)
+    except DictionaryEditError as e:
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    generation = read_generation()
+    db.session.commit()
+    # This process picks the change up on its next lookup; the others at their
+    # next generation check or notification
+    dictionary_cache.expire()
+
+    return jsonify({
+        'status': 'success',
+        **counts,
+        'generation': generation
+    }), 200
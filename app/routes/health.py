@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify
 from app import db
+from app.utils.db_routing import read_replica
 from sqlalchemy import text
 import logging
 
@@ -7,11 +8,13 @@ health_bp = Blueprint('health', __name__)
 logger = logging.getLogger(__name__)
 
 @health_bp.route('/health', methods=['GET'])
+@read_replica
 def health_check():
     """
     Health Check Endpoint
     
-    Verifies the application and database connection status.
+    Verifies the application and database connection status. When a read replica is
+    configured, the check runs against the replica.
     
     Returns:
     - status: Status of the application (healthy/unhealthy)
@@ -26,7 +29,7 @@ def health_check():
         
         try:
             db.session.execute(text('SELECT 1'))
-            logger.info("Database connection successful")
+            logger.debug("Database connection successful")
         except Exception as e:
             db_status = "unhealthy"
             db_error = str(e)
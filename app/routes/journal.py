@@ -1,13 +1,26 @@
-from flask import Blueprint, request, jsonify
+from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app, url_for, Response, stream_with_context
+from sqlalchemy import select, tuple_
 from app import db
 from app.models.journal import Journal
 from app.models.user import User
 from app.utils.auth import token_required
+from app.utils.db_routing import read_replica
+from app.utils.pagination import encode_cursor, decode_cursor, parse_limit
+from app.utils.json_provider import RawJSON
+from app.utils.conditional import make_etag, matching_etag, not_modified
+from app.services.scoring_queue import scoring_pool
+from app.services.journal_scoring import score_journals, refresh_stale_scores, write_rescored, delete_journals, snapshot_is_current
 from app.services.liwc_analyzer import LIWCAnalyzer
+from app.services.journal_stats import category_stats, GROUPINGS
+from app.services.rollups import user_trends
+from app.services.tokenizer import read_text, BodyDecodeError
 import json
 
 journal_bp = Blueprint('journal', __name__)
 
+TREND_WINDOWS = {'7d': 7, '30d': 30, '90d': 90}
+
 @journal_bp.route('/journals', methods=['POST'])
 @token_required
 def create_journal(current_user):
@@ -19,51 +32,261 @@ def create_journal(current_user):
     Required JSON body:
     - text: The journal entry text to analyze
     
+    Alternatively, a text/plain body is taken as the text itself. It is read and decoded
+    in chunks, without a second copy of the raw body, which suits very large entries.
+    Bodies are limited to MAX_BODY_SIZE bytes.
+    
+    Query Parameters:
+    - async: Set to 1 to store the entry immediately and score it in the background
+      (defaults to JOURNAL_ASYNC_SCORING)
+    
     Returns:
     - journal_id: ID of the created journal entry
     - score: Analysis results with category scores and total score
+    - score_status: 'pending' when the entry is scored in the background
+    
+    Status Codes:
+    - 201: Journal created and scored
+    - 202: Journal created, scoring is pending
+    - 400: Invalid request (missing or non-string text, or a body that cannot be decoded)
+    - 413: Body larger than MAX_BODY_SIZE
+    - 500: Journal stored, but its text could not be scored (score_status 'failed')
     """
-    data = request.get_json()
+    if request.mimetype == 'text/plain':
+        try:
+            text = read_text(request.stream, request.mimetype_params.get('charset', 'utf-8')) or None
+        except BodyDecodeError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+    else:
+        data = request.get_json()
+        text = data.get('text') if isinstance(data, dict) else None
     
-    if not data or 'text' not in data:
+    if not isinstance(text, str):
         return jsonify({
             'status': 'error',
             'message': 'Text is required'
         }), 400
     
-    scores = LIWCAnalyzer.analyze_text(data['text'])
+    async_scoring = request.args.get('async')
+    if async_scoring is None:
+        async_scoring = current_app.config['JOURNAL_ASYNC_SCORING']
+    else:
+        async_scoring = async_scoring.lower() in ('1', 'true', 'yes')
+    
+    if async_scoring:
+        journal = Journal(
+            text=text,
+            user_id=current_user.id,
+            score_status=Journal.SCORE_PENDING
+        )
+        db.session.add(journal)
+        db.session.commit()
+        
+        scoring_pool.notify(current_app._get_current_object())
+        
+        score_url = url_for('journal.get_journal_score', journal_id=journal.id)
+        return jsonify({
+            'status': 'success',
+            'journal_id': journal.id,
+            'score_status': journal.score_status
+        }), 202, {'Location': score_url}
     
     journal = Journal(
-        text=data['text'],
+        text=text,
         user_id=current_user.id
     )
     
-    journal.set_scores(scores)
+    scores, = score_journals([journal])
     
-    db.session.add(journal)
     db.session.commit()
     
+    if scores is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Scoring failed',
+            'journal_id': journal.id,
+            'score_status': journal.score_status
+        }), 500
+    
     return jsonify({
         'status': 'success',
         'journal_id': journal.id,
         'score': scores
     }), 201
 
+@journal_bp.route('/journals/batch', methods=['POST'])
+@token_required
+def create_journals_batch(current_user):
+    """
+    Create several journal entries at once.
+    
+    Scores all texts against a single snapshot of the LIWC dictionary and inserts
+    the valid entries in one transaction. Invalid entries are reported per item and
+    do not prevent the others from being stored.
+    
+    Required JSON body:
+    - entries: List of objects with a text field, at most JOURNAL_BATCH_MAX_SIZE items
+    
+    Returns:
+    - created: Number of journal entries created and scored
+    - failed: Number of entries that were rejected or could not be scored
+    - results: Per-item status with journal_id and score, or an error message; entries
+      that could not be scored are stored with score_status 'failed' and carry their journal_id
+    
+    Status Codes:
+    - 201: At least one entry was created
+    - 400: Invalid request, or no entry could be created
+    - 413: Too many entries in the batch
+    - 500: No stored entry could be scored
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or not isinstance(data.get('entries'), list) or not data['entries']:
+        return jsonify({
+            'status': 'error',
+            'message': 'A non-empty list of entries is required'
+        }), 400
+    
+    entries = data['entries']
+    max_size = current_app.config['JOURNAL_BATCH_MAX_SIZE']
+    if len(entries) > max_size:
+        return jsonify({
+            'status': 'error',
+            'message': f'A batch may contain at most {max_size} entries'
+        }), 413
+    
+    results = [None] * len(entries)
+    valid = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not isinstance(entry.get('text'), str):
+            results[index] = {
+                'index': index,
+                'status': 'error',
+                'message': 'Text is required'
+            }
+        else:
+            valid.append((index, entry['text']))
+    
+    if valid:
+        journals = [Journal(text=text, user_id=current_user.id) for _, text in valid]
+        all_scores = score_journals(journals)
+        db.session.commit()
+        
+        for (index, _), journal, scores in zip(valid, journals, all_scores):
+            if scores is None:
+                results[index] = {
+                    'index': index,
+                    'status': 'error',
+                    'message': 'Scoring failed',
+                    'journal_id': journal.id,
+                    'score_status': journal.score_status
+                }
+            else:
+                results[index] = {
+                    'index': index,
+                    'status': 'success',
+                    'journal_id': journal.id,
+                    'score': scores
+                }
+    
+    created = sum(1 for result in results if result['status'] == 'success')
+    return jsonify({
+        'status': 'success' if created else 'error',
+        'created': created,
+        'failed': len(entries) - created,
+        'results': results
+    }), 201 if created else 500 if valid else 400
+
+@journal_bp.route('/journals/stats', methods=['GET'])
+@read_replica
+@token_required
+def get_journal_stats(current_user):
+    """
+    Get aggregated category scores of the current user's journals.
+    
+    Sums and averages the per-category counts in the database, optionally grouped by
+    period, without loading individual journal entries.
+    
+    Query Parameters:
+    - from: Only journals created at or after this ISO date or datetime
+    - to: Only journals created before this ISO date or datetime
+    - group_by: none (default), day, week or month
+    
+    Returns:
+    - stats: One item per period with the number of entries and, per category and
+      for the total, the sum and average count per entry
+    
+    Status Codes:
+    - 200: Statistics computed successfully
+    - 400: Invalid date or grouping
+    """
+    group_by = request.args.get('group_by', 'none')
+    if group_by not in GROUPINGS:
+        return jsonify({
+            'status': 'error',
+            'message': f"group_by must be one of {', '.join(GROUPINGS)}"
+        }), 400
+    
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        start = datetime.fromisoformat(start) if start else None
+        end = datetime.fromisoformat(end) if end else None
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': 'from and to must be ISO dates'
+        }), 400
+    
+    return jsonify({
+        'status': 'success',
+        'group_by': group_by,
+        'stats': category_stats(current_user.id, start, end, group_by)
+    }), 200
+
 @journal_bp.route('/journals/<int:journal_id>/score', methods=['GET'])
+@read_replica
 @token_required
 def get_journal_score(current_user, journal_id):
     """
     Get the score for a journal entry.
     
     Retrieves the linguistic analysis scores for a previously submitted journal entry.
+    Scores produced by an older version of the LIWC dictionary are recomputed and
+    stored before they are returned.
+    
+    Responses carry an ETag derived from the journal's revision and dictionary version.
+    A request whose If-None-Match still matches is answered with 304 after reading only
+    those columns.
     
     Parameters:
     - journal_id: ID of the journal entry to retrieve scores for
     
     Returns:
     - journal_id: ID of the journal entry
-    - score: Analysis results with category scores and total score
+    - score: Analysis results with category scores and total score, null while pending
+    - score_status: pending, done or failed
+    
+    Status Codes:
+    - 200: Score available
+    - 202: Scoring is still pending
+    - 304: Score unchanged since the ETag in If-None-Match
+    - 403: Journal belongs to another user
+    - 404: Journal not found
     """
+    if request.if_none_match:
+        row = db.session.execute(
+            select(Journal.user_id, Journal.id, Journal.revision, Journal.dictionary_version, Journal.score_status)
+            .where(Journal.id == journal_id)
+        ).first()
+        if row and row.user_id == current_user.id and _is_current([row], LIWCAnalyzer.snapshot().version):
+            tag = matching_etag(make_etag('journal', *row[1:]))
+            if tag:
+                return not_modified(tag)
+    
     journal = db.session.get(Journal, journal_id)
     
     if not journal:
@@ -78,27 +301,241 @@ def get_journal_score(current_user, journal_id):
             'message': 'You do not have permission to access this journal'
         }), 403
     
-    scores = journal.get_scores()
-    return jsonify({
+    refresh_stale_scores([journal])
+    
+    response = jsonify({
         'status': 'success',
         'journal_id': journal.id,
-        'score': scores
+        'score': RawJSON(journal.scores) if journal.scores else None,
+        'score_status': journal.score_status,
+        'dictionary_version': journal.dictionary_version
+    })
+    if journal.score_status == Journal.SCORE_PENDING:
+        return response, 202
+    response.set_etag(make_etag('journal', *_etag_fields(journal)))
+    return response
+
+@journal_bp.route('/journals/<int:journal_id>', methods=['DELETE'])
+@token_required
+def delete_journal(current_user, journal_id):
+    """
+    Delete a journal entry.
+    
+    Removes the journal and its scores, and takes it out of the user's daily trends.
+    
+    Parameters:
+    - journal_id: ID of the journal entry to delete
+    
+    Status Codes:
+    - 200: Journal deleted
+    - 403: Journal belongs to another user
+    - 404: Journal not found
+    """
+    journal = db.session.get(Journal, journal_id)
+    
+    if not journal:
+        return jsonify({
+            'status': 'error',
+            'message': 'Journal not found'
+        }), 404
+    
+    if journal.user_id != current_user.id:
+        return jsonify({
+            'status': 'error',
+            'message': 'You do not have permission to access this journal'
+        }), 403
+    
+    delete_journals([journal.id])
+    db.session.commit()
+    
+    return jsonify({
+        'status': 'success',
+        'message': 'Journal deleted'
+    }), 200
+
+@journal_bp.route('/users/me/trends', methods=['GET'])
+@read_replica
+@token_required
+def get_user_trends(current_user):
+    """
+    Get the daily LIWC category trends of the current user.
+    
+    Reads the per-day rollups that are updated whenever a journal is scored, rescored
+    or deleted, so the cost depends on the length of the window, not on the number
+    of journals.
+    
+    Query Parameters:
+    - window: 7d (default), 30d or 90d, ending today (UTC)
+    
+    Returns:
+    - days: One item per day with the number of entries, words and per-category counts
+    - totals: The same counts summed over the window
+    
+    Status Codes:
+    - 200: Trends retrieved successfully
+    - 400: Invalid window
+    """
+    window = request.args.get('window', '7d')
+    if window not in TREND_WINDOWS:
+        return jsonify({
+            'status': 'error',
+            'message': f"window must be one of {', '.join(TREND_WINDOWS)}"
+        }), 400
+    
+    days = user_trends(current_user.id, TREND_WINDOWS[window], datetime.utcnow().date())
+    totals = {
+        'entries': sum(day['entries'] for day in days),
+        'words': sum(day['words'] for day in days),
+        'categories': {
+            name: sum(day['categories'][name] for day in days)
+            for name in days[0]['categories']
+        }
+    }
+    
+    return jsonify({
+        'status': 'success',
+        'window': window,
+        'days': days,
+        'totals': totals
     }), 200
 
 @journal_bp.route('/journals', methods=['GET'])
+@read_replica
 @token_required
 def get_user_journals(current_user):
     """
-    Get all journals for the current user.
+    Get the journals of the current user, newest first.
     
-    Retrieves all journal entries submitted by the authenticated user.
+    Retrieves journal entries submitted by the authenticated user one page at a time,
+    using keyset pagination on (created_at, id). Scores produced by an older version
+    of the LIWC dictionary are recomputed and stored first.
+    
+    Pages carry an ETag derived from the revisions of their journals; a request whose
+    If-None-Match still matches is answered with 304 after reading only those columns.
+    
+    With an Accept: application/x-ndjson header, journals are instead streamed one JSON
+    object per line as they are read from the database, starting at the cursor and
+    ending after limit rows if one is given.
+    
+    Query Parameters:
+    - limit: Page size (defaults to JOURNAL_PAGE_SIZE, at most JOURNAL_PAGE_MAX_SIZE)
+    - cursor: next_cursor value of the previous page
     
     Returns:
     - journals: List of journal entries with their details
+    - next_cursor: Cursor of the next page, or null on the last page
+    
+    Status Codes:
+    - 200: Journals retrieved successfully
+    - 304: Page unchanged since the ETag in If-None-Match
+    - 400: Invalid limit or cursor
     """
-    journals = Journal.query.filter_by(user_id=current_user.id).all()
+    streaming = request.accept_mimetypes.best == 'application/x-ndjson'
     
-    return jsonify({
+    try:
+        if streaming and 'limit' not in request.args:
+            limit = None
+        else:
+            limit = parse_limit(
+                request.args.get('limit'),
+                current_app.config['JOURNAL_PAGE_SIZE'],
+                current_app.config['JOURNAL_PAGE_MAX_SIZE']
+            )
+        cursor = request.args.get('cursor')
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    query = (
+        select(Journal)
+        .where(Journal.user_id == current_user.id)
+        .order_by(Journal.created_at.desc(), Journal.id.desc())
+    )
+    if position:
+        query = query.where(tuple_(Journal.created_at, Journal.id) < position)
+    
+    if streaming:
+        if limit:
+            query = query.limit(limit)
+        return Response(
+            stream_with_context(_stream_journals(query)),
+            mimetype='application/x-ndjson'
+        )
+    
+    if request.if_none_match:
+        rows = db.session.execute(
+            query.with_only_columns(
+                Journal.id, Journal.revision, Journal.dictionary_version, Journal.score_status
+            ).limit(limit + 1)
+        ).all()
+        page = rows[:limit]
+        if _is_current(page, LIWCAnalyzer.snapshot().version):
+            tag = matching_etag(_page_etag(current_user.id, [tuple(row) for row in page], len(rows) > limit))
+            if tag:
+                return not_modified(tag)
+    
+    journals = db.session.execute(query.limit(limit + 1)).scalars().all()
+    has_more = len(journals) > limit
+    next_cursor = None
+    if has_more:
+        journals = journals[:limit]
+        next_cursor = encode_cursor(journals[-1].created_at, journals[-1].id)
+    
+    refresh_stale_scores(journals)
+    
+    response = jsonify({
         'status': 'success',
-        'journals': [journal.to_dict() for journal in journals]
-    }), 200
+        'journals': [journal.to_dict(raw_scores=True) for journal in journals],
+        'next_cursor': next_cursor
+    })
+    response.set_etag(_page_etag(current_user.id, [_etag_fields(journal) for journal in journals], has_more))
+    return response
+
+def _etag_fields(journal):
+    return journal.id, journal.revision, journal.dictionary_version, journal.score_status
+
+def _page_etag(user_id, entries, has_more):
+    return make_etag('journals', user_id, tuple(entries), has_more)
+
+def _is_current(rows, version):
+    """
+    Whether the stored state of journal rows is what a full request would return,
+    i.e. none of them is pending or due for rescoring
+    """
+    return not any(
+        row.score_status == Journal.SCORE_PENDING
+        or (row.score_status == Journal.SCORE_DONE and row.dictionary_version != version)
+        for row in rows
+    )
+
+def _stream_journals(query, batch_size=500):
+    """
+    Yield journals as NDJSON lines from a server-side cursor.
+    
+    Stale scores are recomputed for the output as rows are read; they are written
+    back in one bulk update once the cursor is exhausted, since committing earlier
+    would close it.
+    """
+    compiled = LIWCAnalyzer.snapshot()
+    current = None
+    refreshed = []
+    dumps = current_app.json.dumps
+    
+    rows = db.session.execute(query.execution_options(yield_per=batch_size)).scalars()
+    for journal in rows:
+        item = journal.to_dict(raw_scores=True)
+        if journal.is_stale(compiled.version):
+            if current is None:
+                current = snapshot_is_current(compiled)
+            if current:
+                item['scores'] = LIWCAnalyzer.score_text(journal.text, compiled)
+                item['dictionary_version'] = compiled.version
+                refreshed.append((journal.id, item['scores']))
+        yield dumps(item) + '\n'
+    
+    if refreshed:
+        write_rescored(refreshed, compiled)
+        db.session.commit()
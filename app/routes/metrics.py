@@ -0,0 +1,34 @@
+from flask import Blueprint, Response
+from prometheus_client import CollectorRegistry, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+import os
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Metrics Endpoint
+
+    Serves the application metrics in the Prometheus text exposition format.
+    When PROMETHEUS_MULTIPROC_DIR is set, as it is under gunicorn, the values of
+    all worker processes are aggregated.
+
+    Returns:
+    - http_request_duration_seconds: Request latency per endpoint, method and status
+    - db_queries_per_request / db_query_duration_seconds_per_request: Database
+      queries issued by each request and the time spent in them, per endpoint
+    - analyze_phase_duration_seconds: Text analysis time per phase (dictionary_load,
+      tokenize, count)
+    - password_hash_duration_seconds: bcrypt time per operation (hash, check)
+    - json_serialization_duration_seconds: JSON serialization time
+
+    Status Codes:
+    - 200: Metrics returned successfully
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,129 @@
+import time
+from collections import Counter
+from itertools import compress, filterfalse
+from app.services.tokenizer import WORD_RE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class BulkScores:
+    """
+    Scores of a batch of texts computed as one sparse matrix product.
+
+    The tokens of every text are mapped to ids in the vocabulary of the batch,
+    so the batch becomes a single array of term ids: a document-term count
+    matrix in coordinate form, one (document, term) entry per token. Each
+    distinct term is resolved against the dictionary once, which gives the
+    term-category membership matrix, and the product of the two holds the
+    single-word counts of every text. Phrases are then matched from the
+    positions of the tokens that start a multi-word entry.
+
+    The product runs in numpy when it is installed and in Python otherwise.
+    After run():
+    - tokenize_seconds: time spent lowercasing, splitting and mapping tokens to ids
+    - count_seconds: time spent resolving terms and computing the product
+    """
+    __slots__ = ('compiled', 'tokenize_seconds', 'count_seconds')
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.tokenize_seconds = 0.0
+        self.count_seconds = 0.0
+
+    def run(self, texts):
+        """Return the scores of texts, each equal to what score_tokens gives"""
+        started = time.perf_counter()
+        vocabulary = {}
+        term_ids = []
+        lengths = []
+        for text in texts:
+            tokens = WORD_RE.findall(text.lower())
+            for term in filterfalse(vocabulary.__contains__, tokens):
+                vocabulary[term] = len(vocabulary)
+            term_ids.extend(map(vocabulary.__getitem__, tokens))
+            lengths.append(len(tokens))
+        self.tokenize_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        matcher = self.compiled.matcher
+        terms = list(vocabulary)
+        memberships = [matcher.resolve(term) or () for term in terms]
+        if matcher.max_phrase_length:
+            starts = [matcher.starts_phrase(term) for term in terms]
+        else:
+            starts = None
+
+        multiply = _multiply if numpy is not None else _multiply_python
+        rows, phrase_starts = multiply(term_ids, lengths, memberships, starts, len(self.compiled.categories))
+
+        for row_index, begin, end in phrase_starts:
+            row = rows[row_index]
+            window = [terms[term_id] for term_id in term_ids[begin:min(end, begin + matcher.max_phrase_length)]]
+            for indices in matcher.match_phrases(window):
+                for index in indices:
+                    row[index] += 1
+
+        names = self.compiled.categories
+        results = [
+            {'categories': dict(zip(names, row)), 'total': sum(row), 'word_count': word_count}
+            for row, word_count in zip(rows, lengths)
+        ]
+        self.count_seconds = time.perf_counter() - started
+        return results
+
+def _multiply(term_ids, lengths, memberships, starts, size):
+    """
+    Multiply the document-term matrix, given as the concatenated term ids of the
+    rows and the row lengths, by the term-category membership lists.
+
+    Returns the counts as one list per row, and (row, position, row end) for
+    every position holding a term flagged in starts.
+    """
+    rows = len(lengths)
+    member_counts = numpy.fromiter(map(len, memberships), dtype=numpy.int64, count=len(memberships))
+    member_starts = numpy.cumsum(member_counts) - member_counts
+    member_indices = numpy.fromiter(
+        (index for indices in memberships for index in indices),
+        dtype=numpy.int64,
+        count=int(member_counts.sum())
+    )
+
+    term_ids = numpy.array(term_ids, dtype=numpy.int64)
+    row_ids = numpy.repeat(numpy.arange(rows, dtype=numpy.int64), lengths)
+
+    # Keep the tokens whose term belongs to a category and expand each one into
+    # a (row, category) cell per category of its term; summing the cells adds
+    # up the duplicate entries of the coordinate matrix
+    fanout = member_counts[term_ids]
+    matched = fanout > 0
+    fanout = fanout[matched]
+    offsets = numpy.arange(int(fanout.sum()), dtype=numpy.int64) - numpy.repeat(numpy.cumsum(fanout) - fanout, fanout)
+    categories = member_indices[numpy.repeat(member_starts[term_ids[matched]], fanout) + offsets]
+    cells = numpy.repeat(row_ids[matched], fanout) * size + categories
+    counts = numpy.bincount(cells, minlength=rows * size).reshape(rows, size).tolist()
+
+    if starts is None:
+        return counts, []
+    row_ends = numpy.cumsum(lengths)
+    positions = numpy.flatnonzero(numpy.array(starts, dtype=bool)[term_ids])
+    position_rows = row_ids[positions]
+    return counts, list(zip(position_rows.tolist(), positions.tolist(), row_ends[position_rows].tolist()))
+
+def _multiply_python(term_ids, lengths, memberships, starts, size):
+    """Pure Python version of _multiply"""
+    rows = []
+    phrase_starts = []
+    end = 0
+    for row_index, length in enumerate(lengths):
+        begin, end = end, end + length
+        row = [0] * size
+        for term_id, count in Counter(term_ids[begin:end]).items():
+            for index in memberships[term_id]:
+                row[index] += count
+        rows.append(row)
+        if starts is not None:
+            flags = map(starts.__getitem__, term_ids[begin:end])
+            phrase_starts.extend((row_index, position, end) for position in compress(range(begin, end), flags))
+    return rows, phrase_starts
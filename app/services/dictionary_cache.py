@@ -0,0 +1,289 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from flask import current_app
+from sqlalchemy import select
+from app.services.dictionary_file import MappedMatcher, DictionaryFileError, write_dictionary_file
+from app.services.dictionary_generation import GenerationListener, read_generation
+from app.services.liwc_matcher import TrieMatcher
+from app.utils.metrics import (
+    DICTIONARY_HITS, DICTIONARY_MISSES, DICTIONARY_REBUILDS, DICTIONARY_MAPPED_LOADS, DICTIONARY_REBUILD_SECONDS
+)
+from app.models.category import Category, Word
+from app import db
+
+logger = logging.getLogger(__name__)
+
+class CompiledDictionary:
+    """
+    Immutable matcher compiled from the categories/words tables
+
+    - categories: category names ordered by category id
+    - category_ids: database ids of those categories
+    - matcher: Matcher engine resolving entries to tuples of category indices
+    - generation: dictionary generation the tables were read at
+    - version: checksum of the compiled content
+    - source: 'database' or 'mapped'
+    """
+    __slots__ = ('categories', 'category_ids', 'matcher', 'generation', 'version', 'source')
+
+    def __init__(self, categories, matcher, generation, version=None, source='database', category_ids=None):
+        self.categories = categories
+        self.category_ids = category_ids or []
+        self.matcher = matcher
+        self.generation = generation
+        self.version = version or self.checksum(categories, matcher)
+        self.source = source
+
+    @classmethod
+    def from_file(cls, path):
+        mapped = MappedMatcher(path)
+        return cls(
+            mapped.categories,
+            mapped,
+            mapped.generation,
+            mapped.version,
+            source='mapped',
+            category_ids=mapped.category_ids
+        )
+
+    @staticmethod
+    def checksum(categories, matcher):
+        digest = hashlib.sha1()
+        for name in categories:
+            digest.update(name.encode('utf-8') + b'\x00')
+        digest.update(b'\x01')
+        for pattern, indices in sorted(matcher.items()):
+            digest.update(f'{pattern}\x00{indices}\x00'.encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+def compile_dictionary(generation=None):
+    """
+    Load the categories/words tables and compile them into a matcher.
+
+    The generation is read before the tables, so a change committed in between
+    leaves the result labelled with an older generation and it is rebuilt at
+    the next check, never the other way round.
+    """
+    if generation is None:
+        generation = read_generation()
+
+    category_rows = db.session.execute(
+        select(Category.id, Category.name).order_by(Category.id)
+    ).all()
+    category_index = {category_id: index for index, (category_id, _) in enumerate(category_rows)}
+
+    word_rows = db.session.execute(
+        select(Word.text, Word.category_id).order_by(Word.id)
+    )
+    matcher = TrieMatcher(
+        (text, category_index[category_id])
+        for text, category_id in word_rows
+        if category_id in category_index
+    )
+
+    return CompiledDictionary(
+        [name for _, name in category_rows],
+        matcher,
+        generation,
+        category_ids=[category_id for category_id, _ in category_rows]
+    )
+
+class DictionaryCache:
+    """
+    Process-wide cache of the compiled LIWC dictionary.
+
+    Every change to the dictionary tables bumps the generation counter in the
+    database: ORM flushes of categories or words do it automatically, and
+    import_dictionary() does it explicitly. Other writes, such as raw SQL, must
+    call bump_generation() or they go unnoticed. The cache reads that counter at most once every
+    DICTIONARY_CHECK_INTERVAL seconds, or as soon as a PostgreSQL notification
+    arrives, and only reloads and recompiles the tables when it changed. With
+    DICTIONARY_BACKGROUND_RELOAD the rebuild runs in a background thread while
+    requests keep using the previous compiled dictionary; the new one is
+    swapped in by a single assignment once complete, so a request never sees
+    a half-built matcher.
+    """
+
+    default_check_interval = 5.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._compiled = None
+        self._generation = None
+        self._next_check = 0.0
+        self._rebuild_thread = None
+        self._listener = GenerationListener(self.expire)
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.background_rebuilds = 0
+        self.mapped_loads = 0
+        self.rebuild_seconds = 0.0
+        self.last_rebuild_seconds = 0.0
+
+    def _count_hit(self):
+        self.hits += 1
+        DICTIONARY_HITS.inc()
+
+    def get(self):
+        """Return the compiled dictionary, rebuilding it if the generation changed"""
+        compiled = self._compiled
+        now = time.monotonic()
+        if compiled is not None and now < self._next_check:
+            self._count_hit()
+            return compiled
+
+        config = current_app.config
+        if config.get('DICTIONARY_LISTEN', True) and db.engine.dialect.name == 'postgresql':
+            self._listener.ensure_started(db.engine)
+
+        generation = read_generation()
+        self._next_check = now + config.get('DICTIONARY_CHECK_INTERVAL', self.default_check_interval)
+        if compiled is not None and generation == self._generation:
+            self._count_hit()
+            return compiled
+
+        if compiled is not None and config.get('DICTIONARY_BACKGROUND_RELOAD', True):
+            self._rebuild_in_background(generation)
+            self._count_hit()
+            return compiled
+
+        with self._lock:
+            compiled = self._compiled
+            if compiled is not None and generation == self._generation:
+                self._count_hit()
+                return compiled
+            compiled = self._rebuild(generation)
+            self._compiled = compiled
+            self._generation = generation
+            return compiled
+
+    def _rebuild(self, generation, mode='request'):
+        """Load or compile the tables of generation, without swapping the result in"""
+        self.misses += 1
+        DICTIONARY_MISSES.inc()
+        compiled = self._load_mapped(generation)
+        if compiled is None:
+            started = time.perf_counter()
+            compiled = compile_dictionary(generation)
+            elapsed = time.perf_counter() - started
+
+            self.rebuilds += 1
+            self.rebuild_seconds += elapsed
+            self.last_rebuild_seconds = elapsed
+            DICTIONARY_REBUILDS.labels(mode=mode).inc()
+            DICTIONARY_REBUILD_SECONDS.observe(elapsed)
+        return compiled
+
+    def _rebuild_in_background(self, generation):
+        # Requests keep the previous dictionary while the thread compiles, so
+        # they must not wait on the lock held for a synchronous rebuild
+        with self._start_lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(
+                target=self._background_rebuild,
+                args=(current_app._get_current_object(), generation),
+                name='dictionary-rebuild',
+                daemon=True
+            )
+            self._rebuild_thread.start()
+
+    def _background_rebuild(self, app, generation):
+        with app.app_context():
+            try:
+                compiled = self._rebuild(generation, mode='background')
+                with self._lock:
+                    if self._generation is None or generation >= self._generation:
+                        self._compiled = compiled
+                        self._generation = generation
+                    self.background_rebuilds += 1
+                logger.info(f"Rebuilt the compiled dictionary for generation {generation}")
+            except Exception as e:
+                logger.error(f"Rebuilding the compiled dictionary failed: {e}")
+                self.expire()
+            finally:
+                db.session.remove()
+
+    def wait(self, timeout=None):
+        """Wait for a background rebuild in progress to finish"""
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def expire(self):
+        """Make the next lookup check the generation"""
+        self._next_check = 0.0
+
+    def _load_mapped(self, generation):
+        """
+        Map the prebuilt dictionary file if it was built at generation.
+
+        Returns None when no file is configured, it cannot be read, or it was
+        built from another generation of the tables.
+        """
+        path = current_app.config.get('LIWC_DICTIONARY_FILE')
+        if not path or not os.path.exists(path):
+            return None
+
+        try:
+            compiled = CompiledDictionary.from_file(path)
+        except DictionaryFileError as e:
+            logger.warning(f"Ignoring compiled dictionary file: {e}")
+            return None
+
+        if compiled.generation != generation:
+            logger.warning(f"Compiled dictionary file {path} is outdated, rebuilding from the database")
+            compiled.matcher.close()
+            return None
+
+        self.mapped_loads += 1
+        DICTIONARY_MAPPED_LOADS.inc()
+        return compiled
+
+    def clear(self):
+        """Drop the compiled dictionary and reset the counters"""
+        self.wait()
+        with self._lock:
+            self._compiled = None
+            self._generation = None
+            self._next_check = 0.0
+            self._reset_stats()
+
+    def stats(self):
+        """
+        Counters of this process since the last clear() and the state of the
+        compiled dictionary, for tests; the dictionary_cache_lookups,
+        dictionary_rebuilds, dictionary_mapped_loads and
+        dictionary_rebuild_duration_seconds metrics are the ones exported
+        """
+        compiled = self._compiled
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'rebuilds': self.rebuilds,
+            'background_rebuilds': self.background_rebuilds,
+            'mapped_loads': self.mapped_loads,
+            'rebuild_seconds': self.rebuild_seconds,
+            'last_rebuild_seconds': self.last_rebuild_seconds,
+            'version': compiled.version if compiled else None,
+            'generation': self._generation,
+            'entries': len(compiled.matcher) if compiled else 0,
+            'source': compiled.source if compiled else None
+        }
+
+dictionary_cache = DictionaryCache()
+
+def build_dictionary_file(path):
+    """
+    Compile the categories/words tables into the on-disk dictionary file
+    """
+    compiled = compile_dictionary()
+    return write_dictionary_file(path, compiled), compiled.version
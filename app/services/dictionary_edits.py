@@ -0,0 +1,118 @@
+from sqlalchemy import select
+from app.models.category import Category, Word
+from app.services.dictionary_import import MAX_LENGTH
+from app.utils.db_routing import pin_primary
+from app import db
+
+class DictionaryEditError(ValueError):
+    """Raised when a dictionary edit is malformed or names an unknown category"""
+
+def parse_edits(data):
+    """
+    Validate an edit document into (add, remove, move) lists.
+
+    - add: [{"word": ..., "category": ...}]
+    - remove: [{"word": ..., "category": ...}]
+    - move: [{"word": ..., "from": ..., "to": ...}]
+    """
+    if not isinstance(data, dict):
+        raise DictionaryEditError('Expected an object with add, remove and move lists')
+    add = _entries(data, 'add', ('word', 'category'))
+    remove = _entries(data, 'remove', ('word', 'category'))
+    move = _entries(data, 'move', ('word', 'from', 'to'))
+    if not (add or remove or move):
+        raise DictionaryEditError('No changes given')
+    return add, remove, move
+
+def _entries(data, key, fields):
+    items = data.get(key) or []
+    if not isinstance(items, list):
+        raise DictionaryEditError(f'{key}: expected a list')
+    entries = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise DictionaryEditError(f'{key}[{index}]: expected an object with {", ".join(fields)}')
+        values = []
+        for field in fields:
+            value = item.get(field)
+            if not isinstance(value, str) or not value.strip():
+                raise DictionaryEditError(f'{key}[{index}]: {field} is required')
+            if len(value) > MAX_LENGTH:
+                raise DictionaryEditError(f'{key}[{index}]: {field} is longer than {MAX_LENGTH} characters')
+            values.append(value.strip())
+        entries.append(tuple(values))
+    return entries
+
+def edit_words(add=(), remove=(), move=()):
+    """
+    Add, remove and move dictionary words; the caller commits.
+
+    - add: (word, category) pairs, words already in the category are skipped
+    - remove: (word, category) pairs, words not in the category are skipped
+    - move: (word, from category, to category) triples; a word already in the
+      target category is only removed from the source one
+
+    Removals are applied first, then additions, then moves. The
+    changes go through the ORM, so the flush bumps the dictionary generation
+    and every process rebuilds its compiled dictionary. Returns the counts of
+    words added, removed and moved. Raises DictionaryEditError if a category
+    does not exist, before anything is written.
+    """
+    pin_primary()
+    names = {category for _, category in add}
+    names.update(category for _, category in remove)
+    for _, source, target in move:
+        names.update((source, target))
+    category_ids = dict(db.session.execute(
+        select(Category.name, Category.id).where(Category.name.in_(names))
+    ).all())
+    unknown = sorted(names - category_ids.keys())
+    if unknown:
+        raise DictionaryEditError(f'Unknown categories: {", ".join(unknown)}')
+
+    texts = {entry[0] for entries in (add, remove, move) for entry in entries}
+    words = {
+        (word.text, word.category_id): word
+        for word in db.session.execute(select(Word).where(Word.text.in_(texts))).scalars()
+    }
+
+    counts = {'added': 0, 'removed': 0, 'moved': 0}
+    for text, category in remove:
+        word = words.pop((text, category_ids[category]), None)
+        if word is not None:
+            _discard(word)
+            counts['removed'] += 1
+
+    # Deletes are flushed first, so a word can be moved or added back into
+    # the category it was just removed from
+    db.session.flush()
+
+    for text, category in add:
+        key = (text, category_ids[category])
+        if key not in words:
+            words[key] = Word(text=text, category_id=key[1])
+            db.session.add(words[key])
+            counts['added'] += 1
+
+    for text, source, target in move:
+        if source == target:
+            continue
+        word = words.pop((text, category_ids[source]), None)
+        if word is None:
+            continue
+        key = (text, category_ids[target])
+        if key in words:
+            _discard(word)
+        else:
+            word.category_id = key[1]
+            words[key] = word
+        counts['moved'] += 1
+
+    db.session.flush()
+    return counts
+
+def _discard(word):
+    if word in db.session.new:
+        db.session.expunge(word)
+    else:
+        db.session.delete(word)
@@ -0,0 +1,285 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from app.services.liwc_matcher import Matcher, parse_pattern
+
+MAGIC = b'LIWCDICT'
+FORMAT_VERSION = 5
+
+# magic, format version, byte order, category count, dictionary generation, content version
+HEADER = struct.Struct('<8sIBxxxIq16s')
+# entry count, key blob size
+TABLE_HEADER = struct.Struct('<II')
+# value set count, index pool size
+VALUE_SETS_HEADER = struct.Struct('<II')
+
+class DictionaryFileError(Exception):
+    """Raised when a compiled dictionary file is missing, corrupt or outdated"""
+
+def _pack_table(entries):
+    """
+    Pack sorted (key bytes, value set id) pairs as a string table: entry count
+    and blob size, entry_count + 1 uint32 key offsets, entry_count uint32 value
+    set ids and the concatenated keys.
+    """
+    offsets = array('I', [0])
+    values = array('I')
+    blob = bytearray()
+    for key, value in entries:
+        blob += key
+        offsets.append(len(blob))
+        values.append(value)
+    return TABLE_HEADER.pack(len(entries), len(blob)) + offsets.tobytes() + values.tobytes() + bytes(blob)
+
+def _stem_parents(stems):
+    """
+    For each sorted stem, the index of the longest other stem that is a prefix
+    of it, or -1
+    """
+    parents = array('i')
+    stack = []
+    for index, (key, _) in enumerate(stems):
+        while stack and not key.startswith(stems[stack[-1]][0]):
+            stack.pop()
+        parents.append(stack[-1] if stack else -1)
+        stack.append(index)
+    return parents
+
+def _pack_value_sets(value_sets):
+    """
+    Pack the distinct category index tuples: set count and pool size,
+    set_count + 1 uint32 offsets and the uint16 index pool.
+    """
+    offsets = array('I', [0])
+    pool = array('H')
+    for indices in value_sets:
+        pool.extend(indices)
+        offsets.append(len(pool))
+    return VALUE_SETS_HEADER.pack(len(value_sets), len(pool)) + offsets.tobytes() + pool.tobytes()
+
+def write_dictionary_file(path, compiled):
+    """
+    Write a compiled dictionary to disk.
+
+    Layout after the header:
+    - categories, each as a uint32 id and a uint32 length followed by the UTF-8 name
+    - the distinct category index tuples that entries refer to
+    - string table of exact words
+    - string table of stems, followed by an int32 parent index per stem
+    - string table of multi-word phrases in canonical form ('thank you', 'get* along')
+
+    All keys are UTF-8 encoded and sorted bytewise. The file is written next to
+    the target and renamed into place, so workers that still map the previous
+    file keep reading a consistent copy.
+    """
+    value_sets = {}
+    exact, stems, phrases = [], [], []
+    for pattern, indices in compiled.matcher.items():
+        value = value_sets.setdefault(indices, len(value_sets))
+        elements = parse_pattern(pattern)
+        if len(elements) > 1:
+            phrases.append((pattern.encode('utf-8'), value))
+        elif elements[0][1]:
+            stems.append((elements[0][0].encode('utf-8'), value))
+        else:
+            exact.append((elements[0][0].encode('utf-8'), value))
+    exact.sort()
+    stems.sort()
+    phrases.sort()
+
+    categories = bytearray()
+    for category_id, name in zip(compiled.category_ids, compiled.categories):
+        encoded = name.encode('utf-8')
+        categories += struct.pack('<II', category_id, len(encoded)) + encoded
+
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        sys.byteorder == 'little',
+        len(compiled.categories),
+        compiled.generation,
+        compiled.version.encode('ascii')
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.liwc-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(categories)
+            f.write(_pack_value_sets(list(value_sets)))
+            f.write(_pack_table(exact))
+            f.write(_pack_table(stems))
+            f.write(_stem_parents(stems).tobytes())
+            f.write(_pack_table(phrases))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return len(exact) + len(stems) + len(phrases)
+
+class _StringTable:
+    """Sorted string table read in place from a memory map"""
+
+    def __init__(self, mm, view, position):
+        count, blob_size = TABLE_HEADER.unpack_from(mm, position)
+        position += TABLE_HEADER.size
+        offsets_size = (count + 1) * 4
+        self.offsets = view[position:position + offsets_size].cast('I')
+        position += offsets_size
+        self.values = view[position:position + count * 4].cast('I')
+        position += count * 4
+        self.mm = mm
+        self.base = position
+        self.count = count
+        self.end = position + blob_size
+
+    def key(self, index):
+        offsets = self.offsets
+        return self.mm[self.base + offsets[index]:self.base + offsets[index + 1]]
+
+    def find(self, key):
+        """Index of key, or -1"""
+        index = self.bisect_right(key) - 1
+        if index >= 0 and self.key(index) == key:
+            return index
+        return -1
+
+    def bisect_right(self, key):
+        mm = self.mm
+        offsets = self.offsets
+        base = self.base
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key < mm[base + offsets[mid]:base + offsets[mid + 1]]:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def items(self):
+        for index in range(self.count):
+            yield self.key(index).decode('utf-8'), self.values[index]
+
+    def release(self):
+        self.offsets.release()
+        self.values.release()
+
+class MappedMatcher(Matcher):
+    """
+    Read-only, memory-mapped matcher over a compiled dictionary file.
+
+    Exact words are found by binary search of the sorted table. For stems, the
+    largest stem not greater than the token is located by binary search and its
+    parent chain (stems that are prefixes of it) is followed until one is a
+    prefix of the token; that is the longest matching stem. Every process that
+    maps the same file shares a single page-cache copy of these tables. Only the
+    phrase automaton, which is small, is built in memory.
+    """
+
+    def __init__(self, path):
+        try:
+            with open(path, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise DictionaryFileError(f'Cannot map dictionary file {path}: {e}')
+
+        try:
+            self._parse()
+        except (struct.error, ValueError, TypeError, UnicodeDecodeError) as e:
+            self.close()
+            raise DictionaryFileError(f'Corrupt dictionary file {path}: {e}')
+
+        super().__init__(
+            (parse_pattern(pattern), self._value_sets[value])
+            for pattern, value in self._phrases.items()
+        )
+
+    def _parse(self):
+        mm = self._mm
+        fields = HEADER.unpack_from(mm, 0)
+        magic, format_version, little_endian, category_count = fields[:4]
+        if magic != MAGIC:
+            raise ValueError('bad magic')
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f'unsupported format version {format_version}')
+        if bool(little_endian) != (sys.byteorder == 'little'):
+            raise ValueError('byte order mismatch')
+
+        self.generation = fields[4]
+        self.version = fields[-1].decode('ascii')
+
+        position = HEADER.size
+        categories = []
+        category_ids = []
+        for _ in range(category_count):
+            category_id, length = struct.unpack_from('<II', mm, position)
+            position += 8
+            category_ids.append(category_id)
+            categories.append(mm[position:position + length].decode('utf-8'))
+            position += length
+        self.categories = categories
+        self.category_ids = category_ids
+
+        value_set_count, pool_size = VALUE_SETS_HEADER.unpack_from(mm, position)
+        position += VALUE_SETS_HEADER.size
+        offsets = struct.unpack_from(f'<{value_set_count + 1}I', mm, position)
+        position += (value_set_count + 1) * 4
+        pool = struct.unpack_from(f'<{pool_size}H', mm, position)
+        position += pool_size * 2
+        self._value_sets = [
+            tuple(pool[offsets[index]:offsets[index + 1]])
+            for index in range(value_set_count)
+        ]
+
+        self._view = view = memoryview(mm)
+        self._exact = _StringTable(mm, view, position)
+        self._stems = _StringTable(mm, view, self._exact.end)
+        position = self._stems.end
+        self._parents = view[position:position + self._stems.count * 4].cast('i')
+        self._phrases = _StringTable(mm, view, position + self._stems.count * 4)
+
+        if self._phrases.end != len(mm):
+            raise ValueError('truncated file')
+
+    def lookup(self, token):
+        key = token.encode('utf-8')
+
+        index = self._exact.find(key)
+        if index >= 0:
+            return self._value_sets[self._exact.values[index]]
+
+        stems = self._stems
+        parents = self._parents
+        index = stems.bisect_right(key) - 1
+        while index >= 0:
+            if key.startswith(stems.key(index)):
+                return self._value_sets[stems.values[index]]
+            index = parents[index]
+        return None
+
+    def items(self):
+        for table, suffix in ((self._exact, ''), (self._stems, '*'), (self._phrases, '')):
+            for pattern, value in table.items():
+                yield pattern + suffix, self._value_sets[value]
+
+    def __len__(self):
+        return self._exact.count + self._stems.count + self._phrases.count
+
+    def close(self):
+        for name in ('_exact', '_stems', '_phrases'):
+            table = getattr(self, name, None)
+            if table is not None:
+                table.release()
+        for name in ('_parents', '_view'):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+        self._mm.close()
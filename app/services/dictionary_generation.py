@@ -0,0 +1,109 @@
+import logging
+import os
+import select as io_select
+import threading
+import time
+from datetime import datetime
+from itertools import chain
+from sqlalchemy import event, insert, select, update, text
+from app.models.category import Category, Word, DictionaryGeneration
+from app.utils.db_routing import RoutingSession
+from app import db
+
+logger = logging.getLogger(__name__)
+
+GENERATION_ID = 1
+CHANNEL = 'dictionary_generation'
+RETRY_SECONDS = 5
+
+generations = DictionaryGeneration.__table__
+
+def read_generation():
+    """Return the current dictionary generation, 0 before the first change"""
+    generation = db.session.execute(
+        select(generations.c.generation).where(generations.c.id == GENERATION_ID)
+    ).scalar()
+    return generation or 0
+
+def bump_generation(connection):
+    """
+    Increment the dictionary generation in the transaction of connection; the
+    caller commits. On PostgreSQL a notification is sent on the
+    dictionary_generation channel, which listeners receive once it commits.
+    """
+    now = datetime.utcnow()
+    result = connection.execute(
+        update(generations)
+        .where(generations.c.id == GENERATION_ID)
+        .values(generation=generations.c.generation + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(generations).values(id=GENERATION_ID, generation=1, updated_at=now))
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': CHANNEL, 'payload': ''})
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _bump_on_orm_change(session, flush_context):
+    """Bump the generation when a flush writes categories or words through the ORM"""
+    changed = chain(session.new, session.dirty, session.deleted)
+    if any(isinstance(instance, (Category, Word)) for instance in changed):
+        bump_generation(session.connection())
+
+class GenerationListener:
+    """
+    Thread that LISTENs on the dictionary_generation channel over a dedicated
+    PostgreSQL connection and calls on_notify() for every notification, so a
+    dictionary change is noticed right away instead of at the next poll.
+
+    It is started once per process; forked workers start their own. When the
+    connection drops it reconnects after RETRY_SECONDS and calls on_notify()
+    once, since a notification may have been missed in the meantime.
+    """
+
+    def __init__(self, on_notify):
+        self.on_notify = on_notify
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self, engine):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(
+                target=self._run,
+                args=(engine,),
+                name='dictionary-generation-listener',
+                daemon=True
+            ).start()
+
+    def _run(self, engine):
+        while True:
+            try:
+                self._listen(engine)
+            except Exception as e:
+                logger.warning(f"Dictionary generation listener disconnected, retrying in {RETRY_SECONDS}s: {e}")
+            time.sleep(RETRY_SECONDS)
+            self.on_notify()
+
+    def _listen(self, engine):
+        connection = engine.raw_connection()
+        connection.detach()
+        try:
+            driver_connection = connection.driver_connection
+            driver_connection.autocommit = True
+            with driver_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN {CHANNEL}')
+            logger.info(f"Listening for dictionary changes on channel {CHANNEL}")
+            while True:
+                readable, _, _ = io_select.select([driver_connection], [], [], 60)
+                if not readable:
+                    continue
+                driver_connection.poll()
+                if driver_connection.notifies:
+                    driver_connection.notifies.clear()
+                    self.on_notify()
+        finally:
+            connection.close()
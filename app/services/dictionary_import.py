@@ -0,0 +1,200 @@
+import io
+import json
+import os
+import re
+from sqlalchemy import MetaData, Table, Column, String, Index, select, insert, delete, exists, and_, not_
+from app.models.category import Category, Word
+from app.models.journal import JournalScore
+from app.models.rollup import DailyCategoryRollup
+from app.services.dictionary_generation import bump_generation
+from app.utils.db_routing import pin_primary
+from app import db
+
+MAX_LENGTH = 50
+
+CATEGORY_ID_RE = re.compile(r'\d+')
+
+class DictionaryImportError(ValueError):
+    """Raised when a dictionary file cannot be parsed"""
+
+def parse_dic(lines):
+    """
+    Parse a LIWC .dic dictionary into {category name: [entries]}.
+
+    The file starts with a header block between two '%' lines, mapping
+    category ids to names ('1<TAB>funct'), followed by one line per entry:
+    the word, stem ('happ*') or phrase, then the ids of its categories, all
+    separated by tabs. Conditional assignments of older LIWC versions, such as
+    '<of>131/125', are skipped.
+    """
+    categories = {}
+    dictionary = {}
+    section = 0
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        if line.strip() == '%':
+            section += 1
+            continue
+
+        if section == 1:
+            fields = line.split(None, 1)
+            if len(fields) != 2 or not CATEGORY_ID_RE.fullmatch(fields[0]):
+                raise DictionaryImportError(f'Line {number}: expected a category id and name')
+            name = _checked(fields[1].strip(), number)
+            categories[fields[0].lstrip('0') or '0'] = name
+            dictionary.setdefault(name, [])
+        elif section == 2:
+            fields = line.split('\t') if '\t' in line else line.split()
+            entry = _checked(fields[0].strip(), number)
+            for field in fields[1:]:
+                for category_id in field.split():
+                    if not CATEGORY_ID_RE.fullmatch(category_id):
+                        continue
+                    name = categories.get(category_id.lstrip('0') or '0')
+                    if name is None:
+                        raise DictionaryImportError(f'Line {number}: unknown category id {category_id}')
+                    dictionary[name].append(entry)
+        else:
+            raise DictionaryImportError(f"Line {number}: expected the '%' line opening the category block")
+
+    if section < 2:
+        raise DictionaryImportError("Missing the '%' line closing the category block")
+    return dictionary
+
+def parse_json(data):
+    """Validate a {category name: [entries]} JSON document"""
+    if not isinstance(data, dict):
+        raise DictionaryImportError('Expected an object mapping category names to lists of words')
+    for name, entries in data.items():
+        if not isinstance(entries, list) or not all(isinstance(entry, str) for entry in entries):
+            raise DictionaryImportError(f'Category {name}: expected a list of words')
+        _checked(name)
+        for entry in entries:
+            _checked(entry)
+    return data
+
+def read_dictionary(path):
+    """Parse a .dic or .json dictionary file into {category name: [entries]}"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in ('.dic', '.json'):
+        raise DictionaryImportError(f'Unsupported dictionary format {extension or path}, expected .dic or .json')
+    with open(path, encoding='utf-8-sig') as f:
+        if extension == '.dic':
+            return parse_dic(f)
+        try:
+            return parse_json(json.load(f))
+        except json.JSONDecodeError as e:
+            raise DictionaryImportError(f'Invalid JSON: {e}')
+
+def _checked(text, number=None):
+    where = f'Line {number}: ' if number is not None else ''
+    if not text.strip():
+        raise DictionaryImportError(f'{where}empty category or word')
+    if len(text) > MAX_LENGTH:
+        raise DictionaryImportError(f'{where}{text[:20]}... is longer than {MAX_LENGTH} characters')
+    return text
+
+def _staging_table():
+    metadata = MetaData()
+    return Table(
+        'dictionary_import', metadata,
+        Column('category', String(MAX_LENGTH), nullable=False),
+        Column('text', String(MAX_LENGTH), nullable=False),
+        Index('ix_dictionary_import_category_text', 'category', 'text'),
+        prefixes=['TEMPORARY']
+    )
+
+def _load_staging(connection, staging, rows):
+    """Bulk load (category, text) rows, with COPY on PostgreSQL and executemany elsewhere"""
+    if not rows:
+        return
+    if connection.dialect.name == 'postgresql':
+        buffer = io.StringIO()
+        for category, text in rows:
+            buffer.write(f'{_copy_escape(category)}\t{_copy_escape(text)}\n')
+        buffer.seek(0)
+        with connection.connection.driver_connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {staging.name} (category, text) FROM STDIN', buffer)
+    else:
+        connection.execute(insert(staging), [{'category': category, 'text': text} for category, text in rows])
+
+def _copy_escape(value):
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def import_dictionary(dictionary, replace=True):
+    """
+    Load {category name: [entries]} into the categories/words tables.
+
+    The entries are bulk loaded into a temporary staging table, and the tables
+    are then brought in line with it by a few set-based statements: missing
+    categories and words are inserted and, with replace, words and categories
+    absent from the dictionary are deleted along with their stored scores and
+    rollups. Unchanged rows are left alone. Everything happens in the caller's
+    transaction, so readers keep seeing the previous dictionary until it
+    commits. The dictionary generation is bumped, so the compiled dictionary
+    of every process is rebuilt afterwards.
+
+    Returns the counts of categories and words added and removed.
+    """
+    pin_primary()
+    rows = list(dict.fromkeys(
+        (name, entry)
+        for name, entries in dictionary.items()
+        for entry in entries
+    ))
+    names = list(dictionary)
+
+    connection = db.session.connection()
+    staging = _staging_table()
+    # A failed import leaves the table behind on SQLite, where DDL autocommits
+    staging.drop(connection, checkfirst=True)
+    staging.create(connection)
+    _load_staging(connection, staging, rows)
+
+    existing = set(connection.execute(select(Category.name)).scalars())
+    added_names = [name for name in names if name not in existing]
+    if added_names:
+        connection.execute(insert(Category), [{'name': name} for name in added_names])
+
+    staged_words = (
+        select(staging.c.text, Category.id.label('category_id'))
+        .join(Category, Category.name == staging.c.category)
+    )
+    removed_words = 0
+    if replace:
+        removed_words = connection.execute(
+            delete(Word).where(not_(exists().where(and_(
+                Category.id == Word.category_id,
+                staging.c.category == Category.name,
+                staging.c.text == Word.text
+            ))))
+        ).rowcount
+
+    new_words = staged_words.where(not_(exists().where(and_(
+        Word.text == staging.c.text,
+        Word.category_id == Category.id
+    ))))
+    added_words = connection.execute(
+        insert(Word).from_select(['text', 'category_id'], new_words)
+    ).rowcount
+
+    removed_names = []
+    if replace:
+        removed_names = sorted(existing - set(names))
+        if removed_names:
+            removed_ids = select(Category.id).where(Category.name.in_(removed_names))
+            connection.execute(delete(JournalScore).where(JournalScore.category_id.in_(removed_ids)))
+            connection.execute(delete(DailyCategoryRollup).where(DailyCategoryRollup.category_id.in_(removed_ids)))
+            connection.execute(delete(Category).where(Category.name.in_(removed_names)))
+    staging.drop(connection)
+    bump_generation(connection)
+
+    return {
+        'categories_added': len(added_names),
+        'categories_removed': len(removed_names),
+        'words_added': added_words,
+        'words_removed': removed_words,
+        'words': len(rows)
+    }
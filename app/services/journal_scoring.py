@@ -0,0 +1,211 @@
+import logging
+from sqlalchemy import delete, insert, update, bindparam, or_
+from app.models.journal import Journal, JournalScore
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app.services.dictionary_cache import dictionary_cache
+from app.services.dictionary_generation import read_generation
+from app.services.rollups import contribution, stored_contributions, apply_changes
+from app.utils.db_routing import pin_primary
+from app import db
+
+logger = logging.getLogger(__name__)
+
+def score_journals(journals, compiled=None):
+    """
+    Score journals against one dictionary snapshot and store the results.
+
+    The journals are added to the session and flushed, their per-category
+    counts are written to journal_scores and the daily rollups of their users
+    are updated; the caller commits. Returns the scores in the same order as the
+    journals. Journals that are already stored must be locked by the caller, as
+    process_pending does, or a concurrent rescore could apply the same rollup
+    delta twice; stale journals go through write_rescored instead. The texts are scored together with LIWCAnalyzer.score_many; a
+    journal whose text cannot be analyzed is marked as failed and gets None.
+    """
+    pin_primary()
+    compiled = compiled or LIWCAnalyzer.snapshot()
+    existing = [journal.id for journal in journals if journal.id is not None]
+    _, before = stored_contributions(existing)
+    try:
+        results = LIWCAnalyzer.score_many([journal.text for journal in journals], compiled)
+    except Exception as e:
+        # Find the journals at fault by scoring them one at a time
+        logger.warning(f"Bulk scoring of {len(journals)} journals failed, scoring them one by one: {e}")
+        results = [_score_one(journal, compiled) for journal in journals]
+    for journal, scores in zip(journals, results):
+        if scores is None:
+            journal.mark_failed()
+        else:
+            journal.set_scores(scores, compiled.version)
+
+    db.session.add_all(journals)
+    db.session.flush()
+    scored = [(journal, scores) for journal, scores in zip(journals, results) if scores is not None]
+    store_score_rows(
+        [(journal.id, scores) for journal, scores in scored],
+        compiled,
+        replace=bool(existing)
+    )
+
+    category_ids = dict(zip(compiled.categories, compiled.category_ids))
+    apply_changes(before, {
+        journal.id: contribution(journal.user_id, journal.created_at, scores, category_ids)
+        for journal, scores in scored
+    })
+    return results
+
+def _score_one(journal, compiled):
+    try:
+        return LIWCAnalyzer.score_text(journal.text, compiled)
+    except Exception as e:
+        logger.error(f"Scoring journal {journal.id} failed: {e}")
+        return None
+
+def write_rescored(scored, compiled, stale_only=True):
+    """
+    Persist recomputed (journal id, scores) pairs with bulk updates, without
+    loading the journals, and update the daily rollups; the caller commits.
+
+    The journals are first claimed by an UPDATE that bumps their revision and
+    returns their ids, which keeps the rows locked until the commit. Concurrent
+    rescores of the same journals thus run one after the other, and each reads
+    the contributions the previous one stored, so no rollup delta is applied
+    twice. With stale_only, journals that are no longer stale for
+    compiled.version are not claimed: another request rescored them first.
+    Pending journals are never claimed. The rest of the request reads from the
+    primary, including the stored contributions read here.
+
+    Returns the set of journal ids written.
+    """
+    if not scored:
+        return set()
+
+    pin_primary()
+    journals = Journal.__table__
+    claim = update(journals).where(
+        journals.c.id.in_([journal_id for journal_id, _ in scored]),
+        journals.c.score_status != Journal.SCORE_PENDING
+    )
+    if stale_only:
+        claim = claim.where(
+            journals.c.score_status == Journal.SCORE_DONE,
+            or_(journals.c.dictionary_version.is_(None), journals.c.dictionary_version != compiled.version)
+        )
+    claimed = set(db.session.execute(
+        claim.values(revision=journals.c.revision + 1).returning(journals.c.id)
+    ).scalars())
+    scored = [(journal_id, scores) for journal_id, scores in scored if journal_id in claimed]
+    if not scored:
+        return claimed
+
+    owners, before = stored_contributions([journal_id for journal_id, _ in scored])
+    db.session.execute(
+        update(journals)
+        .where(journals.c.id == bindparam('journal_id'))
+        .values(
+            scores=bindparam('new_scores'),
+            word_count=bindparam('new_word_count'),
+            score_status=Journal.SCORE_DONE,
+            dictionary_version=compiled.version
+        ),
+        [
+            {
+                'journal_id': journal_id,
+                'new_scores': Journal.dump_scores(scores),
+                'new_word_count': scores.get('word_count')
+            }
+            for journal_id, scores in scored
+        ]
+    )
+    store_score_rows(scored, compiled)
+
+    category_ids = dict(zip(compiled.categories, compiled.category_ids))
+    apply_changes(before, {
+        journal_id: contribution(*owners[journal_id], scores, category_ids)
+        for journal_id, scores in scored
+        if journal_id in owners
+    })
+    return claimed
+
+def store_score_rows(scored, compiled, replace=True):
+    """
+    Write the per-category counts of (journal id, scores) pairs to journal_scores
+    with one bulk insert, first deleting the previous rows of those journals
+    unless they are known to be new.
+    """
+    if not scored:
+        return
+
+    if replace:
+        db.session.execute(
+            delete(JournalScore).where(JournalScore.journal_id.in_([journal_id for journal_id, _ in scored]))
+        )
+
+    category_ids = dict(zip(compiled.categories, compiled.category_ids))
+    rows = [
+        {'journal_id': journal_id, 'category_id': category_ids[name], 'count': count}
+        for journal_id, scores in scored
+        for name, count in scores['categories'].items()
+        if count and name in category_ids
+    ]
+    if rows:
+        db.session.execute(insert(JournalScore), rows)
+
+def refresh_stale_scores(journals):
+    """
+    Rescore and persist journals that were scored with an older dictionary.
+
+    Called on read, so a dictionary update costs nothing up front: each stored
+    score is recomputed the first time it is accessed afterwards. Pending and
+    failed journals are left alone, and so is everything while this process has
+    not picked up the latest dictionary yet. The scores are written by
+    write_rescored, which skips journals a concurrent request rescored first;
+    the journals are reloaded with whichever scores were stored. Returns the
+    number of journals rescored.
+    """
+    compiled = LIWCAnalyzer.snapshot()
+    stale = [journal for journal in journals if journal.is_stale(compiled.version)]
+    if not stale or not snapshot_is_current(compiled):
+        return 0
+
+    try:
+        results = LIWCAnalyzer.score_many([journal.text for journal in stale], compiled)
+    except Exception as e:
+        logger.warning(f"Bulk scoring of {len(stale)} journals failed, scoring them one by one: {e}")
+        results = [_score_one(journal, compiled) for journal in stale]
+    claimed = write_rescored(
+        [(journal.id, scores) for journal, scores in zip(stale, results) if scores is not None],
+        compiled
+    )
+    db.session.commit()
+    return len(claimed)
+
+def snapshot_is_current(compiled):
+    """
+    Check on the primary that compiled was built from the latest dictionary
+    generation, before stale scores are rewritten with it.
+
+    A version mismatch alone does not tell which side is newer: right after a
+    dictionary change, a process still holding the previous snapshot would
+    rescore journals that others already moved to the new version and write
+    the old version back. Such a process leaves the scores alone and checks
+    the generation again on its next lookup.
+    """
+    pin_primary()
+    if compiled.generation == read_generation():
+        return True
+    dictionary_cache.expire()
+    return False
+
+def delete_journals(journal_ids):
+    """
+    Delete journals and their journal_scores rows and take them out of the
+    daily rollups; the caller commits.
+    """
+    if not journal_ids:
+        return
+
+    _, before = stored_contributions(journal_ids)
+    apply_changes(before, {})
+    db.session.execute(delete(JournalScore).where(JournalScore.journal_id.in_(journal_ids)))
+    db.session.execute(delete(Journal).where(Journal.id.in_(journal_ids)))
@@ -0,0 +1,93 @@
+from sqlalchemy import select, func
+from app.models.category import Category
+from app.models.journal import Journal, JournalScore
+from app import db
+
+GROUPINGS = ('none', 'day', 'week', 'month')
+
+def _period(group_by, dialect):
+    """SQL expression for the period a journal falls in"""
+    created_at = Journal.created_at
+    if group_by == 'day':
+        return func.date(created_at)
+    if group_by == 'week':
+        if dialect == 'postgresql':
+            return func.date(func.date_trunc('week', created_at))
+        return func.date(created_at, 'weekday 0', '-6 days')
+    if group_by == 'month':
+        if dialect == 'postgresql':
+            return func.to_char(created_at, 'YYYY-MM')
+        return func.strftime('%Y-%m', created_at)
+    return None
+
+def _format_period(value):
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+def category_stats(user_id, start=None, end=None, group_by='none'):
+    """
+    Sum and average the per-category counts of a user's journals in the database.
+
+    Journals are filtered to start <= created_at < end and grouped by day, week
+    (starting Monday), month or not at all. Runs one aggregate query for the
+    entry counts and one over journal_scores for the category sums; no journal
+    row is loaded.
+    """
+    period = _period(group_by, db.session.get_bind().dialect.name)
+
+    filters = [Journal.user_id == user_id, Journal.score_status == Journal.SCORE_DONE]
+    if start is not None:
+        filters.append(Journal.created_at >= start)
+    if end is not None:
+        filters.append(Journal.created_at < end)
+
+    group_columns = [period.label('period')] if period is not None else []
+
+    entry_rows = db.session.execute(
+        select(*group_columns, func.count(Journal.id))
+        .where(*filters)
+        .group_by(*group_columns)
+    ).all()
+
+    category_rows = db.session.execute(
+        select(*group_columns, Category.name, func.sum(JournalScore.count))
+        .select_from(Journal)
+        .join(JournalScore, JournalScore.journal_id == Journal.id)
+        .join(Category, Category.id == JournalScore.category_id)
+        .where(*filters)
+        .group_by(*group_columns, Category.name)
+    ).all()
+
+    category_names = db.session.execute(select(Category.name).order_by(Category.id)).scalars().all()
+
+    periods = {}
+    for row in entry_rows:
+        key = row[0] if period is not None else None
+        periods[key] = {
+            'period': _format_period(key),
+            'entries': row[-1],
+            'sums': dict.fromkeys(category_names, 0)
+        }
+
+    for row in category_rows:
+        key = row[0] if period is not None else None
+        name, total = row[-2], row[-1]
+        if key in periods:
+            periods[key]['sums'][name] = int(total)
+
+    results = []
+    for key in sorted(periods, key=lambda value: (value is None, _format_period(value))):
+        stats = periods[key]
+        entries = stats['entries']
+        total = sum(stats['sums'].values())
+        results.append({
+            'period': stats['period'],
+            'entries': entries,
+            'categories': {
+                name: {'sum': value, 'avg': value / entries if entries else 0}
+                for name, value in stats['sums'].items()
+            },
+            'total': {'sum': total, 'avg': total / entries if entries else 0}
+        })
+    return results
@@ -1,7 +1,14 @@
-import re
 import json
 import os
-from app.models.category import Category, Word
+import time
+from app.models.category import Category
+from app.services.dictionary_cache import dictionary_cache, build_dictionary_file
+from app.services.dictionary_import import import_dictionary, read_dictionary
+from app.services.score_memo import score_memo
+from app.services.bulk_scoring import BulkScores
+from app.services.tokenizer import CHUNK_SIZE, TokenStream
+from app.utils.metrics import DICTIONARY_LOAD_SECONDS, TOKENIZE_SECONDS, COUNT_SECONDS
+from flask import current_app
 from app import db
 
 class LIWCAnalyzer:
@@ -22,45 +29,139 @@ class LIWCAnalyzer:
         - Remove punctuation
         - Split into words
         """
-        text = text.lower()
-        words = re.findall(r'\b\w+\b', text)
-        
-        return words
+        return list(TokenStream.from_text(text))
     
     @staticmethod
     def analyze_text(text):
         """
         Analyze text and return scores for each category
+        
+        Tokens are matched against the process-wide compiled dictionary, which is only
+        rebuilt when the categories/words tables change. Entries may be exact words,
+        stems such as 'happ*' or multi-word phrases, all matched in a single pass.
+        Each match counts once for every category the entry belongs to. Results are
+        memoized per normalized text and dictionary version.
+        """
+        return LIWCAnalyzer.score_text(text, LIWCAnalyzer.snapshot())
+    
+    @staticmethod
+    def analyze_many(texts):
         """
-        words = LIWCAnalyzer.tokenize_text(text)
+        Analyze a batch of texts at once and return their scores in order
         
-        categories = Category.query.all()
+        Each result equals analyze_text of the same text, but the batch is scored
+        as a sparse document-term matrix multiplied by the term-category
+        memberships of the dictionary, so each distinct term is resolved once per
+        batch rather than each token once per text.
+        """
+        return LIWCAnalyzer.score_many(texts, LIWCAnalyzer.snapshot())
+    
+    @staticmethod
+    def snapshot():
+        """
+        Return the current compiled dictionary; its version identifies the scores it produces
+        """
+        with DICTIONARY_LOAD_SECONDS.time():
+            return dictionary_cache.get()
+    
+    @staticmethod
+    def score_text(text, compiled):
+        """
+        Analyze text against a given compiled dictionary snapshot, reusing the
+        memoized scores of an identical text
         
-        scores = {}
-        for category in categories:
-            scores[category.name] = 0
+        Texts missing from the memo are scored by score_stream.
+        """
+        return score_memo.get_or_score(
+            text,
+            compiled.version,
+            lambda: LIWCAnalyzer.score_stream(text, compiled)
+        )
+    
+    @staticmethod
+    def score_many(texts, compiled):
+        """
+        Analyze texts against a given compiled dictionary snapshot, reusing the
+        memoized scores of identical texts
         
-        db_words = Word.query.all()
+        The texts missing from the memo are scored together by BulkScores, except
+        those larger than a tokenizer chunk, which go through score_stream one by
+        one so their memory use stays bounded.
+        """
+        def score(missing):
+            bulk = BulkScores(compiled)
+            small = [text for text in missing if len(text) <= CHUNK_SIZE]
+            scored = iter(bulk.run(small))
+            TOKENIZE_SECONDS.observe(bulk.tokenize_seconds)
+            COUNT_SECONDS.observe(bulk.count_seconds)
+            return [
+                next(scored) if len(text) <= CHUNK_SIZE else LIWCAnalyzer.score_stream(text, compiled)
+                for text in missing
+            ]
         
-        word_to_category = {}
-        for db_word in db_words:
-            category = next((c for c in categories if c.id == db_word.category_id), None)
-            if category:
-                word_to_category[db_word.text.lower()] = category.name
+        return score_memo.get_or_score_many(texts, compiled.version, score)
+    
+    @staticmethod
+    def score_stream(text, compiled):
+        """
+        Score text against a compiled dictionary in a single streaming pass
         
-        for word in words:
-            word = word.lower()
-            if word in word_to_category:
-                category_name = word_to_category[word]
-                scores[category_name] += 1
+        Tokens are streamed from the text one chunk at a time into the matcher, so
+        no lowercased copy of the whole text or list of all its tokens is built.
+        """
+        started = time.perf_counter()
+        tokens = TokenStream.from_text(text)
+        scores = LIWCAnalyzer.score_tokens(tokens, compiled)
+        TOKENIZE_SECONDS.observe(tokens.seconds)
+        COUNT_SECONDS.observe(time.perf_counter() - started - tokens.seconds)
+        return scores
+    
+    @staticmethod
+    def score_tokens(words, compiled):
+        """
+        Count the matches of a token list or TokenStream in a compiled dictionary,
+        and the words it holds
+        """
+        counts = [0] * len(compiled.categories)
         
-        total_score = sum(scores.values())
+        for category_indices in compiled.matcher.scan(words):
+            for index in category_indices:
+                counts[index] += 1
         
         return {
-            'categories': scores,
-            'total': total_score
+            'categories': dict(zip(compiled.categories, counts)),
+            'total': sum(counts),
+            'word_count': words.count if isinstance(words, TokenStream) else len(words)
         }
     
+    @staticmethod
+    def cache_stats():
+        """
+        Return hit/miss and rebuild-time counters of the compiled dictionary cache
+        in this process, and the version and source of the compiled dictionary
+        """
+        return dictionary_cache.stats()
+    
+    @staticmethod
+    def clear_cache():
+        """
+        Drop the compiled dictionary and the memoized scores so the next analysis
+        rebuilds them
+        """
+        dictionary_cache.clear()
+        score_memo.clear()
+    
+    @staticmethod
+    def build_dictionary_file(path=None):
+        """
+        Compile the categories/words tables into the memory-mapped dictionary file
+        shared by all worker processes
+        """
+        path = path or current_app.config['LIWC_DICTIONARY_FILE']
+        entries, version = build_dictionary_file(path)
+        print(f"Compiled {entries} dictionary entries (version {version}) to {path}")
+        return path
+    
     @staticmethod
     def load_dictionary():
         """
@@ -82,21 +183,33 @@ class LIWCAnalyzer:
         """
         Initialize the LIWC dictionary with predefined categories and words from JSON file
         """
-        dictionary = LIWCAnalyzer.load_dictionary()
-        
-        existing_categories = Category.query.all()
+        existing_categories = db.session.query(Category.id).first()
         if existing_categories:
             print("Dictionary already initialized")
             return
         
-        for category_name, words in dictionary.items():
-            category = Category(name=category_name)
-            db.session.add(category)
-            db.session.flush()
-            
-            for word_text in words:
-                word = Word(text=word_text, category_id=category.id)
-                db.session.add(word)
-        
+        import_dictionary(LIWCAnalyzer.load_dictionary(), replace=False)
         db.session.commit()
         print("Dictionary initialized successfully")
+    
+    @staticmethod
+    def import_dictionary(path, replace=True):
+        """
+        Import a LIWC .dic or JSON dictionary file into the categories/words tables
+        
+        With replace the tables are swapped to exactly the file's contents in one
+        transaction; otherwise its categories and words are only added. Scoring
+        keeps using the previous dictionary until the transaction commits.
+        Returns the counts of categories and words added and removed.
+        """
+        started = time.perf_counter()
+        dictionary = read_dictionary(path)
+        changes = import_dictionary(dictionary, replace=replace)
+        db.session.commit()
+        print(
+            f"Imported {changes['words']} entries in {len(dictionary)} categories from {path} "
+            f"in {time.perf_counter() - started:.1f}s: "
+            f"{changes['words_added']} words added, {changes['words_removed']} removed, "
+            f"{changes['categories_added']} categories added, {changes['categories_removed']} removed"
+        )
+        return changes
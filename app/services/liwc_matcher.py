@@ -0,0 +1,245 @@
+import re
+
+PATTERN_RE = re.compile(r'\w+\*?')
+
+_MISSING = object()
+
+def parse_pattern(text):
+    """
+    Split a dictionary entry into (word, is_stem) elements.
+
+    Entries are split the same way journal text is tokenized, so 'co-worker'
+    becomes the two-word phrase ('co', 'worker'). A trailing '*' marks a stem
+    that matches any token starting with that word, as in LIWC's 'happ*'.
+    """
+    elements = []
+    for element in PATTERN_RE.findall(text.lower()):
+        if element.endswith('*'):
+            elements.append((element[:-1], True))
+        else:
+            elements.append((element, False))
+    return tuple(elements)
+
+def format_pattern(elements):
+    """Return the canonical text of parsed pattern elements"""
+    return ' '.join(word + '*' if is_stem else word for word, is_stem in elements)
+
+def _trie_insert(root, word, value):
+    node = root
+    for char in word:
+        node = node.setdefault(char, {})
+    node[None] = value
+
+class Matcher:
+    """
+    Base class for dictionary matcher engines.
+
+    Values are tuples of category indices. Engines implement lookup(token),
+    which resolves a single token against the exact and stem entries: an exact
+    entry wins over stems and the longest matching stem wins over shorter ones.
+    Lookups are memoized per token, so a stem walk only runs the first time a
+    token is seen.
+
+    Multi-word entries are matched by a token-level automaton: scan() keeps the
+    set of partially matched phrases and advances all of them with each token,
+    so phrases are found in the same single pass as single words.
+    """
+
+    memo_size = 1 << 16
+
+    def __init__(self, phrases=()):
+        self._memo = {}
+        self._phrase_root = {}
+        self._phrase_words = set()
+        self._phrase_stems = {}
+        self._phrase_memo = {}
+        self._start_memo = {}
+        self.max_phrase_length = 0
+
+        for elements, value in phrases:
+            node = self._phrase_root
+            for word, is_stem in elements:
+                if is_stem:
+                    key = word + '*'
+                    _trie_insert(self._phrase_stems, word, key)
+                else:
+                    key = word
+                    self._phrase_words.add(word)
+                node = node.setdefault(key, {})
+            node[None] = value
+            self.max_phrase_length = max(self.max_phrase_length, len(elements))
+
+    def lookup(self, token):
+        """Return the value of the best single-word entry matching token"""
+        raise NotImplementedError
+
+    def items(self):
+        """Yield (canonical pattern, value) for every entry"""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def _phrase_keys(self, token):
+        keys = self._phrase_memo.get(token)
+        if keys is not None:
+            return keys
+
+        keys = [token] if token in self._phrase_words else []
+        node = self._phrase_stems
+        for char in token:
+            node = node.get(char)
+            if node is None:
+                break
+            key = node.get(None)
+            if key is not None:
+                keys.append(key)
+        keys = tuple(keys)
+
+        if len(self._phrase_memo) >= self.memo_size:
+            self._phrase_memo.clear()
+        self._phrase_memo[token] = keys
+        return keys
+
+    def resolve(self, token):
+        """Return the memoized lookup(token)"""
+        value = self._memo.get(token, _MISSING)
+        if value is _MISSING:
+            value = self.lookup(token)
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[token] = value
+        return value
+
+    def starts_phrase(self, token):
+        """Return whether token matches the first element of a multi-word entry"""
+        starts = self._start_memo.get(token)
+        if starts is None:
+            starts = any(key in self._phrase_root for key in self._phrase_keys(token))
+            if len(self._start_memo) >= self.memo_size:
+                self._start_memo.clear()
+            self._start_memo[token] = starts
+        return starts
+
+    def match_phrases(self, tokens):
+        """
+        Yield the value of every multi-word entry matching the tokens from the
+        first one on, stopping once no entry can match further. Called at every
+        position of a text, this yields the phrase matches of scan().
+        """
+        nodes = [self._phrase_root]
+        for token in tokens:
+            keys = self._phrase_keys(token)
+            children = []
+            for node in nodes:
+                for key in keys:
+                    child = node.get(key)
+                    if child is not None:
+                        value = child.get(None)
+                        if value is not None:
+                            yield value
+                        children.append(child)
+            if not children:
+                return
+            nodes = children
+
+    def scan(self, tokens):
+        """
+        Yield the value of every entry matched in a stream of lowercased tokens
+        """
+        memo = self._memo
+        lookup = self.lookup
+        phrase_root = self._phrase_root
+        active = []
+
+        for token in tokens:
+            value = memo.get(token, _MISSING)
+            if value is _MISSING:
+                value = lookup(token)
+                if len(memo) >= self.memo_size:
+                    memo.clear()
+                memo[token] = value
+            if value is not None:
+                yield value
+
+            if not phrase_root:
+                continue
+
+            keys = self._phrase_keys(token)
+            if not keys:
+                active = []
+                continue
+
+            next_active = []
+            active.append(phrase_root)
+            for node in active:
+                for key in keys:
+                    child = node.get(key)
+                    if child is not None:
+                        value = child.get(None)
+                        if value is not None:
+                            yield value
+                        next_active.append(child)
+            active = next_active
+
+class TrieMatcher(Matcher):
+    """
+    In-memory matcher compiled from (pattern, category index) entries.
+
+    A pattern listed under several categories resolves to the sorted tuple of
+    all their indices; equal tuples are shared between entries. Exact words
+    live in a dict and stems in a character trie, so resolving a token costs
+    one dict lookup plus at most one walk of its characters.
+    """
+
+    def __init__(self, entries):
+        memberships = {}
+        for text, category_index in entries:
+            elements = parse_pattern(text)
+            if elements and all(word for word, _ in elements):
+                memberships.setdefault(elements, set()).add(category_index)
+
+        interned = {}
+        patterns = {}
+        for elements, indices in memberships.items():
+            value = tuple(sorted(indices))
+            patterns[elements] = interned.setdefault(value, value)
+
+        self._patterns = patterns
+        self._exact = {}
+        self._stems = {}
+        phrases = []
+        for elements, value in patterns.items():
+            if len(elements) > 1:
+                phrases.append((elements, value))
+                continue
+            word, is_stem = elements[0]
+            if is_stem:
+                _trie_insert(self._stems, word, value)
+            else:
+                self._exact[word] = value
+
+        super().__init__(phrases)
+
+    def lookup(self, token):
+        value = self._exact.get(token)
+        if value is not None:
+            return value
+
+        best = None
+        node = self._stems
+        for char in token:
+            node = node.get(char)
+            if node is None:
+                break
+            value = node.get(None)
+            if value is not None:
+                best = value
+        return best
+
+    def items(self):
+        for elements, value in self._patterns.items():
+            yield format_pattern(elements), value
+
+    def __len__(self):
+        return len(self._patterns)
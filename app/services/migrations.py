@@ -0,0 +1,98 @@
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, String, DateTime, select, insert, text
+from app import db
+import app.migrations
+
+MIGRATION_NAME = re.compile(r'^m(\d{4})_\w+$')
+
+# Arbitrary key of the PostgreSQL advisory lock that serializes migration runs
+LOCK_KEY = 7410017
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    'schema_migrations',
+    metadata,
+    Column('version', String(64), primary_key=True),
+    Column('description', String(255)),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+def discover():
+    """Return the (version, module) of every migration, in order"""
+    names = sorted(
+        name for _, name, _ in pkgutil.iter_modules(app.migrations.__path__)
+        if MIGRATION_NAME.match(name)
+    )
+    return [(name[1:], importlib.import_module(f'app.migrations.{name}')) for name in names]
+
+def applied_versions(engine):
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+def migration_status(engine=None):
+    """Return (version, description, applied) for every migration"""
+    engine = engine or db.engine
+    applied = applied_versions(engine)
+    return [(version, module.description, version in applied) for version, module in discover()]
+
+def run_migrations(engine=None, report=print):
+    """
+    Apply pending migrations in order and record each one in schema_migrations.
+
+    On PostgreSQL, a session-level advisory lock makes concurrently starting
+    containers wait for each other instead of racing, and the statement timeout
+    of the engine profile is lifted so long index builds can finish. Returns the
+    versions that were applied.
+    """
+    engine = engine or db.engine
+    postgresql = engine.dialect.name == 'postgresql'
+    lock = None
+    if postgresql:
+        lock = engine.connect()
+        lock.execute(text('SELECT pg_advisory_lock(:key)'), {'key': LOCK_KEY})
+        lock.commit()
+
+    try:
+        applied = applied_versions(engine)
+        performed = []
+        for version, module in discover():
+            if version in applied:
+                continue
+            report(f"Applying migration {version}: {module.description}")
+            if getattr(module, 'transactional', True):
+                with engine.begin() as connection:
+                    if postgresql:
+                        connection.execute(text('SET LOCAL statement_timeout = 0'))
+                    module.upgrade(connection)
+                    _record(connection, version, module)
+            else:
+                with engine.connect() as connection:
+                    connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+                    if postgresql:
+                        connection.execute(text('SET statement_timeout = 0'))
+                    try:
+                        module.upgrade(connection)
+                    finally:
+                        if postgresql:
+                            connection.execute(text('RESET statement_timeout'))
+                with engine.begin() as connection:
+                    _record(connection, version, module)
+            performed.append(version)
+        return performed
+    finally:
+        if lock is not None:
+            lock.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': LOCK_KEY})
+            lock.commit()
+            lock.close()
+
+def _record(connection, version, module):
+    connection.execute(insert(schema_migrations).values(
+        version=version,
+        description=module.description,
+        applied_at=datetime.utcnow()
+    ))
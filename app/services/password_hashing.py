@@ -0,0 +1,122 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app, has_app_context
+from flask_bcrypt import Bcrypt
+from app.utils.metrics import HASH_SECONDS, CHECK_SECONDS
+
+bcrypt = Bcrypt()
+
+DEFAULT_ROUNDS = 12
+
+def _timed(histogram, fn, *args):
+    with histogram.time():
+        return fn(*args)
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full or a hash took too long"""
+
+class BoundedExecutor:
+    """
+    Thread pool that accepts at most max_pending running and queued jobs and
+    rejects any more immediately instead of queueing them
+    """
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self._slots = threading.BoundedSemaphore(max_pending) if max_pending > 0 else None
+
+    def submit(self, fn, *args):
+        if self._slots is None or not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy('Too many password hashing requests, retry shortly')
+        try:
+            return self._executor.submit(self._call, fn, args)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _call(self, fn, args):
+        try:
+            return fn(*args)
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a small dedicated thread pool.
+
+    bcrypt releases the GIL while hashing, so request threads only wait on a
+    future; at most PASSWORD_HASH_WORKERS hashes run at once per process and at
+    most PASSWORD_HASH_MAX_PENDING are running or queued. A login burst beyond
+    that is rejected with PasswordHasherBusy right away rather than tying up
+    every worker, and journal traffic keeps flowing. Outside an app context, or
+    with PASSWORD_HASH_WORKERS set to 0, hashing runs inline.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    @staticmethod
+    def rounds():
+        """Configured bcrypt cost factor"""
+        if has_app_context():
+            return current_app.config.get('BCRYPT_LOG_ROUNDS', DEFAULT_ROUNDS)
+        return DEFAULT_ROUNDS
+
+    def executor(self):
+        """Return the executor of this process, or None to hash inline"""
+        if not has_app_context():
+            return None
+        config = current_app.config
+        workers = config.get('PASSWORD_HASH_WORKERS', 0)
+        if workers <= 0:
+            return None
+        max_pending = config.get('PASSWORD_HASH_MAX_PENDING', workers)
+
+        executor = self._executor
+        if (self._pid == os.getpid() and executor is not None
+                and (executor.workers, executor.max_pending) == (workers, max_pending)):
+            return executor
+        with self._lock:
+            executor = self._executor
+            if (self._pid != os.getpid() or executor is None
+                    or (executor.workers, executor.max_pending) != (workers, max_pending)):
+                if executor is not None and self._pid == os.getpid():
+                    executor.shutdown()
+                executor = BoundedExecutor(workers, max_pending)
+                self._executor = executor
+                self._pid = os.getpid()
+            return executor
+
+    def _run(self, fn, *args):
+        executor = self.executor()
+        if executor is None:
+            return fn(*args)
+        future = executor.submit(fn, *args)
+        try:
+            return future.result(timeout=current_app.config.get('PASSWORD_HASH_TIMEOUT'))
+        except TimeoutError:
+            raise PasswordHasherBusy('Password hashing timed out, retry shortly')
+
+    def hash(self, password):
+        """Hash password with the configured cost factor"""
+        return self._run(_timed, HASH_SECONDS, bcrypt.generate_password_hash, password, self.rounds()).decode('utf-8')
+
+    def check(self, password_hash, password):
+        return self._run(_timed, CHECK_SECONDS, bcrypt.check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether password_hash was made with another cost factor than the configured one"""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds()
+        except (IndexError, ValueError):
+            return True
+
+password_hasher = PasswordHasher()
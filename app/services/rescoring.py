@@ -0,0 +1,154 @@
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from flask import has_app_context
+from sqlalchemy import select, or_
+from app.models.journal import Journal
+from app.services.dictionary_cache import CompiledDictionary
+from app.services.journal_scoring import write_rescored
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app.services.liwc_matcher import TrieMatcher
+from app.services.score_memo import score_memo
+from app import db
+
+_worker_compiled = None
+
+def _init_worker(categories, entries, generation, version):
+    """
+    Set up a pool process: forked workers inherit the app context and the
+    parent's pooled connections, so they drop the connections without closing
+    them and keep off the database, then compile the dictionary snapshot
+    """
+    score_memo.disable_database()
+    if has_app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    _load_snapshot(categories, entries, generation, version)
+
+def _load_snapshot(categories, entries, generation, version):
+    """Compile the dictionary snapshot once per scoring process"""
+    global _worker_compiled
+    _worker_compiled = CompiledDictionary(categories, TrieMatcher(entries), generation, version)
+
+def _score_chunk(rows):
+    """Score (id, text) rows in a pool process and return (id, scores) pairs"""
+    journal_ids = [journal_id for journal_id, _ in rows]
+    texts = [text for _, text in rows]
+    return list(zip(journal_ids, LIWCAnalyzer.score_many(texts, _worker_compiled)))
+
+def _snapshot_args(compiled):
+    entries = [
+        (pattern, index)
+        for pattern, indices in compiled.matcher.items()
+        for index in indices
+    ]
+    return compiled.categories, entries, compiled.generation, compiled.version
+
+def _read_checkpoint(path, version, report):
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('version') != version:
+        report(f"Checkpoint {path} belongs to dictionary version {checkpoint.get('version')}, starting over")
+        return 0
+    return checkpoint['last_id']
+
+def _write_checkpoint(path, version, last_id, processed):
+    if not path:
+        return
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': version, 'last_id': last_id, 'processed': processed}, f)
+    os.replace(tmp_path, path)
+
+def rescore_journals(user_id=None, since=None, until=None, stale_only=True, chunk_size=1000,
+                     workers=None, commit_every=10, checkpoint=None, report=print):
+    """
+    Rescore journals against the current dictionary.
+
+    Rows are streamed in primary-key order with keyset pagination, one chunk
+    of (id, text) at a time, and fanned out to a process pool that holds a
+    compiled snapshot of the dictionary. At most two chunks per worker are in
+    flight, so memory stays bounded however many rows match. Results are
+    written with bulk UPDATEs, their journal_scores rows are replaced, and
+    they are committed every commit_every chunks, after which the checkpoint
+    file records the last committed id; rerunning with the same checkpoint
+    resumes from there.
+
+    Returns the number of journals rescored.
+    """
+    compiled = LIWCAnalyzer.snapshot()
+    version = compiled.version
+    workers = workers or os.cpu_count() or 1
+
+    filters = [Journal.score_status != Journal.SCORE_PENDING]
+    if user_id is not None:
+        filters.append(Journal.user_id == user_id)
+    if since is not None:
+        filters.append(Journal.created_at >= since)
+    if until is not None:
+        filters.append(Journal.created_at < until)
+    if stale_only:
+        filters.append(or_(Journal.dictionary_version.is_(None), Journal.dictionary_version != version))
+
+    last_id = _read_checkpoint(checkpoint, version, report)
+    if last_id:
+        report(f"Resuming after journal {last_id}")
+
+    def read_chunks():
+        cursor = last_id
+        while True:
+            rows = db.session.execute(
+                select(Journal.id, Journal.text)
+                .where(Journal.id > cursor, *filters)
+                .order_by(Journal.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                return
+            cursor = rows[-1][0]
+            yield [tuple(row) for row in rows]
+
+    processed = 0
+    uncommitted = 0
+    started = time.perf_counter()
+
+    def write(results):
+        nonlocal processed, uncommitted, last_id
+        processed += len(write_rescored(results, compiled, stale_only=stale_only))
+        last_id = results[-1][0]
+        uncommitted += 1
+        if uncommitted >= commit_every:
+            commit()
+
+    def commit():
+        nonlocal uncommitted
+        db.session.commit()
+        _write_checkpoint(checkpoint, version, last_id, processed)
+        uncommitted = 0
+        elapsed = time.perf_counter() - started
+        report(f"Rescored {processed} journals ({processed / elapsed if elapsed else 0:.0f}/s), last id {last_id}")
+
+    if workers == 1:
+        _load_snapshot(*_snapshot_args(compiled))
+        for chunk in read_chunks():
+            write(_score_chunk(chunk))
+    else:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=_snapshot_args(compiled)) as pool:
+            in_flight = deque()
+            for chunk in read_chunks():
+                in_flight.append(pool.apply_async(_score_chunk, (chunk,)))
+                if len(in_flight) >= workers * 2:
+                    write(in_flight.popleft().get())
+            while in_flight:
+                write(in_flight.popleft().get())
+
+    if uncommitted:
+        commit()
+
+    elapsed = time.perf_counter() - started
+    report(f"Done: rescored {processed} journals in {elapsed:.1f}s with {workers} worker(s)")
+    return processed
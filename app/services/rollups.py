@@ -0,0 +1,222 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import select, delete, update, insert, func, tuple_
+from app.models.journal import Journal, JournalScore
+from app.models.category import Category
+from app.models.rollup import DailyRollup, DailyCategoryRollup
+from app import db
+
+def contribution(user_id, created_at, scores, category_ids):
+    """
+    What a scored journal adds to its user's daily rollups:
+    (user_id, day, word count, {category_id: count})
+    """
+    counts = {
+        category_ids[name]: count
+        for name, count in scores['categories'].items()
+        if count and name in category_ids
+    }
+    return user_id, created_at.date(), scores.get('word_count') or 0, counts
+
+def stored_contributions(journal_ids):
+    """
+    Read what journals currently add to the rollups.
+
+    Returns the (user_id, created_at) of every journal and the contributions of
+    those whose scores are done, both keyed by journal id. Category counts come
+    from journal_scores. Called before their scores are replaced or the journals
+    are deleted.
+    """
+    if not journal_ids:
+        return {}, {}
+
+    journals = db.session.execute(
+        select(Journal.id, Journal.user_id, Journal.created_at, Journal.score_status, Journal.word_count)
+        .where(Journal.id.in_(journal_ids))
+    ).all()
+    owners = {}
+    contributions = {}
+    for journal_id, user_id, created_at, score_status, word_count in journals:
+        owners[journal_id] = (user_id, created_at)
+        if score_status == Journal.SCORE_DONE:
+            contributions[journal_id] = (user_id, created_at.date(), word_count or 0, {})
+    if contributions:
+        rows = db.session.execute(
+            select(JournalScore.journal_id, JournalScore.category_id, JournalScore.count)
+            .where(JournalScore.journal_id.in_(list(contributions)))
+        )
+        for journal_id, category_id, count in rows:
+            contributions[journal_id][3][category_id] = count
+    return owners, contributions
+
+def apply_changes(before, after):
+    """
+    Move the daily rollups from the contributions in before to those in after.
+
+    Both map journal ids to contribution tuples; a journal missing from before
+    is new, one missing from after was deleted or is no longer scored. The net
+    change per (user, day) and (user, day, category) is applied with atomic
+    increments in the current transaction, so concurrent writers never lose an
+    update. Days left without entries are removed.
+    """
+    days = defaultdict(lambda: [0, 0])
+    categories = defaultdict(int)
+
+    for sign, contributions in ((-1, before), (1, after)):
+        for user_id, day, word_count, counts in contributions.values():
+            totals = days[user_id, day]
+            totals[0] += sign
+            totals[1] += sign * word_count
+            for category_id, count in counts.items():
+                categories[user_id, day, category_id] += sign * count
+
+    day_rows = [
+        {'user_id': user_id, 'day': day, 'entries': entries, 'words': words}
+        for (user_id, day), (entries, words) in sorted(days.items())
+        if entries or words
+    ]
+    category_rows = [
+        {'user_id': user_id, 'day': day, 'category_id': category_id, 'count': count}
+        for (user_id, day, category_id), count in sorted(categories.items())
+        if count
+    ]
+    _increment(DailyRollup, ('user_id', 'day'), ('entries', 'words'), day_rows)
+    _increment(DailyCategoryRollup, ('user_id', 'day', 'category_id'), ('count',), category_rows)
+
+    emptied = [(row['user_id'], row['day']) for row in day_rows if row['entries'] < 0]
+    if emptied:
+        empty_days = select(DailyRollup.user_id, DailyRollup.day).where(
+            tuple_(DailyRollup.user_id, DailyRollup.day).in_(emptied),
+            DailyRollup.entries <= 0
+        )
+        db.session.execute(
+            delete(DailyCategoryRollup).where(
+                tuple_(DailyCategoryRollup.user_id, DailyCategoryRollup.day).in_(empty_days)
+            )
+        )
+        db.session.execute(
+            delete(DailyRollup).where(
+                tuple_(DailyRollup.user_id, DailyRollup.day).in_(emptied),
+                DailyRollup.entries <= 0
+            )
+        )
+
+def _increment(model, keys, columns, rows):
+    """
+    Add rows to the counters of model, inserting the keys that do not exist yet.
+
+    Uses INSERT ... ON CONFLICT DO UPDATE on PostgreSQL and SQLite. Rows are
+    sorted by key so that concurrent transactions lock them in the same order.
+    """
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        statement = upsert(model.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={column: getattr(model.__table__.c, column) + getattr(statement.excluded, column) for column in columns}
+        )
+        db.session.execute(statement, rows)
+        return
+
+    for row in rows:
+        result = db.session.execute(
+            update(model.__table__)
+            .where(*(getattr(model.__table__.c, key) == row[key] for key in keys))
+            .values({column: getattr(model.__table__.c, column) + row[column] for column in columns})
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(model.__table__), [row])
+
+def rebuild_rollups(user_id=None):
+    """
+    Recompute the daily rollups from journals and journal_scores, for one user
+    or everyone. Used to backfill the rollups of journals scored before they
+    existed; the caller commits. Returns the number of (user, day) rows written.
+    """
+    day = func.date(Journal.created_at)
+    filters = [Journal.score_status == Journal.SCORE_DONE]
+    if user_id is not None:
+        filters.append(Journal.user_id == user_id)
+
+    for model in (DailyCategoryRollup, DailyRollup):
+        statement = delete(model)
+        if user_id is not None:
+            statement = statement.where(model.user_id == user_id)
+        db.session.execute(statement)
+
+    rows = db.session.execute(
+        select(Journal.user_id, day, func.count(Journal.id), func.coalesce(func.sum(Journal.word_count), 0))
+        .where(*filters)
+        .group_by(Journal.user_id, day)
+    ).all()
+    _insert_days(
+        DailyRollup,
+        [{'user_id': user, 'day': value, 'entries': entries, 'words': words} for user, value, entries, words in rows]
+    )
+
+    category_rows = db.session.execute(
+        select(Journal.user_id, day, JournalScore.category_id, func.sum(JournalScore.count))
+        .join(JournalScore, JournalScore.journal_id == Journal.id)
+        .where(*filters)
+        .group_by(Journal.user_id, day, JournalScore.category_id)
+    ).all()
+    _insert_days(
+        DailyCategoryRollup,
+        [
+            {'user_id': user, 'day': value, 'category_id': category_id, 'count': count}
+            for user, value, category_id, count in category_rows
+        ]
+    )
+    return len(rows)
+
+def _insert_days(model, rows):
+    for row in rows:
+        if isinstance(row['day'], str):
+            row['day'] = date.fromisoformat(row['day'])
+    if rows:
+        db.session.execute(insert(model), rows)
+
+def user_trends(user_id, days, today):
+    """
+    Daily entry, word and category totals of a user for the days up to and
+    including today, read from the rollups only. Days without journals are
+    included with zero counts.
+    """
+    start = today - timedelta(days=days - 1)
+    category_names = db.session.execute(select(Category.id, Category.name).order_by(Category.id)).all()
+
+    series = {}
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        series[day] = {
+            'day': day.isoformat(),
+            'entries': 0,
+            'words': 0,
+            'categories': {name: 0 for _, name in category_names}
+        }
+
+    rows = db.session.execute(
+        select(DailyRollup.day, DailyRollup.entries, DailyRollup.words)
+        .where(DailyRollup.user_id == user_id, DailyRollup.day >= start, DailyRollup.day <= today)
+    )
+    for day, entries, words in rows:
+        series[day]['entries'] = entries
+        series[day]['words'] = words
+
+    names = dict(category_names)
+    rows = db.session.execute(
+        select(DailyCategoryRollup.day, DailyCategoryRollup.category_id, DailyCategoryRollup.count)
+        .where(DailyCategoryRollup.user_id == user_id, DailyCategoryRollup.day >= start, DailyCategoryRollup.day <= today)
+    )
+    for day, category_id, count in rows:
+        if category_id in names:
+            series[day]['categories'][names[category_id]] = count
+
+    return list(series.values())
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from app.models.score_memo import StoredScore
+from app.services.tokenizer import text_chunks, whitespace_segments
+from app.utils.metrics import MEMO_HITS, MEMO_DATABASE_HITS, MEMO_MISSES, SCORE_MEMO_EVICTIONS
+from app import db
+
+logger = logging.getLogger(__name__)
+
+def text_hash(text):
+    """
+    Hash of the normalized text: lowercased with runs of whitespace collapsed,
+    which leaves its tokens and therefore its scores unchanged. The text is
+    normalized and hashed one segment of whitespace_segments() at a time; a
+    segment cut inside a long run is joined with a space, which does not change
+    the tokens either.
+    """
+    digest = hashlib.sha256()
+    separator = b''
+    for segment in whitespace_segments(text_chunks(text)):
+        normalized = ' '.join(segment.lower().split())
+        if normalized:
+            digest.update(separator + normalized.encode('utf-8'))
+            separator = b' '
+    return digest.hexdigest()
+
+def _copy(scores):
+    return {**scores, 'categories': dict(scores['categories'])}
+
+class ScoreMemo:
+    """
+    Bounded LRU memo of analysis results keyed by (text hash, dictionary version).
+
+    Identical submissions, such as client retries and copy-pasted templates, are
+    scored once per dictionary version. With SCORE_MEMO_DATABASE enabled, misses
+    fall through to the score_memo table, which is shared by every process; it
+    is only consulted inside an app context, and never in forked pool workers,
+    which call disable_database() and use the in-process tier alone. A dictionary change yields a new version and therefore new keys,
+    and the old entries age out.
+    """
+
+    default_size = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._database_allowed = True
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.hits = 0
+        self.database_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _count_hits(self, count):
+        self.hits += count
+        MEMO_HITS.inc(count)
+
+    def _count_database_hits(self, count):
+        self.database_hits += count
+        MEMO_DATABASE_HITS.inc(count)
+
+    def _count_misses(self, count):
+        self.misses += count
+        MEMO_MISSES.inc(count)
+
+    def disable_database(self):
+        """
+        Stop using the score_memo table in this process, for forked workers that
+        inherit the app context but must not share the parent's connections
+        """
+        self._database_allowed = False
+
+    def _settings(self):
+        if has_app_context():
+            config = current_app.config
+            use_database = self._database_allowed and config.get('SCORE_MEMO_DATABASE', False)
+            return config.get('SCORE_MEMO_SIZE', self.default_size), use_database
+        return self.default_size, False
+
+    def get_or_score(self, text, version, score):
+        """
+        Return the memoized scores of text for the dictionary version, calling
+        score() to compute them on a miss. Callers get their own copy.
+        """
+        max_size, use_database = self._settings()
+        if max_size <= 0 and not use_database:
+            return score()
+
+        key = (text_hash(text), version)
+        with self._lock:
+            scores = self._entries.get(key)
+            if scores is not None:
+                self._entries.move_to_end(key)
+                self._count_hits(1)
+                return _copy(scores)
+
+        scores = self._load(key) if use_database else None
+        if scores is not None:
+            self._count_database_hits(1)
+        else:
+            self._count_misses(1)
+            scores = score()
+            if use_database:
+                self._store(key, scores)
+
+        self._remember({key: scores}, max_size)
+        return _copy(scores)
+
+    def get_or_score_many(self, texts, version, score_many):
+        """
+        Return the memoized scores of several texts for the dictionary version.
+        The texts missing from the memo are scored by a single score_many(texts)
+        call, which returns their scores in order; identical texts are scored
+        once. Callers get their own copies.
+        """
+        max_size, use_database = self._settings()
+        if max_size <= 0 and not use_database:
+            return score_many(texts)
+
+        keys = [(text_hash(text), version) for text in texts]
+        found = {}
+        missing = {}
+        with self._lock:
+            for key, text in zip(keys, texts):
+                scores = self._entries.get(key)
+                if scores is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = scores
+                    self._count_hits(1)
+                elif key in missing:
+                    self._count_hits(1)
+                else:
+                    missing[key] = text
+
+        if use_database:
+            for key in list(missing):
+                scores = self._load(key)
+                if scores is not None:
+                    self._count_database_hits(1)
+                    found[key] = scores
+                    del missing[key]
+
+        self._count_misses(len(missing))
+        scored = dict(zip(missing, score_many(list(missing.values())))) if missing else {}
+        if use_database:
+            for key, scores in scored.items():
+                self._store(key, scores)
+
+        found.update(scored)
+        self._remember(found, max_size)
+        return [_copy(found[key]) for key in keys]
+
+    def _remember(self, entries, max_size):
+        if max_size <= 0:
+            return
+        with self._lock:
+            for key, scores in entries.items():
+                self._entries[key] = scores
+                self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+                SCORE_MEMO_EVICTIONS.inc()
+
+    def _load(self, key):
+        scores = db.session.execute(
+            select(StoredScore.scores).where(StoredScore.text_hash == key[0], StoredScore.dictionary_version == key[1])
+        ).scalar()
+        return json.loads(scores) if scores else None
+
+    def _store(self, key, scores):
+        try:
+            with db.session.begin_nested():
+                db.session.add(StoredScore(
+                    text_hash=key[0],
+                    dictionary_version=key[1],
+                    scores=json.dumps(scores),
+                    created_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            logger.debug(f"Score memo entry {key[0]} was stored concurrently")
+
+    def prune(self, version):
+        """
+        Delete the score_memo rows of other dictionary versions; the caller
+        commits. Returns the number of rows deleted.
+        """
+        result = db.session.execute(delete(StoredScore).where(StoredScore.dictionary_version != version))
+        return result.rowcount
+
+    def clear(self):
+        """Drop the in-process entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._reset_stats()
+
+    def stats(self):
+        """
+        Counters of this process since the last clear(), for tests; the
+        score_memo_lookups and score_memo_evictions metrics are the ones
+        exported, summed over every worker
+        """
+        lookups = self.hits + self.database_hits + self.misses
+        return {
+            'hits': self.hits,
+            'database_hits': self.database_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'hit_ratio': (self.hits + self.database_hits) / lookups if lookups else 0.0
+        }
+
+score_memo = ScoreMemo()
@@ -0,0 +1,98 @@
+import logging
+import os
+import threading
+from sqlalchemy import select
+from app.models.journal import Journal
+from app.services.journal_scoring import score_journals
+from app import db
+
+logger = logging.getLogger(__name__)
+
+def process_pending(batch_size=100):
+    """
+    Score one batch of pending journals and return how many were processed.
+
+    The journals table is the queue: pending rows are locked with
+    FOR UPDATE SKIP LOCKED, so several workers can drain it concurrently
+    without claiming the same rows. Scores are written in the same
+    transaction; if a worker dies mid-batch the rows simply stay pending.
+    """
+    journals = db.session.execute(
+        select(Journal)
+        .where(Journal.score_status == Journal.SCORE_PENDING)
+        .order_by(Journal.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    if not journals:
+        db.session.rollback()
+        return 0
+
+    score_journals(journals)
+    db.session.commit()
+    return len(journals)
+
+def drain(batch_size=100):
+    """Score pending journals until the queue is empty"""
+    total = 0
+    while True:
+        processed = process_pending(batch_size)
+        if not processed:
+            return total
+        total += processed
+
+class ScoringWorkerPool:
+    """
+    In-process pool of threads that drain the pending journal queue.
+
+    Threads are started lazily on the first notify() so that they live in the
+    serving worker process rather than in a pre-fork master. Between
+    notifications each thread polls the queue every SCORING_POLL_INTERVAL
+    seconds, which also picks up rows left behind by other processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._pid = None
+
+    def notify(self, app):
+        """Wake the workers, starting them first if needed"""
+        if app.config.get('SCORING_WORKERS', 0) <= 0:
+            return
+        self._ensure_started(app)
+        self._wakeup.set()
+
+    def _ensure_started(self, app):
+        if self._pid == os.getpid() and self._threads:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._threads:
+                return
+            self._pid = os.getpid()
+            self._threads = []
+            for index in range(app.config['SCORING_WORKERS']):
+                thread = threading.Thread(
+                    target=self._run,
+                    args=(app,),
+                    name=f'journal-scoring-{index}',
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self, app):
+        batch_size = app.config['SCORING_BATCH_SIZE']
+        poll_interval = app.config['SCORING_POLL_INTERVAL']
+        while True:
+            self._wakeup.wait(poll_interval)
+            self._wakeup.clear()
+            try:
+                with app.app_context():
+                    drain(batch_size)
+            except Exception:
+                logger.exception("Journal scoring worker failed")
+
+scoring_pool = ScoringWorkerPool()
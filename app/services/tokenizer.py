@@ -0,0 +1,138 @@
+import codecs
+import re
+import time
+import unicodedata
+
+CHUNK_SIZE = 64 * 1024
+
+WORD_RE = re.compile(r'\w+')
+SPACE_RE = re.compile(r'\s')
+NON_WORD_RE = re.compile(r'\W')
+
+# Case-ignorable characters (skipped by str.lower() when it looks for the
+# context of a Greek final sigma): these general categories, plus the
+# apostrophes, periods, colons and middle dots listed below
+CASE_IGNORABLE_CATEGORIES = frozenset(('Mn', 'Me', 'Cf', 'Lm', 'Sk'))
+CASE_IGNORABLE = frozenset("'.:\u00b7\u0387\u055f\u05f4\u2018\u2019\u2024\u2027\ufe13\ufe52\ufe55\uff07\uff0e\uff1a")
+
+class BodyDecodeError(ValueError):
+    """Raised when a request body is not valid text in its declared charset"""
+
+def text_chunks(text, size=CHUNK_SIZE):
+    """Yield consecutive slices of at most size characters of text"""
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+def read_text(stream, encoding='utf-8', size=CHUNK_SIZE):
+    """
+    Read a byte stream in chunks and decode it incrementally, so a multi-byte
+    character split between two chunks is decoded once both have arrived.
+    Returns the text.
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)()
+    except LookupError:
+        raise BodyDecodeError(f'Unknown charset {encoding}')
+
+    parts = []
+    try:
+        while True:
+            data = stream.read(size)
+            if not data:
+                break
+            parts.append(decoder.decode(data))
+        parts.append(decoder.decode(b'', final=True))
+    except UnicodeDecodeError as e:
+        raise BodyDecodeError(f'Body is not valid {encoding}: {e.reason}')
+    return ''.join(parts)
+
+def whitespace_segments(chunks, limit=CHUNK_SIZE):
+    """
+    Regroup chunks of text into segments that only end at whitespace.
+
+    A run of non-whitespace cut by a chunk boundary is carried over to the next
+    segment, so no token is split in two. Lowercasing a segment also gives the
+    same result as lowercasing the whole text, since the context rules of
+    str.lower() (the Greek final sigma) never look across whitespace.
+
+    Once more than limit characters are carried, as in CJK prose or a minified
+    blob, the segment is cut after its last character that is neither a word
+    character, cased, nor case-ignorable, which is just as safe. Failing that,
+    as in 'word.' repeated, it is cut after its last non-word character: no
+    token is split, though a Greek final sigma right before the cut may be
+    lowercased differently. Only a run of word characters alone, a single
+    token longer than limit, is split.
+    Segments therefore stay below limit plus one chunk.
+    """
+    carry = []
+    carried = 0
+    for chunk in chunks:
+        # Last whitespace of the chunk, found from its end
+        match = SPACE_RE.search(chunk[::-1])
+        if match is None:
+            carry.append(chunk)
+            carried += len(chunk)
+            if carried > limit:
+                text = ''.join(carry)
+                cut = _forced_cut(text)
+                yield text[:cut]
+                carry = [text[cut:]] if cut < len(text) else []
+                carried = len(text) - cut
+            continue
+        cut = len(chunk) - match.start()
+        carry.append(chunk[:cut])
+        yield ''.join(carry)
+        carry = [chunk[cut:]] if cut < len(chunk) else []
+        carried = len(chunk) - cut
+    if carry:
+        yield ''.join(carry)
+
+def _forced_cut(text):
+    """
+    Position after the last character of text a segment may safely end with,
+    else after its last non-word character, else its length
+    """
+    fallback = None
+    for match in NON_WORD_RE.finditer(text[::-1]):
+        char = match.group()
+        if (
+            char not in CASE_IGNORABLE
+            and unicodedata.category(char) not in CASE_IGNORABLE_CATEGORIES
+            and char.lower() == char.upper()
+        ):
+            return len(text) - match.start()
+        if fallback is None:
+            fallback = len(text) - match.start()
+    return fallback if fallback is not None else len(text)
+
+class TokenStream:
+    """
+    Lowercased word tokens of text read in chunks, produced one segment at a time.
+
+    Only one segment and its tokens are held in memory, so iterating over a
+    large text costs memory proportional to the chunk size, not the text size.
+    After iteration:
+    - count: number of tokens yielded
+    - seconds: time spent splitting and lowercasing, excluding the consumer
+    """
+    __slots__ = ('chunks', 'count', 'seconds')
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.count = 0
+        self.seconds = 0.0
+
+    @classmethod
+    def from_text(cls, text, size=CHUNK_SIZE):
+        return cls(text_chunks(text, size))
+
+    def __iter__(self):
+        clock = time.perf_counter
+        started = clock()
+        for segment in whitespace_segments(self.chunks):
+            tokens = WORD_RE.findall(segment.lower())
+            self.count += len(tokens)
+            self.seconds += clock() - started
+            yield from tokens
+            started = clock()
+        self.seconds += clock() - started
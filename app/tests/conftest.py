@@ -2,7 +2,11 @@ import pytest
 import os
 import json
 from app import create_app, db
+from app.config import profile_settings, engine_options
 from app.models.user import User
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app.services.migrations import schema_migrations
+from app.utils.auth import principal_cache
 from sqlalchemy import text
 
 @pytest.fixture
@@ -16,13 +20,23 @@ def app():
     app.config.update({
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': test_db_url,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(test_db_url, profile_settings()),
+        'LIWC_DICTIONARY_FILE': None,
+        'DICTIONARY_CHECK_INTERVAL': 0,
+        'DICTIONARY_BACKGROUND_RELOAD': False,
+        'SCORING_WORKERS': 0,
+        'BCRYPT_LOG_ROUNDS': 4,
     })
     
     with app.app_context():
         db.create_all()
+        LIWCAnalyzer.clear_cache()
+        principal_cache.clear()
         yield app
         db.session.remove()
         db.drop_all()
+        # Kept in its own metadata, so drop_all() leaves it behind
+        schema_migrations.drop(db.engine, checkfirst=True)
 
 @pytest.fixture
 def client(app):
@@ -50,6 +64,13 @@ def mock_db_unhealthy(monkeypatch):
     
     monkeypatch.setattr(db.session, 'execute', mock_execute)
 
+@pytest.fixture
+def liwc_dictionary(app):
+    """Load the bundled LIWC dictionary into the test database."""
+    with app.app_context():
+        LIWCAnalyzer.initialize_dictionary()
+        return LIWCAnalyzer.load_dictionary()
+
 @pytest.fixture
 def test_user(app):
     """Create a test user for authentication."""
@@ -45,3 +45,105 @@ def test_login_endpoint(client):
     
     assert response.content_type == 'application/json'
 
+
+@pytest.fixture
+def user_queries(app):
+    """Record the SQL statements that read the users table."""
+    from sqlalchemy import event
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM users' in statement:
+            statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+def test_principal_is_cached(client, auth_headers, user_queries):
+    """Test that protected requests reuse the cached principal"""
+    for _ in range(3):
+        assert client.get('/journals', headers=auth_headers).status_code == 200
+    
+    assert len(user_queries) == 1
+
+def test_principal_cache_invalidated_on_delete(client, auth_headers):
+    """Test that deleting a user drops their cached principal"""
+    assert client.get('/journals', headers=auth_headers).status_code == 200
+    
+    db.session.delete(User.query.filter_by(username='testuser').first())
+    db.session.commit()
+    
+    assert client.get('/journals', headers=auth_headers).status_code == 404
+
+def test_principal_cache_disabled(app, client, auth_headers, user_queries):
+    """Test that a TTL of zero looks the user up on every request"""
+    app.config['AUTH_PRINCIPAL_TTL'] = 0
+    for _ in range(2):
+        client.get('/journals', headers=auth_headers)
+    
+    assert len(user_queries) == 2
+
+def test_token_claims_skip_user_lookup(app, client, test_user, user_queries):
+    """Test that tokens carrying user claims authenticate without the users table"""
+    app.config['AUTH_TOKEN_CLAIMS'] = True
+    response = client.post(
+        '/login',
+        data=json.dumps({'username': 'testuser', 'password': 'password'}),
+        content_type='application/json'
+    )
+    token = json.loads(response.data)['token']
+    assert User.decode_token_claims(token)['username'] == 'testuser'
+    del user_queries[:]
+    
+    response = client.get('/journals', headers={'Authorization': f'Bearer {token}'})
+    
+    assert response.status_code == 200
+    assert user_queries == []
+
+def test_login_rehashes_password_on_cost_change(app, client, test_user):
+    """Test that logging in upgrades a hash made with another cost factor"""
+    user = User.query.filter_by(username='testuser').first()
+    assert user.password_hash.startswith('$2b$04$')
+    
+    app.config['BCRYPT_LOG_ROUNDS'] = 5
+    response = client.post(
+        '/login',
+        data=json.dumps({'username': 'testuser', 'password': 'password'}),
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 200
+    db.session.expire_all()
+    user = User.query.filter_by(username='testuser').first()
+    assert user.password_hash.startswith('$2b$05$')
+    assert user.check_password('password')
+    assert not user.password_needs_rehash()
+
+def test_login_rejected_when_hashing_queue_full(app, client, test_user):
+    """Test that logins beyond the hashing queue limit fail fast with 503"""
+    import threading
+    from app.services.password_hashing import password_hasher
+    
+    app.config.update({'PASSWORD_HASH_WORKERS': 1, 'PASSWORD_HASH_MAX_PENDING': 1})
+    release = threading.Event()
+    blocker = password_hasher.executor().submit(release.wait)
+    try:
+        response = client.post(
+            '/login',
+            data=json.dumps({'username': 'testuser', 'password': 'password'}),
+            content_type='application/json'
+        )
+    finally:
+        release.set()
+        blocker.result()
+    
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    
+    response = client.post(
+        '/login',
+        data=json.dumps({'username': 'testuser', 'password': 'password'}),
+        content_type='application/json'
+    )
+    assert response.status_code == 200
@@ -0,0 +1,72 @@
+import random
+import pytest
+from app.services import bulk_scoring
+from app.services.bulk_scoring import BulkScores
+from app.services.dictionary_cache import CompiledDictionary
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app.services.liwc_matcher import TrieMatcher
+from app.services.tokenizer import TokenStream
+
+@pytest.fixture(params=['numpy', 'python'])
+def engine(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(bulk_scoring, 'numpy', None)
+    return request.param
+
+def random_dictionary(rng, vocabulary):
+    """Exact words, stems and phrases drawn from vocabulary, some in several categories"""
+    dictionary = {f'category_{index}': [] for index in range(4)}
+    for _ in range(25):
+        kind = rng.random()
+        if kind < 0.3:
+            entry = rng.choice(vocabulary) + '*'
+        elif kind < 0.5:
+            entry = ' '.join(rng.choice(vocabulary) + rng.choice(['', '*']) for _ in range(rng.randint(2, 3)))
+        else:
+            entry = rng.choice(vocabulary)
+        dictionary[rng.choice(list(dictionary))].append(entry)
+    return dictionary
+
+def compile_dictionary(dictionary):
+    categories = list(dictionary)
+    entries = [(entry, index) for index, name in enumerate(categories) for entry in dictionary[name]]
+    return CompiledDictionary(categories, TrieMatcher(entries), generation=None)
+
+def test_bulk_scores_match_score_tokens(engine):
+    """Test that every bulk result equals the single-text result on random dictionaries"""
+    rng = random.Random(7)
+    for _ in range(30):
+        vocabulary = [''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(30)]
+        compiled = compile_dictionary(random_dictionary(rng, vocabulary))
+        texts = [
+            ' '.join(rng.choice(vocabulary + ['Ab', 'ZZ']) + rng.choice(['', '.', ',']) for _ in range(rng.randint(0, 40)))
+            for _ in range(20)
+        ]
+        
+        expected = [LIWCAnalyzer.score_tokens(TokenStream.from_text(text), compiled) for text in texts]
+        assert BulkScores(compiled).run(texts) == expected
+
+def test_phrases_do_not_cross_texts(engine):
+    """Test that a phrase split between the end of a text and the next is not matched"""
+    compiled = compile_dictionary({'positive_emotion': ['thank you', 'happ*'], 'social': ['you']})
+    
+    scores = BulkScores(compiled).run(['I thank', 'you, happy', '', 'Thank you!'])
+    
+    assert [result['categories'] for result in scores] == [
+        {'positive_emotion': 0, 'social': 0},
+        {'positive_emotion': 1, 'social': 1},
+        {'positive_emotion': 0, 'social': 0},
+        {'positive_emotion': 1, 'social': 1},
+    ]
+    assert [result['word_count'] for result in scores] == [2, 2, 0, 2]
+
+def test_empty_batch(engine):
+    """Test that an empty batch or a batch without dictionary words scores zero"""
+    compiled = compile_dictionary({'social': ['friend']})
+    
+    assert BulkScores(compiled).run([]) == []
+    assert BulkScores(compiled).run(['nothing here']) == [
+        {'categories': {'social': 0}, 'total': 0, 'word_count': 2}
+    ]
@@ -0,0 +1,42 @@
+import gzip
+import json
+from app.models.journal import Journal
+from app.models.user import User
+from app import db
+
+def create_journals(count):
+    user = User.query.filter_by(username='testuser').first()
+    for index in range(count):
+        journal = Journal(text=f'Entry {index}: I am happy.', user_id=user.id)
+        journal.set_scores({'categories': {'positive_emotion': 1}, 'total': 1})
+        db.session.add(journal)
+    db.session.commit()
+
+def test_large_responses_are_gzipped(client, auth_headers):
+    """Test that large JSON responses are compressed when the client accepts gzip"""
+    create_journals(30)
+    
+    response = client.get('/journals', headers={**auth_headers, 'Accept-Encoding': 'gzip, deflate'})
+    
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert len(json.loads(gzip.decompress(response.data))['journals']) == 30
+
+def test_small_or_unaccepted_responses_are_not_compressed(app, client, auth_headers):
+    """Test the size threshold and encoding negotiation"""
+    create_journals(30)
+    
+    response = client.get('/journals', headers=auth_headers)
+    assert 'Content-Encoding' not in response.headers
+    assert len(json.loads(response.data)['journals']) == 30
+    
+    response = client.get('/journals', headers={**auth_headers, 'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in response.headers
+    
+    response = client.get('/health', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    
+    app.config['COMPRESSION_MIN_SIZE'] = 0
+    response = client.get('/journals', headers={**auth_headers, 'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
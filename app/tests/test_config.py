@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import event, text
+from app import db
+from app.commands import lifted_statement_timeout
+from app.config import profile_settings, engine_options
+
+def test_profile_settings_with_overrides():
+    """Test profile defaults and environment overrides"""
+    settings = profile_settings(environ={'DB_POOL_SIZE': '20', 'DB_POOL_PRE_PING': '0'})
+    
+    assert settings['DB_POOL_SIZE'] == 20
+    assert settings['DB_POOL_PRE_PING'] is False
+    assert settings['DB_STATEMENT_TIMEOUT_MS'] == 30000
+    assert profile_settings(environ={'APP_ENV': 'development'})['DB_STATEMENT_TIMEOUT_MS'] == 0
+    
+    with pytest.raises(ValueError):
+        profile_settings(environ={'APP_ENV': 'staging'})
+
+def test_engine_options():
+    """Test pool and timeout options per database"""
+    settings = profile_settings(environ={})
+    options = engine_options('postgresql://postgres:postgres@db:5432/postgres', settings)
+    
+    assert options['pool_size'] == 10
+    assert options['pool_pre_ping'] is True
+    assert options['pool_recycle'] == 1800
+    assert options['connect_args'] == {'options': '-c statement_timeout=30000 -c lock_timeout=5000'}
+    
+    development = profile_settings('development', environ={})
+    assert 'connect_args' not in engine_options('postgresql://db/postgres', development)
+    assert engine_options('sqlite:///:memory:', settings) == {}
+
+def test_lifted_statement_timeout(app, monkeypatch):
+    """Test that maintenance commands lift the timeout in every transaction on PostgreSQL"""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+        # SQLite cannot run SET LOCAL
+        return ('SELECT 1', ()) if statement.startswith('SET') else (statement, parameters)
+    
+    event.listen(db.engine, 'before_cursor_execute', record, retval=True)
+    try:
+        db.session.commit()
+        monkeypatch.setattr(db.engine.dialect, 'name', 'postgresql')
+        with lifted_statement_timeout():
+            db.session.execute(text('SELECT 2'))
+            db.session.commit()
+            db.session.execute(text('SELECT 3'))
+            db.session.commit()
+        db.session.execute(text('SELECT 4'))
+        db.session.commit()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    
+    assert statements == [
+        'SET LOCAL statement_timeout = 0', 'SELECT 2',
+        'SET LOCAL statement_timeout = 0', 'SELECT 3',
+        'SELECT 4'
+    ]
@@ -0,0 +1,88 @@
+import pytest
+import json
+from app import create_app, db
+from app.models.journal import Journal
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app.utils.auth import principal_cache
+from app.utils.db_routing import sticky_primary, STICKY_COOKIE, REPLICA_BIND
+
+@pytest.fixture
+def replicated_app(monkeypatch, tmp_path):
+    """An app with two SQLite files standing in for the primary and the replica."""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setenv('DATABASE_REPLICA_URL', f"sqlite:///{tmp_path / 'replica.db'}")
+    app = create_app()
+    app.config.update({
+        'TESTING': True,
+        'LIWC_DICTIONARY_FILE': None,
+        'SCORING_WORKERS': 0,
+        'BCRYPT_LOG_ROUNDS': 4,
+    })
+    
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        LIWCAnalyzer.clear_cache()
+        principal_cache.clear()
+        sticky_primary.clear()
+        yield app
+        db.session.remove()
+    sticky_primary.clear()
+    # init_app registered an (empty) metadata for the bind on the shared extension
+    db.metadatas.pop(REPLICA_BIND, None)
+
+def register(client):
+    client.post('/users', data=json.dumps({'username': 'reader', 'password': 'password'}),
+                content_type='application/json')
+    response = client.post('/login', data=json.dumps({'username': 'reader', 'password': 'password'}),
+                           content_type='application/json')
+    return {'Authorization': f"Bearer {json.loads(response.data)['token']}"}
+
+def replica_texts(client, headers):
+    response = client.get('/journals', headers=headers)
+    assert response.status_code == 200
+    return [journal['text'] for journal in json.loads(response.data)['journals']]
+
+def test_reads_go_to_replica(replicated_app):
+    """Test that read-only routes read the replica while writes go to the primary"""
+    headers = register(replicated_app.test_client())
+    client = replicated_app.test_client()
+    
+    # The user only exists on the primary: authentication falls back to it
+    assert replica_texts(client, headers) == []
+    
+    with db.engines[REPLICA_BIND].begin() as connection:
+        connection.execute(Journal.__table__.insert(), {
+            'id': 1, 'user_id': 1, 'text': 'Replicated entry', 'score_status': Journal.SCORE_PENDING
+        })
+    
+    assert replica_texts(client, headers) == ['Replicated entry']
+    assert client.get('/health').status_code == 200
+
+def test_sticky_primary_after_write(replicated_app):
+    """Test that a user reads their own writes from the primary for a while"""
+    headers = register(replicated_app.test_client())
+    client = replicated_app.test_client()
+    
+    response = client.post('/journals', data=json.dumps({'text': 'I am happy today'}),
+                           headers=headers, content_type='application/json')
+    assert response.status_code == 201
+    assert STICKY_COOKIE in response.headers['Set-Cookie']
+    
+    # Sticky through the cookie and, for clients without cookies, per process
+    assert replica_texts(client, headers) == ['I am happy today']
+    assert replica_texts(replicated_app.test_client(use_cookies=False), headers) == ['I am happy today']
+    
+    sticky_primary.clear()
+    assert replica_texts(replicated_app.test_client(use_cookies=False), headers) == []
+
+def test_replica_disabled_without_sticky_window(replicated_app):
+    """Test that REPLICA_STICKY_SECONDS=0 turns read-your-writes off"""
+    replicated_app.config['REPLICA_STICKY_SECONDS'] = 0
+    headers = register(replicated_app.test_client())
+    client = replicated_app.test_client()
+    
+    response = client.post('/journals', data=json.dumps({'text': 'I am happy today'}),
+                           headers=headers, content_type='application/json')
+    assert 'Set-Cookie' not in response.headers
+    assert replica_texts(client, headers) == []
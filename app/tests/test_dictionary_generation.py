@@ -0,0 +1,145 @@
+import pytest
+import threading
+import time
+from app.services import dictionary_cache as dictionary_cache_module
+from app.models.category import Category, Word
+from app.services.dictionary_cache import dictionary_cache
+from app.services.dictionary_edits import DictionaryEditError, edit_words
+from app.services.dictionary_generation import read_generation
+from app.services.dictionary_import import import_dictionary
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app import db
+
+def add_word(text, category_name):
+    category = Category.query.filter_by(name=category_name).first()
+    db.session.add(Word(text=text, category_id=category.id))
+    db.session.commit()
+
+def test_dictionary_changes_bump_generation(app, liwc_dictionary):
+    """Test that ORM writes and imports bump the generation, other writes do not"""
+    generation = read_generation()
+    assert generation > 0
+
+    add_word('serene', 'positive_emotion')
+    assert read_generation() == generation + 1
+
+    import_dictionary({'social': ['neighbor']}, replace=False)
+    db.session.commit()
+    assert read_generation() == generation + 2
+
+    category = Category.query.filter_by(name='social').first()
+    db.session.refresh(category)
+    db.session.commit()
+    assert read_generation() == generation + 2
+
+def test_generation_is_checked_once_per_interval(app, liwc_dictionary):
+    """Test that a change is only picked up at the next generation check"""
+    app.config['DICTIONARY_CHECK_INTERVAL'] = 3600
+    assert LIWCAnalyzer.analyze_text('serene')['total'] == 0
+
+    add_word('serene', 'positive_emotion')
+    assert LIWCAnalyzer.analyze_text('serene')['total'] == 0
+
+    dictionary_cache.expire()
+    assert LIWCAnalyzer.analyze_text('serene')['total'] == 1
+    assert LIWCAnalyzer.cache_stats()['generation'] == read_generation()
+
+def test_background_reload_swaps_in_new_dictionary(app, liwc_dictionary):
+    """Test that requests keep the previous dictionary while the new one is built"""
+    app.config['DICTIONARY_BACKGROUND_RELOAD'] = True
+    assert LIWCAnalyzer.analyze_text('serene')['total'] == 0
+    version = LIWCAnalyzer.cache_stats()['version']
+
+    add_word('serene', 'positive_emotion')
+    assert LIWCAnalyzer.analyze_text('serene')['total'] == 0
+    dictionary_cache.wait(5)
+
+    assert LIWCAnalyzer.analyze_text('serene')['total'] == 1
+    stats = LIWCAnalyzer.cache_stats()
+    assert stats['background_rebuilds'] == 1
+    assert stats['version'] != version
+
+def test_lookups_do_not_wait_for_background_rebuild(app, liwc_dictionary, monkeypatch):
+    """Test that lookups during a slow background rebuild return the previous dictionary at once"""
+    app.config['DICTIONARY_BACKGROUND_RELOAD'] = True
+    assert LIWCAnalyzer.analyze_text('serene')['total'] == 0
+
+    release = threading.Event()
+    compile_dictionary = dictionary_cache_module.compile_dictionary
+    def slow_compile(generation=None):
+        release.wait(5)
+        return compile_dictionary(generation)
+    monkeypatch.setattr(dictionary_cache_module, 'compile_dictionary', slow_compile)
+
+    add_word('serene', 'positive_emotion')
+    try:
+        for _ in range(3):
+            started = time.perf_counter()
+            dictionary_cache.expire()
+            assert LIWCAnalyzer.analyze_text('serene')['total'] == 0
+            assert time.perf_counter() - started < 1
+    finally:
+        release.set()
+    dictionary_cache.wait(5)
+
+    assert LIWCAnalyzer.analyze_text('serene')['total'] == 1
+    assert LIWCAnalyzer.cache_stats()['background_rebuilds'] == 1
+
+def test_edit_words(app, liwc_dictionary):
+    """Test adding, removing and moving words in a single flush"""
+    generation = read_generation()
+    counts = edit_words(
+        add=[('serene', 'positive_emotion'), ('happy', 'positive_emotion')],
+        remove=[('sad', 'negative_emotion'), ('missing', 'negative_emotion')],
+        move=[('friend', 'social', 'positive_emotion'), ('sad', 'negative_emotion', 'social')]
+    )
+    db.session.commit()
+
+    assert counts == {'added': 1, 'removed': 1, 'moved': 1}
+    assert read_generation() == generation + 2
+    scores = LIWCAnalyzer.analyze_text('serene sad friend')
+    assert scores['categories']['positive_emotion'] == 2
+    assert scores['categories']['negative_emotion'] == 0
+    assert scores['categories']['social'] == 0
+
+def test_edit_words_moves_onto_existing_word(app, liwc_dictionary):
+    """Test that moving a word into a category that has it removes the source"""
+    add_word('friend', 'positive_emotion')
+    counts = edit_words(move=[('friend', 'social', 'positive_emotion')])
+    db.session.commit()
+
+    assert counts['moved'] == 1
+    assert Word.query.filter_by(text='friend').count() == 1
+
+def test_edit_words_rejects_unknown_category(app, liwc_dictionary):
+    """Test that nothing is written when a category does not exist"""
+    generation = read_generation()
+    with pytest.raises(DictionaryEditError, match='Unknown categories: nope'):
+        edit_words(add=[('serene', 'positive_emotion')], move=[('sad', 'negative_emotion', 'nope')])
+    db.session.rollback()
+
+    assert Word.query.filter_by(text='serene').count() == 0
+    assert read_generation() == generation
+
+def test_edit_outdates_mapped_dictionary_file(app, liwc_dictionary, tmp_path):
+    """Test that moves leaving the table aggregates unchanged still outdate the file"""
+    path = str(tmp_path / 'liwc_dictionary.bin')
+    LIWCAnalyzer.build_dictionary_file(path)
+    app.config['LIWC_DICTIONARY_FILE'] = path
+    LIWCAnalyzer.analyze_text('happy')
+    stats = LIWCAnalyzer.cache_stats()
+    assert stats['source'] == 'mapped'
+    version = stats['version']
+
+    edit_words(move=[
+        ('happy', 'positive_emotion', 'negative_emotion'),
+        ('friend', 'social', 'negative_emotion')
+    ])
+    db.session.commit()
+
+    scores = LIWCAnalyzer.analyze_text('happy sad friend')
+    assert scores['categories']['negative_emotion'] == 3
+    assert scores['categories']['positive_emotion'] == 0
+    stats = LIWCAnalyzer.cache_stats()
+    assert stats['source'] == 'database'
+    assert stats['version'] != version
@@ -0,0 +1,121 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import select
+from app.models.category import Category, Word
+from app.models.journal import Journal, JournalScore
+from app.models.user import User
+from app.services.dictionary_import import DictionaryImportError, import_dictionary, parse_dic, read_dictionary
+from app.services.journal_scoring import score_journals
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app import db
+
+DIC = """%
+1\tposemo
+02\tnegemo
+3\tsocial
+%
+happ*\t1
+sad\t02
+thank you\t1\t3
+friend\t3 1
+like\t<of>1/3\t1
+"""
+
+def dictionary_rows():
+    return sorted(db.session.execute(
+        select(Category.name, Word.text).join(Word, Word.category_id == Category.id)
+    ).all())
+
+def test_parse_dic():
+    """Test the category block, multi-category lines and skipped conditional assignments"""
+    assert parse_dic(DIC.splitlines(True)) == {
+        'posemo': ['happ*', 'thank you', 'friend', 'like'],
+        'negemo': ['sad'],
+        'social': ['thank you', 'friend']
+    }
+
+@pytest.mark.parametrize('text, message', [
+    ('happy\t1\n', "opening the category block"),
+    ('%\n1\tposemo\n', "closing the category block"),
+    ('%\n1\tposemo\n%\nhappy\t4\n', 'unknown category id 4'),
+    ('%\nposemo\n%\n', 'expected a category id and name'),
+])
+def test_parse_dic_errors(text, message):
+    """Test that malformed files are rejected with the offending line"""
+    with pytest.raises(DictionaryImportError, match=message):
+        parse_dic(text.splitlines(True))
+
+def test_read_dictionary_formats(tmp_path):
+    """Test that the format is picked from the file extension"""
+    dic = tmp_path / 'liwc.dic'
+    dic.write_text(DIC)
+    json_file = tmp_path / 'liwc.json'
+    json_file.write_text('{"social": ["friend"]}')
+    
+    assert read_dictionary(str(dic))['negemo'] == ['sad']
+    assert read_dictionary(str(json_file)) == {'social': ['friend']}
+    with pytest.raises(DictionaryImportError, match='expected a list'):
+        json_file.write_text('{"social": "friend"}')
+        read_dictionary(str(json_file))
+    with pytest.raises(DictionaryImportError, match='Unsupported'):
+        read_dictionary(str(tmp_path / 'liwc.txt'))
+
+def test_import_swaps_dictionary(app, liwc_dictionary, test_user):
+    """Test that a replacing import leaves exactly the new dictionary and drops removed categories' scores"""
+    user = User.query.filter_by(username='testuser').first()
+    score_journals([Journal(text='I think my friend is happy', user_id=user.id, created_at=datetime(2024, 3, 1))])
+    db.session.commit()
+    happy = db.session.execute(select(Word.id).where(Word.text == 'happy')).scalar()
+    
+    changes = import_dictionary({
+        'positive_emotion': ['happy', 'glad'],
+        'social': ['friend', 'thank you'],
+        'leisure': ['game*']
+    })
+    db.session.commit()
+    
+    assert dictionary_rows() == [
+        ('leisure', 'game*'),
+        ('positive_emotion', 'glad'),
+        ('positive_emotion', 'happy'),
+        ('social', 'friend'),
+        ('social', 'thank you'),
+    ]
+    assert db.session.execute(select(Word.id).where(Word.text == 'happy')).scalar() == happy
+    assert changes['categories_added'] == 1
+    assert changes['categories_removed'] == 2
+    assert changes['words_added'] == 3
+    assert changes['words'] == 5
+    stored = db.session.execute(
+        select(Category.name).join(JournalScore, JournalScore.category_id == Category.id)
+    ).scalars().all()
+    assert sorted(stored) == ['positive_emotion', 'social']
+    
+    scores = LIWCAnalyzer.analyze_text('Games with a friend, glad. Thank you!')
+    assert scores['categories'] == {'positive_emotion': 1, 'social': 2, 'leisure': 1}
+
+def test_import_merge_keeps_existing(app, liwc_dictionary):
+    """Test that a merging import only adds categories and words"""
+    before = len(dictionary_rows())
+    
+    changes = import_dictionary({'social': ['friend', 'neighbour'], 'leisure': ['game*']}, replace=False)
+    db.session.commit()
+    
+    assert len(dictionary_rows()) == before + 2
+    assert (changes['words_added'], changes['words_removed'], changes['categories_removed']) == (2, 0, 0)
+
+def test_import_dictionary_command(app, runner, liwc_dictionary, tmp_path):
+    """Test the import-dictionary CLI command with a .dic file and a malformed one"""
+    path = tmp_path / 'liwc.dic'
+    path.write_text(DIC)
+    
+    result = runner.invoke(args=['import-dictionary', str(path), '--no-build'])
+    
+    assert result.exit_code == 0, result.output
+    assert 'Imported 7 entries in 3 categories' in result.output
+    assert LIWCAnalyzer.analyze_text('Happiness, thank you friend')['categories'] == {'posemo': 3, 'negemo': 0, 'social': 2}
+    
+    path.write_text('happy\t1\n')
+    result = runner.invoke(args=['import-dictionary', str(path), '--no-build'])
+    assert result.exit_code == 1
+    assert 'category block' in result.output
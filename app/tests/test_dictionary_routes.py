@@ -0,0 +1,92 @@
+import pytest
+import json
+from app.models.user import User
+from app.services.dictionary_generation import read_generation
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app import db
+
+@pytest.fixture
+def admin_headers(app, runner, auth_headers):
+    """Make the test user an administrator."""
+    result = runner.invoke(args=['set-admin', 'testuser'])
+    assert result.exit_code == 0
+    return auth_headers
+
+def test_dictionary_requires_admin(client, auth_headers, liwc_dictionary):
+    """Test that regular users cannot read or edit the dictionary"""
+    response = client.get('/dictionary', headers=auth_headers)
+    assert response.status_code == 403
+
+    response = client.post(
+        '/dictionary/words',
+        data=json.dumps({'add': [{'word': 'serene', 'category': 'positive_emotion'}]}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    assert response.status_code == 403
+
+def test_get_dictionary(client, admin_headers, liwc_dictionary):
+    """Test listing the categories and their words"""
+    response = client.get('/dictionary', headers=admin_headers)
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['generation'] == read_generation()
+    assert data['categories']['social'] == liwc_dictionary['social']
+
+def test_edit_dictionary_words(client, admin_headers, liwc_dictionary):
+    """Test that edits are applied and used by the next analysis"""
+    assert LIWCAnalyzer.analyze_text('serene friend')['total'] == 1
+    generation = read_generation()
+
+    response = client.post(
+        '/dictionary/words',
+        data=json.dumps({
+            'add': [{'word': 'serene', 'category': 'positive_emotion'}],
+            'move': [{'word': 'friend', 'from': 'social', 'to': 'positive_emotion'}]
+        }),
+        headers=admin_headers,
+        content_type='application/json'
+    )
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['added'] == 1
+    assert data['moved'] == 1
+    assert data['generation'] == generation + 1
+
+    scores = LIWCAnalyzer.analyze_text('serene friend')
+    assert scores['categories']['positive_emotion'] == 2
+    assert scores['categories']['social'] == 0
+
+@pytest.mark.parametrize('body, message', [
+    ({}, 'No changes given'),
+    ({'add': 'serene'}, 'add: expected a list'),
+    ({'remove': [{'word': 'sad'}]}, 'remove[0]: category is required'),
+    ({'add': [{'word': 'serene', 'category': 'calm'}]}, 'Unknown categories: calm'),
+])
+def test_edit_dictionary_words_invalid(client, admin_headers, liwc_dictionary, body, message):
+    """Test that malformed edits are rejected"""
+    response = client.post(
+        '/dictionary/words',
+        data=json.dumps(body),
+        headers=admin_headers,
+        content_type='application/json'
+    )
+
+    assert response.status_code == 400
+    assert json.loads(response.data)['message'] == message
+
+def test_set_admin_command(app, runner, test_user):
+    """Test granting and revoking administrator access"""
+    result = runner.invoke(args=['set-admin', 'testuser'])
+    assert 'testuser is now an administrator' in result.output
+    assert User.query.filter_by(username='testuser').one().is_admin
+
+    result = runner.invoke(args=['set-admin', 'testuser', '--revoke'])
+    db.session.expire_all()
+    assert not User.query.filter_by(username='testuser').one().is_admin
+
+    result = runner.invoke(args=['set-admin', 'nobody'])
+    assert result.exit_code != 0
+    assert 'User nobody not found' in result.output
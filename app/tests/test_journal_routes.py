@@ -26,6 +26,36 @@ def test_create_journal(client, auth_headers):
     assert 'categories' in data['score']
     assert 'total' in data['score']
 
+def test_create_journal_plain_text(client, auth_headers, liwc_dictionary):
+    """Test submitting a large journal entry as a text/plain body"""
+    text = 'I am happy with my friend. ' * 20000
+    response = client.post(
+        '/journals',
+        data=text.encode('utf-8'),
+        headers=auth_headers,
+        content_type='text/plain; charset=utf-8'
+    )
+    
+    assert response.status_code == 201
+    data = json.loads(response.data)
+    assert data['score']['word_count'] == 6 * 20000
+    assert data['score']['categories']['social'] == 20000
+    assert db.session.get(Journal, data['journal_id']).text == text
+    
+    response = client.post('/journals', data=b'', headers=auth_headers, content_type='text/plain')
+    assert response.status_code == 400
+    response = client.post('/journals', data=b'caf\xe9', headers=auth_headers, content_type='text/plain')
+    assert response.status_code == 400
+
+def test_create_journal_body_too_large(app, client, auth_headers):
+    """Test that bodies over MAX_BODY_SIZE are rejected with 413"""
+    app.config['MAX_CONTENT_LENGTH'] = 1000
+    for body, content_type in ((b'x' * 1001, 'text/plain'), (json.dumps({'text': 'x' * 1000}), 'application/json')):
+        response = client.post('/journals', data=body, headers=auth_headers, content_type=content_type)
+        
+        assert response.status_code == 413
+        assert json.loads(response.data)['status'] == 'error'
+
 def test_create_journal_missing_text(client, auth_headers):
     """Test creating a journal entry with missing text"""
     response = client.post(
@@ -121,3 +151,455 @@ def test_liwc_analyzer(app):
         
         assert isinstance(scores['categories'], dict)
         assert isinstance(scores['total'], int)
+
+def test_create_journal_rejects_non_string_text(client, auth_headers):
+    """Test that a text that is not a string is rejected"""
+    response = client.post(
+        '/journals',
+        data=json.dumps({'text': 5}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 400
+    assert json.loads(response.data)['message'] == 'Text is required'
+    assert Journal.query.count() == 0
+
+def test_create_journal_scoring_failure(client, auth_headers, liwc_dictionary, monkeypatch):
+    """Test that a journal whose scoring fails is not reported as a success"""
+    def fail(*args):
+        raise RuntimeError('boom')
+    monkeypatch.setattr(LIWCAnalyzer, 'score_many', staticmethod(fail))
+    monkeypatch.setattr(LIWCAnalyzer, 'score_text', staticmethod(fail))
+    
+    response = client.post(
+        '/journals',
+        data=json.dumps({'text': 'I am happy today.'}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 500
+    data = json.loads(response.data)
+    assert data['status'] == 'error'
+    assert data['score_status'] == 'failed'
+    assert db.session.get(Journal, data['journal_id']).score_status == Journal.SCORE_FAILED
+    
+    response = client.post(
+        '/journals/batch',
+        data=json.dumps({'entries': [{'text': 'I am happy today.'}]}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 500
+    data = json.loads(response.data)
+    assert data['created'] == 0
+    assert data['failed'] == 1
+    assert data['results'][0]['score_status'] == 'failed'
+
+def test_create_journals_batch(client, auth_headers, liwc_dictionary):
+    """Test creating several journal entries in one request"""
+    response = client.post(
+        '/journals/batch',
+        data=json.dumps({
+            'entries': [
+                {'text': 'I am happy today.'},
+                {'body': 'missing text'},
+                {'text': 'I was sad and angry yesterday.'}
+            ]
+        }),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 201
+    data = json.loads(response.data)
+    assert data['created'] == 2
+    assert data['failed'] == 1
+    
+    results = data['results']
+    assert [result['status'] for result in results] == ['success', 'error', 'success']
+    assert results[1]['message'] == 'Text is required'
+    assert results[0]['score']['categories']['positive_emotion'] == 1
+    assert results[2]['score']['categories']['negative_emotion'] == 2
+    
+    journal = db.session.get(Journal, results[2]['journal_id'])
+    assert journal.text == 'I was sad and angry yesterday.'
+    assert journal.get_scores() == results[2]['score']
+
+def test_create_journals_batch_all_invalid(client, auth_headers):
+    """Test that a batch without any valid entry is rejected"""
+    response = client.post(
+        '/journals/batch',
+        data=json.dumps({'entries': [{'text': 42}]}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 400
+    data = json.loads(response.data)
+    assert data['created'] == 0
+    assert data['results'][0]['status'] == 'error'
+
+def test_create_journals_batch_too_large(app, client, auth_headers):
+    """Test that oversized batches are rejected"""
+    app.config['JOURNAL_BATCH_MAX_SIZE'] = 2
+    response = client.post(
+        '/journals/batch',
+        data=json.dumps({'entries': [{'text': 'a'}, {'text': 'b'}, {'text': 'c'}]}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 413
+
+def test_create_journal_async(client, auth_headers, liwc_dictionary):
+    """Test that async submissions are stored pending and scored by the queue"""
+    from app.services.scoring_queue import drain
+    
+    response = client.post(
+        '/journals?async=1',
+        data=json.dumps({'text': 'I am happy today.'}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 202
+    data = json.loads(response.data)
+    assert data['score_status'] == 'pending'
+    assert response.headers['Location'].endswith(f"/journals/{data['journal_id']}/score")
+    
+    response = client.get(f"/journals/{data['journal_id']}/score", headers=auth_headers)
+    assert response.status_code == 202
+    pending = json.loads(response.data)
+    assert pending['score_status'] == 'pending'
+    assert pending['score'] is None
+    
+    assert drain() == 1
+    assert drain() == 0
+    
+    response = client.get(f"/journals/{data['journal_id']}/score", headers=auth_headers)
+    assert response.status_code == 200
+    done = json.loads(response.data)
+    assert done['score_status'] == 'done'
+    assert done['score']['categories']['positive_emotion'] == 1
+
+def test_create_journal_async_by_default(app, client, auth_headers):
+    """Test that JOURNAL_ASYNC_SCORING makes async the default and ?async=0 opts out"""
+    app.config['JOURNAL_ASYNC_SCORING'] = True
+    
+    response = client.post(
+        '/journals',
+        data=json.dumps({'text': 'I am happy today.'}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    assert response.status_code == 202
+    
+    response = client.post(
+        '/journals?async=0',
+        data=json.dumps({'text': 'I am happy today.'}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    assert response.status_code == 201
+
+def test_get_journal_score_rescores_stale_entry(client, auth_headers, liwc_dictionary):
+    """Test that scores from an older dictionary version are recomputed on read"""
+    response = client.post(
+        '/journals',
+        data=json.dumps({'text': 'I feel serene and happy.'}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    journal_id = json.loads(response.data)['journal_id']
+    journal = db.session.get(Journal, journal_id)
+    old_version = journal.dictionary_version
+    assert old_version == LIWCAnalyzer.snapshot().version
+    assert journal.get_scores()['categories']['positive_emotion'] == 1
+    
+    category = Category.query.filter_by(name='positive_emotion').first()
+    db.session.add(Word(text='serene', category_id=category.id))
+    db.session.commit()
+    
+    response = client.get(f'/journals/{journal_id}/score', headers=auth_headers)
+    data = json.loads(response.data)
+    
+    assert data['score']['categories']['positive_emotion'] == 2
+    assert data['dictionary_version'] != old_version
+    
+    db.session.expire_all()
+    journal = db.session.get(Journal, journal_id)
+    assert journal.dictionary_version == data['dictionary_version']
+    assert journal.get_scores()['categories']['positive_emotion'] == 2
+
+def test_outdated_process_does_not_rescore(app, client, auth_headers, liwc_dictionary):
+    """Test that a process still on the previous dictionary leaves newer scores alone"""
+    app.config['DICTIONARY_CHECK_INTERVAL'] = 3600
+    response = client.post(
+        '/journals',
+        data=json.dumps({'text': 'I feel serene and happy.'}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    journal_id = json.loads(response.data)['journal_id']
+    
+    # Another process picks up a dictionary change and rescores the journal
+    category = Category.query.filter_by(name='positive_emotion').first()
+    db.session.add(Word(text='serene', category_id=category.id))
+    db.session.commit()
+    journal = db.session.get(Journal, journal_id)
+    journal.dictionary_version = 'newer'
+    db.session.commit()
+    revision = journal.revision
+    
+    response = client.get(f'/journals/{journal_id}/score', headers=auth_headers)
+    assert json.loads(response.data)['dictionary_version'] == 'newer'
+    db.session.expire_all()
+    assert db.session.get(Journal, journal_id).revision == revision
+    
+    # The check made this process pick up the change on its next lookup
+    response = client.get(f'/journals/{journal_id}/score', headers=auth_headers)
+    data = json.loads(response.data)
+    assert data['dictionary_version'] == LIWCAnalyzer.cache_stats()['version']
+    assert data['score']['categories']['positive_emotion'] == 2
+
+def test_get_user_journals_rescores_unversioned_entries(client, auth_headers, liwc_dictionary):
+    """Test that listing journals recomputes scores without a dictionary version"""
+    user = db.session.query(User).filter_by(username='testuser').first()
+    journal = Journal(text='I am sad.', user_id=user.id)
+    journal.set_scores({'categories': {}, 'total': 0})
+    db.session.add(journal)
+    db.session.commit()
+    
+    response = client.get('/journals', headers=auth_headers)
+    data = json.loads(response.data)
+    
+    listed = next(item for item in data['journals'] if item['id'] == journal.id)
+    assert listed['scores']['categories']['negative_emotion'] == 1
+    assert listed['dictionary_version'] == LIWCAnalyzer.snapshot().version
+
+def create_journals(count):
+    user = db.session.query(User).filter_by(username='testuser').first()
+    journals = []
+    for index in range(count):
+        journal = Journal(text=f'Entry {index}: I am happy.', user_id=user.id)
+        journal.set_scores({'categories': {}, 'total': 0})
+        journals.append(journal)
+    db.session.add_all(journals)
+    db.session.commit()
+    return journals
+
+def test_get_user_journals_paginates(client, auth_headers):
+    """Test keyset pagination of the journal list, newest first"""
+    journals = create_journals(5)
+    
+    seen = []
+    cursor = None
+    for _ in range(3):
+        url = '/journals?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data['journals']) <= 2
+        seen.extend(journal['id'] for journal in data['journals'])
+        cursor = data['next_cursor']
+    
+    assert cursor is None
+    assert seen == [journal.id for journal in reversed(journals)]
+
+def test_get_user_journals_invalid_pagination(client, auth_headers):
+    """Test that malformed limit and cursor parameters are rejected"""
+    assert client.get('/journals?limit=0', headers=auth_headers).status_code == 400
+    assert client.get('/journals?limit=abc', headers=auth_headers).status_code == 400
+    assert client.get('/journals?cursor=not-a-cursor', headers=auth_headers).status_code == 400
+
+def test_get_user_journals_ndjson(client, auth_headers, liwc_dictionary):
+    """Test streaming the journal list as NDJSON, rescoring stale rows"""
+    journals = create_journals(3)
+    
+    response = client.get(
+        '/journals',
+        headers={**auth_headers, 'Accept': 'application/x-ndjson'}
+    )
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [line['id'] for line in lines] == [journal.id for journal in reversed(journals)]
+    assert all(line['scores']['categories']['positive_emotion'] == 1 for line in lines)
+    
+    db.session.expire_all()
+    stored = db.session.get(Journal, journals[0].id)
+    assert stored.dictionary_version == LIWCAnalyzer.snapshot().version
+    
+    response = client.get(
+        '/journals?limit=1',
+        headers={**auth_headers, 'Accept': 'application/x-ndjson'}
+    )
+    assert len(response.data.decode().splitlines()) == 1
+
+def test_get_journal_stats(client, auth_headers, liwc_dictionary):
+    """Test SQL-side aggregation of category scores"""
+    from datetime import datetime
+    from app.models.journal import JournalScore
+    
+    client.post(
+        '/journals/batch',
+        data=json.dumps({'entries': [
+            {'text': 'I am happy and joyful with my friend.'},
+            {'text': 'I am sad.'},
+            {'text': 'Happy.'}
+        ]}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    journals = Journal.query.order_by(Journal.id).all()
+    journals[2].created_at = datetime(2020, 1, 15, 12, 0)
+    db.session.commit()
+    assert JournalScore.query.filter_by(journal_id=journals[0].id).count() == 2
+    
+    response = client.get('/journals/stats', headers=auth_headers)
+    assert response.status_code == 200
+    overall, = json.loads(response.data)['stats']
+    assert overall['period'] is None
+    assert overall['entries'] == 3
+    assert overall['categories']['positive_emotion'] == {'sum': 2, 'avg': 2 / 3}
+    assert overall['categories']['negative_emotion']['sum'] == 1
+    assert overall['categories']['cognitive']['sum'] == 0
+    assert overall['total']['sum'] == 4
+    
+    response = client.get('/journals/stats?group_by=day', headers=auth_headers)
+    days = json.loads(response.data)['stats']
+    assert [day['period'] for day in days][0] == '2020-01-15'
+    assert [day['entries'] for day in days] == [1, 2]
+    
+    response = client.get('/journals/stats?group_by=month&from=2020-01-01&to=2020-02-01', headers=auth_headers)
+    months = json.loads(response.data)['stats']
+    assert months == [{
+        'period': '2020-01',
+        'entries': 1,
+        'categories': {name: {'sum': int(name == 'positive_emotion'), 'avg': float(name == 'positive_emotion')}
+                       for name in months[0]['categories']},
+        'total': {'sum': 1, 'avg': 1.0}
+    }]
+    
+    response = client.get('/journals/stats?group_by=week', headers=auth_headers)
+    assert json.loads(response.data)['stats'][0]['period'] == '2020-01-13'
+
+def test_get_journal_stats_invalid(client, auth_headers):
+    """Test that invalid stats parameters are rejected"""
+    assert client.get('/journals/stats?group_by=year', headers=auth_headers).status_code == 400
+    assert client.get('/journals/stats?from=yesterday', headers=auth_headers).status_code == 400
+
+def test_user_trends(client, auth_headers, liwc_dictionary):
+    """Test that daily rollups follow journal creation, rescoring and deletion"""
+    from datetime import datetime
+    from app.models.rollup import DailyRollup
+    
+    for text in ('I am happy and joyful.', 'I am sad today.'):
+        client.post('/journals', data=json.dumps({'text': text}), headers=auth_headers, content_type='application/json')
+    client.post(
+        '/journals/batch',
+        data=json.dumps({'entries': [{'text': 'Happy friend.'}]}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    
+    response = client.get('/users/me/trends', headers=auth_headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['window'] == '7d'
+    assert len(data['days']) == 7
+    today = data['days'][-1]
+    assert today['day'] == datetime.utcnow().date().isoformat()
+    assert today['entries'] == 3
+    assert today['words'] == 11
+    assert today['categories']['positive_emotion'] == 2
+    assert today['categories']['negative_emotion'] == 1
+    assert data['days'][0]['entries'] == 0
+    assert data['totals']['entries'] == 3
+    assert data['totals']['categories']['social'] == 1
+    
+    journals = Journal.query.order_by(Journal.id).all()
+    journal = journals[0]
+    journal.set_scores({'categories': {}, 'total': 0, 'word_count': 5}, 'outdated')
+    db.session.commit()
+    client.get(f'/journals/{journal.id}/score', headers=auth_headers)
+    today = json.loads(client.get('/users/me/trends?window=30d', headers=auth_headers).data)['days'][-1]
+    assert today['entries'] == 3
+    assert today['categories']['positive_emotion'] == 2
+    
+    response = client.delete(f'/journals/{journals[1].id}', headers=auth_headers)
+    assert response.status_code == 200
+    assert db.session.get(Journal, journals[1].id) is None
+    today = json.loads(client.get('/users/me/trends', headers=auth_headers).data)['days'][-1]
+    assert today['entries'] == 2
+    assert today['words'] == 7
+    assert today['categories']['negative_emotion'] == 0
+    
+    for journal in (journals[0], journals[2]):
+        client.delete(f'/journals/{journal.id}', headers=auth_headers)
+    assert DailyRollup.query.count() == 0
+    
+    assert client.get('/users/me/trends?window=1y', headers=auth_headers).status_code == 400
+
+def test_delete_journal_not_owned(client, auth_headers, liwc_dictionary):
+    """Test that journals of other users cannot be deleted"""
+    other = User(username='other', password='password')
+    db.session.add(other)
+    db.session.commit()
+    journal = Journal(text='Not yours.', user_id=other.id)
+    db.session.add(journal)
+    db.session.commit()
+    
+    assert client.delete(f'/journals/{journal.id}', headers=auth_headers).status_code == 403
+    assert client.delete('/journals/999', headers=auth_headers).status_code == 404
+
+def test_get_journal_score_conditional(client, auth_headers, liwc_dictionary):
+    """Test ETag revalidation of journal scores"""
+    response = client.post(
+        '/journals',
+        data=json.dumps({'text': 'I am happy today.'}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    journal_id = json.loads(response.data)['journal_id']
+    
+    response = client.get(f'/journals/{journal_id}/score', headers=auth_headers)
+    etag = response.headers['ETag']
+    
+    response = client.get(f'/journals/{journal_id}/score', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    
+    gzip_etag = etag[:-1] + '-gzip"'
+    response = client.get(f'/journals/{journal_id}/score', headers={**auth_headers, 'If-None-Match': gzip_etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == gzip_etag
+    
+    category = Category.query.filter_by(name='positive_emotion').first()
+    db.session.add(Word(text='today', category_id=category.id))
+    db.session.commit()
+    
+    response = client.get(f'/journals/{journal_id}/score', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert json.loads(response.data)['score']['categories']['positive_emotion'] == 2
+
+def test_get_user_journals_conditional(client, auth_headers):
+    """Test ETag revalidation of journal pages"""
+    create_journals(3)
+    
+    response = client.get('/journals?limit=2', headers=auth_headers)
+    etag = response.headers['ETag']
+    
+    response = client.get('/journals?limit=2', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+    
+    create_journals(1)
+    response = client.get('/journals?limit=2', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,49 @@
+import json
+import pytest
+from app.utils.json_provider import FastJSONProvider, RawJSON, orjson
+
+@pytest.fixture(params=['json', 'orjson'])
+def provider(request, app):
+    """A JSON provider for each available backend."""
+    if request.param == 'orjson' and orjson is None:
+        pytest.skip('orjson is not installed')
+    app.config['JSON_BACKEND'] = request.param
+    provider = FastJSONProvider(app)
+    assert provider.backend == request.param
+    return provider
+
+def test_raw_json_is_spliced(provider):
+    """Test that RawJSON values are embedded verbatim"""
+    stored = '{"categories": {"social": 2}, "total": 2}'
+    text = provider.dumps({
+        'journals': [{'id': 1, 'scores': RawJSON(stored)}, {'id': 2, 'scores': None}],
+        'note': 'rawjson-0000000000000000-0'
+    })
+    
+    assert stored in text
+    assert json.loads(text) == {
+        'journals': [{'id': 1, 'scores': json.loads(stored)}, {'id': 2, 'scores': None}],
+        'note': 'rawjson-0000000000000000-0'
+    }
+
+def test_backends_agree(provider):
+    """Test that every backend produces the same document"""
+    data = {'b': [1, 2.5, None, True], 'a': 'héllo'}
+    text = provider.dumps(data, separators=(',', ':'))
+    
+    assert text.index('"a"') < text.index('"b"')
+    assert provider.loads(text) == data
+
+def test_journal_list_uses_raw_scores(client, auth_headers, liwc_dictionary):
+    """Test that listed journals carry their stored scores unchanged"""
+    client.post(
+        '/journals',
+        data=json.dumps({'text': 'I am happy with my friend.'}),
+        headers=auth_headers,
+        content_type='application/json'
+    )
+    
+    journal, = json.loads(client.get('/journals', headers=auth_headers).data)['journals']
+    
+    assert journal['scores']['categories']['positive_emotion'] == 1
+    assert journal['scores']['word_count'] == 6
@@ -0,0 +1,184 @@
+import pytest
+from app.models.category import Category, Word
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app import db
+
+def test_analyze_text_counts_dictionary_words(app, liwc_dictionary):
+    """Test that dictionary words are counted per category"""
+    scores = LIWCAnalyzer.analyze_text('I am happy and joyful, but Sad and ANGRY about my friend.')
+    
+    assert scores['categories']['positive_emotion'] == 1
+    assert scores['categories']['negative_emotion'] == 2
+    assert scores['categories']['social'] == 1
+    assert scores['total'] == 4
+    assert set(scores['categories']) == set(liwc_dictionary)
+
+def test_analyze_text_reuses_compiled_dictionary(app, liwc_dictionary):
+    """Test that the compiled dictionary is built once and reused"""
+    LIWCAnalyzer.analyze_text('happy')
+    LIWCAnalyzer.analyze_text('sad')
+    LIWCAnalyzer.analyze_text('friend')
+    
+    stats = LIWCAnalyzer.cache_stats()
+    assert stats['misses'] == 1
+    assert stats['rebuilds'] == 1
+    assert stats['hits'] == 2
+    assert stats['entries'] > 0
+    assert stats['version'] is not None
+    assert stats['rebuild_seconds'] >= 0
+
+def test_analyze_text_rebuilds_when_dictionary_changes(app, liwc_dictionary):
+    """Test that changes to the words table invalidate the compiled dictionary"""
+    assert LIWCAnalyzer.analyze_text('serene')['total'] == 0
+    version = LIWCAnalyzer.cache_stats()['version']
+    
+    category = Category.query.filter_by(name='positive_emotion').first()
+    db.session.add(Word(text='serene', category_id=category.id))
+    db.session.commit()
+    
+    scores = LIWCAnalyzer.analyze_text('serene')
+    assert scores['categories']['positive_emotion'] == 1
+    
+    stats = LIWCAnalyzer.cache_stats()
+    assert stats['rebuilds'] == 2
+    assert stats['version'] != version
+
+def test_analyze_text_detects_word_moved_between_categories(app, liwc_dictionary):
+    """Test that moving a word to another category invalidates the compiled dictionary"""
+    assert LIWCAnalyzer.analyze_text('happy')['categories']['positive_emotion'] == 1
+    
+    social = Category.query.filter_by(name='social').first()
+    word = Word.query.filter_by(text='happy').first()
+    word.category_id = social.id
+    db.session.commit()
+    
+    scores = LIWCAnalyzer.analyze_text('happy')
+    assert scores['categories']['positive_emotion'] == 0
+    assert scores['categories']['social'] == 1
+
+def test_analyze_text_detects_same_length_rename(app, liwc_dictionary):
+    """Test that renaming a word without changing its length or category is picked up"""
+    assert LIWCAnalyzer.analyze_text('mad')['total'] == 0
+    
+    word = Word.query.filter_by(text='sad').first()
+    word.text = 'mad'
+    db.session.commit()
+    
+    scores = LIWCAnalyzer.analyze_text('mad sad')
+    assert scores['categories']['negative_emotion'] == 1
+
+def test_build_dictionary_file_is_memory_mapped(app, liwc_dictionary, tmp_path):
+    """Test that workers map the prebuilt dictionary file instead of compiling it"""
+    path = str(tmp_path / 'liwc_dictionary.bin')
+    LIWCAnalyzer.build_dictionary_file(path)
+    app.config['LIWC_DICTIONARY_FILE'] = path
+    
+    scores = LIWCAnalyzer.analyze_text('I am happy and joyful, but Sad and ANGRY about my friend.')
+    
+    assert scores['categories']['positive_emotion'] == 1
+    assert scores['categories']['negative_emotion'] == 2
+    assert scores['categories']['social'] == 1
+    
+    stats = LIWCAnalyzer.cache_stats()
+    assert stats['source'] == 'mapped'
+    assert stats['mapped_loads'] == 1
+    assert stats['rebuilds'] == 0
+    assert stats['entries'] == sum(len(set(words)) for words in liwc_dictionary.values())
+
+def test_outdated_dictionary_file_falls_back_to_database(app, liwc_dictionary, tmp_path):
+    """Test that a dictionary file built from older tables is ignored"""
+    path = str(tmp_path / 'liwc_dictionary.bin')
+    LIWCAnalyzer.build_dictionary_file(path)
+    app.config['LIWC_DICTIONARY_FILE'] = path
+    
+    category = Category.query.filter_by(name='positive_emotion').first()
+    db.session.add(Word(text='serene', category_id=category.id))
+    db.session.commit()
+    
+    assert LIWCAnalyzer.analyze_text('serene')['categories']['positive_emotion'] == 1
+    assert LIWCAnalyzer.cache_stats()['source'] == 'database'
+
+def test_analyze_text_matches_stems_and_phrases(app):
+    """Test wildcard stems and multi-word entries from the words table"""
+    positive = Category(name='positive_emotion')
+    social = Category(name='social')
+    db.session.add_all([positive, social])
+    db.session.flush()
+    db.session.add_all([
+        Word(text='happ*', category_id=positive.id),
+        Word(text='thank you', category_id=positive.id),
+        Word(text='co-worker', category_id=social.id),
+    ])
+    db.session.commit()
+    
+    scores = LIWCAnalyzer.analyze_text('Happiness! I thank you, my happy co-worker. Thanks.')
+    
+    assert scores['categories'] == {'positive_emotion': 3, 'social': 1}
+    assert scores['total'] == 4
+
+def test_analyze_many_matches_analyze_text(app, monkeypatch):
+    """Test that bulk analysis, including of texts larger than a chunk, equals per-text analysis"""
+    from app.services import liwc_analyzer
+    positive = Category(name='positive_emotion')
+    social = Category(name='social')
+    db.session.add_all([positive, social])
+    db.session.flush()
+    db.session.add_all([
+        Word(text='happ*', category_id=positive.id),
+        Word(text='thank you', category_id=positive.id),
+        Word(text='you', category_id=social.id),
+    ])
+    db.session.commit()
+    monkeypatch.setattr(liwc_analyzer, 'CHUNK_SIZE', 16)
+    app.config['SCORE_MEMO_SIZE'] = 0
+    texts = ['Thank you, happy friend', 'thank', 'you', '', 'Happiness! Thank you.']
+    
+    assert LIWCAnalyzer.analyze_many(texts) == [LIWCAnalyzer.analyze_text(text) for text in texts]
+
+def test_analyze_text_counts_word_in_every_category(app, liwc_dictionary):
+    """Test that a word listed under two categories counts for both"""
+    positive = Category.query.filter_by(name='positive_emotion').first()
+    db.session.add(Word(text='friend', category_id=positive.id))
+    db.session.commit()
+    
+    scores = LIWCAnalyzer.analyze_text('my friend is happy')
+    
+    assert scores['categories']['social'] == 1
+    assert scores['categories']['positive_emotion'] == 2
+    assert scores['total'] == 3
+
+def test_mapped_matcher_matches_compiled_matcher(app, liwc_dictionary, tmp_path):
+    """Test that the mapped file resolves tokens exactly like the in-memory matcher"""
+    from app.services.dictionary_cache import CompiledDictionary, compile_dictionary
+    from app.services.dictionary_file import MappedMatcher, write_dictionary_file
+    from app.services.liwc_matcher import TrieMatcher
+    
+    compiled = compile_dictionary()
+    entries = [(pattern, index) for pattern, indices in compiled.matcher.items() for index in indices]
+    entries += [('café', 0), ('happ*', 1), ('hap*', 2), ('thank* you', 2), ('friend', 0)]
+    matcher = TrieMatcher(entries)
+    compiled = CompiledDictionary(compiled.categories, matcher, compiled.generation, category_ids=compiled.category_ids)
+    path = str(tmp_path / 'liwc_dictionary.bin')
+    write_dictionary_file(path, compiled)
+    
+    mapped = MappedMatcher(path)
+    try:
+        assert dict(mapped.items()) == dict(matcher.items())
+        assert mapped.category_ids == compiled.category_ids
+        tokens = LIWCAnalyzer.tokenize_text(
+            'Café happy hapless happiness ha thanks you thank you co worker friend notaword'
+        )
+        assert list(mapped.scan(tokens)) == list(matcher.scan(tokens))
+        for token in tokens:
+            assert mapped.lookup(token) == matcher.lookup(token)
+    finally:
+        mapped.close()
+
+def test_build_dictionary_command(app, runner, liwc_dictionary, tmp_path):
+    """Test the build-dictionary CLI command"""
+    path = tmp_path / 'liwc_dictionary.bin'
+    result = runner.invoke(args=['build-dictionary', '--output', str(path)])
+    
+    assert result.exit_code == 0
+    assert path.exists()
+    assert 'Compiled' in result.output
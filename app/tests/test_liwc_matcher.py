@@ -0,0 +1,59 @@
+import pytest
+from app.services.liwc_matcher import TrieMatcher, parse_pattern, format_pattern
+
+def scan(matcher, text):
+    return list(matcher.scan(text.lower().split()))
+
+def test_parse_pattern():
+    """Test splitting dictionary entries into words and stems"""
+    assert parse_pattern('Happ*') == (('happ', True),)
+    assert parse_pattern('thank you') == (('thank', False), ('you', False))
+    assert parse_pattern('co-worker') == (('co', False), ('worker', False))
+    assert format_pattern(parse_pattern('get*  along')) == 'get* along'
+
+def test_exact_entry_wins_over_stem():
+    """Test that exact entries take precedence over matching stems"""
+    matcher = TrieMatcher([('happ*', 0), ('happy', 1)])
+    
+    assert scan(matcher, 'happy happiness happ hap') == [(1,), (0,), (0,)]
+
+def test_longest_stem_wins():
+    """Test that the longest matching stem is used"""
+    matcher = TrieMatcher([('hap*', 0), ('happi*', 1)])
+    
+    assert scan(matcher, 'happiness happen hapless ha') == [(1,), (0,), (0,)]
+
+def test_phrases_are_matched_in_one_pass():
+    """Test multi-word entries, including overlapping and stemmed phrases"""
+    matcher = TrieMatcher([
+        ('thank you', 0),
+        ('you know', 1),
+        ('get* along', 2),
+        ('you', 3),
+    ])
+    
+    assert scan(matcher, 'thank you know') == [(3,), (0,), (1,)]
+    assert scan(matcher, 'getting along fine') == [(2,)]
+    assert scan(matcher, 'thank thank you') == [(3,), (0,)]
+    assert scan(matcher, 'thank me you') == [(3,)]
+
+def test_entry_in_several_categories():
+    """Test that an entry listed under several categories resolves to all of them"""
+    matcher = TrieMatcher([('friend', 2), ('friend', 0), ('Friend', 2), ('pal', 2)])
+    
+    assert scan(matcher, 'friend pal') == [(0, 2), (2,)]
+    assert len(matcher) == 2
+
+def test_matcher_consumes_token_stream():
+    """Test that scan works on a generator of tokens"""
+    matcher = TrieMatcher([('thank you', 0), ('sad', 1)])
+    tokens = (token for token in ['thank', 'you', 'sad'])
+    
+    assert list(matcher.scan(tokens)) == [(0,), (1,)]
+
+def test_items_and_len():
+    """Test that entries round-trip in canonical form"""
+    matcher = TrieMatcher([('Happ*', 0), ('thank  you', 1), ('sad', 2), ('***', 3)])
+    
+    assert dict(matcher.items()) == {'happ*': (0,), 'thank you': (1,), 'sad': (2,)}
+    assert len(matcher) == 3
@@ -0,0 +1,107 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from prometheus_client import REGISTRY
+from app.models.category import Category, Word
+from app.services.dictionary_cache import dictionary_cache
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app import db
+from app.services.score_memo import score_memo
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_request_and_query_metrics(client, test_user):
+    """Test that requests are timed and their database queries counted per endpoint"""
+    before = sample('http_request_duration_seconds_count', endpoint='auth.login', method='POST', status='200')
+    queries = sample('db_queries_per_request_sum', endpoint='auth.login')
+    checks = sample('password_hash_duration_seconds_count', operation='check')
+    
+    response = client.post('/login', data=json.dumps({'username': 'testuser', 'password': 'password'}),
+                           content_type='application/json')
+    assert response.status_code == 200
+    
+    assert sample('http_request_duration_seconds_count', endpoint='auth.login', method='POST', status='200') == before + 1
+    assert sample('db_queries_per_request_sum', endpoint='auth.login') >= queries + 1
+    assert sample('password_hash_duration_seconds_count', operation='check') == checks + 1
+    
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    assert b'http_request_duration_seconds_bucket{endpoint="auth.login"' in response.data
+
+def test_analysis_phase_metrics(client, auth_headers, liwc_dictionary):
+    """Test that analysis is broken down into dictionary load, tokenize and count phases"""
+    phases = ('dictionary_load', 'tokenize', 'count')
+    before = {phase: sample('analyze_phase_duration_seconds_count', phase=phase) for phase in phases}
+    serialized = sample('json_serialization_duration_seconds_count')
+    
+    response = client.post('/journals', data=json.dumps({'text': 'I am happy with my friends'}),
+                           headers=auth_headers, content_type='application/json')
+    assert response.status_code == 201
+    
+    for phase in phases:
+        assert sample('analyze_phase_duration_seconds_count', phase=phase) == before[phase] + 1
+    assert sample('json_serialization_duration_seconds_count') > serialized
+
+def test_dictionary_cache_metrics(app, liwc_dictionary):
+    """Test that dictionary cache lookups, rebuilds and their duration are exported"""
+    app.config['DICTIONARY_BACKGROUND_RELOAD'] = True
+    LIWCAnalyzer.analyze_text('happy')
+    hits = sample('dictionary_cache_lookups_total', result='hit')
+    misses = sample('dictionary_cache_lookups_total', result='miss')
+    rebuilds = sample('dictionary_rebuilds_total', mode='background')
+    timed = sample('dictionary_rebuild_duration_seconds_count')
+    
+    category = Category.query.filter_by(name='positive_emotion').first()
+    db.session.add(Word(text='serene', category_id=category.id))
+    db.session.commit()
+    dictionary_cache.expire()
+    LIWCAnalyzer.analyze_text('happy')
+    dictionary_cache.wait(5)
+    
+    assert sample('dictionary_cache_lookups_total', result='hit') == hits + 1
+    assert sample('dictionary_cache_lookups_total', result='miss') == misses + 1
+    assert sample('dictionary_rebuilds_total', mode='background') == rebuilds + 1
+    assert sample('dictionary_rebuild_duration_seconds_count') == timed + 1
+
+def test_score_memo_metrics(app, liwc_dictionary):
+    """Test that memo hits, database hits, misses and evictions are exported as counters"""
+    app.config['SCORE_MEMO_SIZE'] = 1
+    app.config['SCORE_MEMO_DATABASE'] = True
+    results = ('hit', 'database_hit', 'miss')
+    before = {result: sample('score_memo_lookups_total', result=result) for result in results}
+    evictions = sample('score_memo_evictions_total')
+    
+    for text in ('happy', 'happy', 'sad'):
+        LIWCAnalyzer.analyze_text(text)
+    score_memo.clear()
+    LIWCAnalyzer.analyze_text('happy')
+    
+    assert {result: sample('score_memo_lookups_total', result=result) - before[result] for result in results} == {
+        'hit': 1, 'database_hit': 1, 'miss': 2
+    }
+    assert sample('score_memo_evictions_total') == evictions + 1
+
+def test_metrics_aggregate_across_processes(tmp_path):
+    """Test that /metrics sums the requests served by every worker process"""
+    script = textwrap.dedent('''
+        import os
+        from app import create_app
+        
+        app = create_app()
+        pid = os.fork()
+        app.test_client().get('/swagger-missing')
+        if pid == 0:
+            os._exit(0)
+        os.waitpid(pid, 0)
+        print(app.test_client().get('/metrics').get_data(as_text=True))
+    ''')
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), DATABASE_URL='sqlite:///:memory:')
+    result = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    
+    assert result.returncode == 0, result.stderr
+    assert 'http_request_duration_seconds_count{endpoint="unmatched",method="GET",status="404"} 2.0' in result.stdout
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from app.services.migrations import run_migrations, migration_status, discover
+from app import db
+
+LEGACY_SCHEMA = [
+    'CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(80) NOT NULL UNIQUE, '
+    'password_hash VARCHAR(128) NOT NULL, created_at DATETIME)',
+    'CREATE TABLE journals (id INTEGER PRIMARY KEY, text TEXT NOT NULL, '
+    'user_id INTEGER NOT NULL REFERENCES users (id), created_at DATETIME, scores TEXT)',
+    'CREATE TABLE categories (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL UNIQUE)',
+    'CREATE TABLE words (id INTEGER PRIMARY KEY, text VARCHAR(50) NOT NULL, '
+    'category_id INTEGER NOT NULL REFERENCES categories (id))'
+]
+
+def index_names(table):
+    return {index['name'] for index in inspect(db.engine).get_indexes(table)}
+
+def test_migrations_upgrade_legacy_schema(app):
+    """Test that migrations bring a database created before them up to date"""
+    db.session.remove()
+    db.drop_all()
+    with db.engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO users (id, username, password_hash) VALUES (1, 'legacy', 'x')"))
+        connection.execute(text("INSERT INTO journals (id, text, user_id, scores) VALUES (1, 'Old entry', 1, '{}')"))
+        connection.execute(text("INSERT INTO categories (id, name) VALUES (1, 'social')"))
+        connection.execute(text("INSERT INTO words (id, text, category_id) VALUES (1, 'friend', 1), (2, 'friend', 1), (3, 'team', 1)"))
+    
+    applied = run_migrations(report=lambda message: None)
+    
+    assert applied == [version for version, _ in discover()]
+    columns = {column['name'] for column in inspect(db.engine).get_columns('journals')}
+    assert {'score_status', 'dictionary_version', 'word_count', 'revision'} <= columns
+    assert {'journal_scores', 'user_daily_rollups', 'score_memo'} <= set(inspect(db.engine).get_table_names())
+    assert {'ix_journals_user_created', 'ix_journals_pending'} <= index_names('journals')
+    assert 'uq_words_text_category' in index_names('words')
+    
+    with db.engine.connect() as connection:
+        assert connection.execute(text('SELECT score_status, revision FROM journals')).one() == ('done', 1)
+        assert connection.execute(text('SELECT id FROM words ORDER BY id')).scalars().all() == [1, 3]
+        assert connection.execute(text('SELECT is_admin FROM users')).scalar() in (False, 0)
+        assert connection.execute(text('SELECT generation FROM dictionary_generation')).scalar() == 0
+        assert connection.execute(text('SELECT created_at FROM journals')).scalar() is not None
+    with pytest.raises(IntegrityError, match='created_at'):
+        with db.engine.begin() as connection:
+            connection.execute(text("INSERT INTO journals (text, user_id) VALUES ('No date', 1)"))
+    
+    assert run_migrations(report=lambda message: None) == []
+    assert all(applied for _, _, applied in migration_status())
+
+def test_migrations_on_current_schema(app):
+    """Test that migrations are no-ops on tables created from the models"""
+    applied = run_migrations(report=lambda message: None)
+    
+    assert len(applied) == len(discover())
+    assert 'ix_journals_user_created' in index_names('journals')
+
+def test_migrate_command(app):
+    """Test the migrate CLI command"""
+    runner = app.test_cli_runner()
+    
+    assert 'Applied 6 migration(s)' in runner.invoke(args=['migrate']).output
+    assert '[x] 0006_journal_created_at_not_null' in runner.invoke(args=['migrate', '--status']).output
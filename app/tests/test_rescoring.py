@@ -0,0 +1,83 @@
+import json
+import multiprocessing
+import pytest
+from app.models.journal import Journal
+from app.models.category import Category, Word
+from app.models.user import User
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app.services.rescoring import rescore_journals, _init_worker, _snapshot_args
+from app.services.score_memo import score_memo
+from app import db
+
+@pytest.fixture
+def stale_journals(app, liwc_dictionary, test_user):
+    """Create journals scored with an outdated dictionary."""
+    user = User.query.filter_by(username='testuser').first()
+    journals = []
+    for index in range(7):
+        journal = Journal(text=f'Entry {index}: I am happy and serene.', user_id=user.id)
+        journal.set_scores({'categories': {}, 'total': 0}, 'outdated')
+        journals.append(journal)
+    pending = Journal(text='pending and happy', user_id=user.id, score_status=Journal.SCORE_PENDING)
+    db.session.add_all(journals + [pending])
+    
+    category = Category.query.filter_by(name='positive_emotion').first()
+    db.session.add(Word(text='serene', category_id=category.id))
+    db.session.commit()
+    return journals
+
+def test_rescore_journals_in_process(app, stale_journals):
+    """Test rescoring stale journals in chunks without a process pool"""
+    processed = rescore_journals(chunk_size=3, workers=1, commit_every=1, report=lambda message: None)
+    
+    assert processed == 7
+    version = LIWCAnalyzer.snapshot().version
+    db.session.expire_all()
+    for journal in Journal.query.filter(Journal.score_status == Journal.SCORE_DONE):
+        assert journal.dictionary_version == version
+        assert journal.get_scores()['categories']['positive_emotion'] == 2
+    assert Journal.query.filter_by(score_status=Journal.SCORE_PENDING).count() == 1
+    
+    assert rescore_journals(workers=1, report=lambda message: None) == 0
+
+def test_rescore_journals_with_pool_and_checkpoint(app, stale_journals, tmp_path):
+    """Test rescoring with a process pool and resuming from a checkpoint"""
+    checkpoint = tmp_path / 'rescore.json'
+    version = LIWCAnalyzer.snapshot().version
+    checkpoint.write_text(json.dumps({'version': version, 'last_id': stale_journals[3].id, 'processed': 4}))
+    
+    processed = rescore_journals(
+        chunk_size=2,
+        workers=2,
+        checkpoint=str(checkpoint),
+        report=lambda message: None
+    )
+    
+    assert processed == 3
+    assert json.loads(checkpoint.read_text())['last_id'] == stale_journals[-1].id
+    db.session.expire_all()
+    rescored = [db.session.get(Journal, journal.id) for journal in stale_journals]
+    assert [journal.dictionary_version == version for journal in rescored] == [False] * 4 + [True] * 3
+
+def memo_uses_database():
+    return score_memo._settings()[1]
+
+def test_pool_workers_keep_off_the_score_memo_table(app, stale_journals):
+    """Test that forked workers do not use the parent's connections for the memo table"""
+    app.config['SCORE_MEMO_DATABASE'] = True
+    compiled = LIWCAnalyzer.snapshot()
+    
+    with multiprocessing.Pool(1, initializer=_init_worker, initargs=_snapshot_args(compiled)) as pool:
+        assert pool.apply(memo_uses_database) is False
+    assert memo_uses_database() is True
+    
+    assert rescore_journals(chunk_size=2, workers=2, report=lambda message: None) == len(stale_journals)
+    db.session.expire_all()
+    assert all(db.session.get(Journal, journal.id).dictionary_version == compiled.version for journal in stale_journals)
+
+def test_rescore_journals_command(app, runner, stale_journals):
+    """Test the rescore-journals CLI command"""
+    result = runner.invoke(args=['rescore-journals', '--workers', '1', '--all'])
+    
+    assert result.exit_code == 0
+    assert 'Done: rescored 7 journals' in result.output
@@ -0,0 +1,106 @@
+from datetime import datetime
+from sqlalchemy import select
+from app.models.journal import Journal
+from app.models.rollup import DailyRollup, DailyCategoryRollup
+from app.models.user import User
+from app.services.journal_scoring import score_journals, write_rescored, refresh_stale_scores
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app.services.rescoring import rescore_journals
+from app.services.rollups import rebuild_rollups
+from app import db
+
+def rollup_state():
+    days = db.session.execute(
+        select(DailyRollup.user_id, DailyRollup.day, DailyRollup.entries, DailyRollup.words)
+    ).all()
+    categories = db.session.execute(
+        select(DailyCategoryRollup.user_id, DailyCategoryRollup.day, DailyCategoryRollup.category_id, DailyCategoryRollup.count)
+        .where(DailyCategoryRollup.count != 0)
+    ).all()
+    return sorted(days), sorted(categories)
+
+def test_incremental_rollups_match_rebuild(app, liwc_dictionary, test_user):
+    """Test that incrementally maintained rollups equal a full recomputation"""
+    user = User.query.filter_by(username='testuser').first()
+    journals = [
+        Journal(text='I am happy with my friend.', user_id=user.id, created_at=datetime(2024, 3, 1, 9)),
+        Journal(text='Sad and happy.', user_id=user.id, created_at=datetime(2024, 3, 1, 23)),
+        Journal(text='I think so.', user_id=user.id, created_at=datetime(2024, 3, 2, 0, 30))
+    ]
+    score_journals(journals)
+    db.session.commit()
+    
+    journals[1].set_scores({'categories': {}, 'total': 0, 'word_count': 3}, 'outdated')
+    db.session.commit()
+    rescore_journals(workers=1, report=lambda message: None)
+    
+    incremental = rollup_state()
+    assert [(day.isoformat(), entries, words) for _, day, entries, words in incremental[0]] == [
+        ('2024-03-01', 2, 9),
+        ('2024-03-02', 1, 3)
+    ]
+    
+    rebuild_rollups()
+    db.session.commit()
+    assert rollup_state() == incremental
+
+def test_rebuild_rollups_command(app, liwc_dictionary, test_user):
+    """Test backfilling rollups of journals scored before they existed"""
+    user = User.query.filter_by(username='testuser').first()
+    score_journals([Journal(text='Happy happy.', user_id=user.id)])
+    db.session.commit()
+    db.session.execute(DailyRollup.__table__.delete())
+    db.session.commit()
+    
+    result = app.test_cli_runner().invoke(args=['rebuild-rollups', '--user-id', str(user.id)])
+    
+    assert 'Rebuilt 1 daily rollups' in result.output
+    rollup = DailyRollup.query.one()
+    assert (rollup.entries, rollup.words) == (1, 2)
+
+def test_rescoring_same_stale_journals_twice(app, liwc_dictionary, test_user):
+    """Test that a stale set rescored a second time, as by a concurrent request, leaves the rollups alone"""
+    user = User.query.filter_by(username='testuser').first()
+    journals = [
+        Journal(text='I am happy with my friend.', user_id=user.id, created_at=datetime(2024, 3, 1, 9)),
+        Journal(text='Sad and happy.', user_id=user.id, created_at=datetime(2024, 3, 1, 23))
+    ]
+    score_journals(journals)
+    db.session.commit()
+    for journal in journals:
+        journal.dictionary_version = 'outdated'
+    db.session.commit()
+
+    compiled = LIWCAnalyzer.snapshot()
+    scored = list(zip([journal.id for journal in journals], LIWCAnalyzer.score_many([journal.text for journal in journals], compiled)))
+    assert write_rescored(scored, compiled) == {journal.id for journal in journals}
+    db.session.commit()
+    rescored = rollup_state()
+    revisions = [journal.revision for journal in journals]
+
+    assert write_rescored(scored, compiled) == set()
+    db.session.commit()
+    assert rollup_state() == rescored
+    assert [journal.revision for journal in journals] == revisions
+
+    rebuild_rollups()
+    db.session.commit()
+    assert rollup_state() == rescored
+
+def test_refresh_skips_journals_rescored_concurrently(app, liwc_dictionary, test_user):
+    """Test that stale copies read before another request rescored them are not applied again"""
+    user = User.query.filter_by(username='testuser').first()
+    journal = Journal(text='Happy happy friend.', user_id=user.id)
+    score_journals([journal])
+    db.session.commit()
+    journal.dictionary_version = 'outdated'
+    db.session.commit()
+
+    copy = Journal(id=journal.id, text=journal.text, user_id=user.id, created_at=journal.created_at,
+                   score_status=journal.score_status, dictionary_version='outdated')
+    assert refresh_stale_scores([journal]) == 1
+    rescored = rollup_state()
+
+    assert refresh_stale_scores([copy]) == 0
+    assert rollup_state() == rescored
+    assert rollup_state()[0][0][2:] == (1, 3)
@@ -0,0 +1,83 @@
+from app.models.category import Category, Word
+from app.models.score_memo import StoredScore
+from app.services.liwc_analyzer import LIWCAnalyzer
+from app.services.score_memo import score_memo, text_hash
+from app import db
+
+def test_text_hash_normalizes():
+    """Test that case and whitespace differences hash alike"""
+    assert text_hash('I am  Happy\n') == text_hash('i am happy')
+    assert text_hash('I am happy') != text_hash('I am happy!')
+
+def test_identical_texts_are_scored_once(app, liwc_dictionary):
+    """Test that repeated texts are served from the memo"""
+    first = LIWCAnalyzer.analyze_text('I am happy with my friend.')
+    first['categories']['positive_emotion'] = 100
+    second = LIWCAnalyzer.analyze_text('i am HAPPY   with my friend.')
+    
+    assert second['categories']['positive_emotion'] == 1
+    stats = score_memo.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+    assert stats['hit_ratio'] == 0.5
+
+def test_batch_scores_only_missing_texts(app, liwc_dictionary):
+    """Test that a batch is scored in one call for the texts not in the memo, each once"""
+    LIWCAnalyzer.analyze_text('happy')
+    batches = []
+    
+    def score_many(texts):
+        batches.append(texts)
+        return [LIWCAnalyzer.analyze_text(text) for text in texts]
+    
+    compiled = LIWCAnalyzer.snapshot()
+    results = score_memo.get_or_score_many(['HAPPY', 'sad', 'friend', 'Sad'], compiled.version, score_many)
+    
+    assert batches == [['sad', 'friend']]
+    assert [result['total'] for result in results] == [1, 1, 1, 1]
+    results[1]['total'] = 100
+    assert results[3]['total'] == 1
+
+def test_dictionary_change_misses(app, liwc_dictionary):
+    """Test that memoized scores are keyed by dictionary version"""
+    assert LIWCAnalyzer.analyze_text('serene')['total'] == 0
+    
+    category = Category.query.filter_by(name='positive_emotion').first()
+    db.session.add(Word(text='serene', category_id=category.id))
+    db.session.commit()
+    
+    assert LIWCAnalyzer.analyze_text('serene')['total'] == 1
+    assert score_memo.stats()['misses'] == 2
+
+def test_memo_evicts_least_recently_used(app, liwc_dictionary):
+    """Test the size cap of the in-process memo"""
+    app.config['SCORE_MEMO_SIZE'] = 2
+    for text in ('one', 'two', 'one', 'three', 'one', 'two'):
+        LIWCAnalyzer.analyze_text(text)
+    
+    stats = score_memo.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['size']) == (2, 4, 2, 2)
+
+def test_memo_disabled(app, liwc_dictionary):
+    """Test that a size of zero turns memoization off"""
+    app.config['SCORE_MEMO_SIZE'] = 0
+    LIWCAnalyzer.analyze_text('happy')
+    LIWCAnalyzer.analyze_text('happy')
+    
+    assert score_memo.stats()['misses'] == 0
+
+def test_database_tier(app, liwc_dictionary):
+    """Test that scores are shared through the score_memo table"""
+    app.config['SCORE_MEMO_DATABASE'] = True
+    scores = LIWCAnalyzer.analyze_text('So happy today.')
+    db.session.commit()
+    assert StoredScore.query.count() == 1
+    
+    score_memo.clear()
+    assert LIWCAnalyzer.analyze_text('so happy today.') == scores
+    assert score_memo.stats()['database_hits'] == 1
+    
+    db.session.add(StoredScore(text_hash='0' * 64, dictionary_version='outdated', scores='{}'))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['prune-score-memo'])
+    assert 'Deleted 1 memoized scores' in result.output
+    assert StoredScore.query.count() == 1
@@ -22,3 +22,13 @@ def test_swagger_ui_endpoint(client):
     
     assert response.status_code == 200
     assert b'swagger-ui' in response.data
+
+def test_swagger_json_conditional(client):
+    """Test that the spec is revalidated by its ETag."""
+    response = client.get('/api/swagger.json')
+    etag = response.headers['ETag']
+    
+    response = client.get('/api/swagger.json', headers={'If-None-Match': etag})
+    
+    assert response.status_code == 304
+    assert response.data == b''
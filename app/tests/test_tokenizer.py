@@ -0,0 +1,70 @@
+import io
+import re
+import pytest
+from app.services.tokenizer import CHUNK_SIZE, TokenStream, BodyDecodeError, read_text, text_chunks, whitespace_segments
+from app.services.score_memo import text_hash
+
+TEXT = "Ὀδυσσεύς wrote: I'm HAPPY, co-worker's ΟΔΟΣ  naïve\tstraße\n  thank you!"
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 8, 64])
+def test_token_stream_matches_whole_text(size):
+    """Test that tokens split across chunk boundaries come out whole and lowercased"""
+    tokens = TokenStream(text_chunks(TEXT, size))
+    
+    assert list(tokens) == re.findall(r'\b\w+\b', TEXT.lower())
+    assert tokens.count == len(re.findall(r'\w+', TEXT))
+    assert ''.join(whitespace_segments(text_chunks(TEXT, size))) == TEXT
+
+def test_whitespace_segments_carry_long_runs():
+    """Test that a run without whitespace longer than a chunk stays in one segment"""
+    text = 'a' * 50 + ' ' + 'b' * 30
+    
+    assert list(whitespace_segments(text_chunks(text, 8))) == ['a' * 50 + ' ', 'b' * 30]
+
+@pytest.mark.parametrize('text', [
+    '我今天很开心，因为朋友来了。' * 20,
+    '{"mood":"HAPPY","note":"ΟΔΟΣ.ΟΔΟΣ\'S"}' * 20,
+])
+def test_whitespace_segments_cut_long_runs(text):
+    """Test that a long run without whitespace is cut at punctuation, keeping tokens and case"""
+    segments = list(whitespace_segments(text_chunks(text, 8), limit=16))
+    
+    assert ''.join(segments) == text
+    assert max(map(len, segments)) <= 16 + 8
+    tokens = [token for segment in segments for token in re.findall(r'\w+', segment.lower())]
+    assert tokens == re.findall(r'\w+', text.lower())
+
+def test_whitespace_segments_cut_at_case_ignorable_separators():
+    """Test that a run whose only separators are periods is cut after one rather than mid-word"""
+    text = 'word.' * 50000
+    segments = list(whitespace_segments(text_chunks(text)))
+    
+    assert ''.join(segments) == text
+    assert len(segments) > 1
+    assert all(segment.endswith('.') for segment in segments)
+    assert max(map(len, segments)) <= 2 * CHUNK_SIZE
+
+def test_whitespace_segments_split_overlong_token():
+    """Test that a single token longer than the limit is split rather than held whole"""
+    segments = list(whitespace_segments(text_chunks('a' * 100, 8), limit=16))
+    
+    assert ''.join(segments) == 'a' * 100
+    assert max(map(len, segments)) <= 16 + 8
+
+def test_read_text_decodes_split_characters():
+    """Test that multi-byte characters cut by a chunk boundary are decoded once complete"""
+    body = TEXT.encode('utf-8')
+    
+    assert read_text(io.BytesIO(body), size=3) == TEXT
+    assert read_text(io.BytesIO(TEXT.encode('utf-16')), 'utf-16', size=5) == TEXT
+    with pytest.raises(BodyDecodeError):
+        read_text(io.BytesIO(b'caf\xe9'), size=2)
+    with pytest.raises(BodyDecodeError):
+        read_text(io.BytesIO(body), 'no-such-charset')
+
+def test_text_hash_is_chunk_independent():
+    """Test that the streamed memo hash equals the hash of the normalized text"""
+    long_text = (TEXT + ' ') * 5000
+    
+    assert text_hash(long_text) == text_hash(' '.join(long_text.lower().split()))
+    assert text_hash('  ') == text_hash('')
@@ -1,9 +1,110 @@
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, current_app, g
+from sqlalchemy import event, select
 from app.models.user import User
+from app.utils.db_routing import db_target, replica_enabled, REPLICA_BIND, PRIMARY
 from app import db
+import threading
+import time
 import jwt
 
+class Principal:
+    """
+    Authenticated user passed to protected routes: the user fields they need,
+    detached from any database session
+    """
+    __slots__ = ('id', 'username')
+    
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+    
+    def __repr__(self):
+        return f'<Principal {self.id}>'
+
+class PrincipalCache:
+    """
+    Short-lived cache of principals keyed by the token subject.
+    
+    Entries expire after AUTH_PRINCIPAL_TTL seconds and are dropped as soon as
+    the user is updated or deleted in this process; other processes see such a
+    change once their entry expires. Every invalidation bumps a generation
+    counter, so a lookup that raced with one does not store what it read.
+    """
+    
+    max_size = 10000
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = 0
+    
+    def get(self, user_id, ttl):
+        """Return the principal of user_id, or None if the user does not exist"""
+        if ttl <= 0:
+            return self._load(user_id)
+        
+        entry = self._entries.get(user_id)
+        now = time.monotonic()
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        
+        generation = self._generation
+        principal = self._load(user_id)
+        if principal is not None:
+            with self._lock:
+                if generation == self._generation:
+                    if len(self._entries) >= self.max_size:
+                        self._entries.clear()
+                    self._entries[user_id] = (principal, now + ttl)
+        return principal
+    
+    @staticmethod
+    def _load(user_id):
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        return Principal(user.id, user.username)
+    
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(user_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+principal_cache = PrincipalCache()
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.id)
+
+def load_principal(claims):
+    """
+    Resolve the principal of decoded token claims.
+    
+    With AUTH_TOKEN_CLAIMS enabled, tokens that carry the user fields are
+    trusted as is and no lookup happens; such a token stays usable after its
+    user is deleted, until it expires. Other tokens go through the principal cache,
+    which reads from the replica when one is configured and falls back to the
+    primary for users the replica does not have yet.
+    """
+    config = current_app.config
+    g.principal_id = claims['sub']
+    if config['AUTH_TOKEN_CLAIMS'] and 'username' in claims:
+        return Principal(claims['sub'], claims['username'])
+    
+    with db_target(REPLICA_BIND):
+        principal = principal_cache.get(claims['sub'], config['AUTH_PRINCIPAL_TTL'])
+    if principal is None and replica_enabled():
+        with db_target(PRIMARY):
+            principal = principal_cache.get(claims['sub'], config['AUTH_PRINCIPAL_TTL'])
+    return principal
+
 def token_required(f):
     """Decorator to protect routes with JWT authentication"""
     @wraps(f)
@@ -27,15 +128,15 @@ def token_required(f):
             }), 401
         
         try:
-            user_id = User.decode_token(token)
+            claims = User.decode_token_claims(token)
             
-            if isinstance(user_id, str):
+            if isinstance(claims, str):
                 return jsonify({
                     'status': 'error',
-                    'message': user_id
+                    'message': claims
                 }), 401
                 
-            current_user = db.session.get(User, user_id)
+            current_user = load_principal(claims)
             
             if not current_user:
                 return jsonify({
@@ -52,3 +153,25 @@ def token_required(f):
         return f(current_user, *args, **kwargs)
     
     return decorated
+
+def admin_required(f):
+    """
+    Decorator to protect routes with JWT authentication, for administrators only.
+    The is_admin flag is read from the primary on every request, so granting or
+    revoking it takes effect immediately.
+    """
+    @token_required
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        with db_target(PRIMARY):
+            is_admin = db.session.execute(
+                select(User.is_admin).where(User.id == current_user.id)
+            ).scalar()
+        if not is_admin:
+            return jsonify({
+                'status': 'error',
+                'message': 'Administrator access required'
+            }), 403
+        return f(current_user, *args, **kwargs)
+    
+    return decorated
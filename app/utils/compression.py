@@ -0,0 +1,64 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson')
+
+def choose_encoding(accept_encodings):
+    """
+    Pick the best encoding the client accepts: brotli when the library is
+    installed, else gzip; None if it accepts neither
+    """
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best = None
+    best_quality = 0
+    for encoding in candidates:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def init_compression(app):
+    """
+    Compress JSON responses of at least COMPRESSION_MIN_SIZE bytes with the
+    encoding negotiated from Accept-Encoding.
+
+    Smaller bodies are sent as is, since compressing them costs more CPU than
+    it saves on the wire. Streamed responses are left alone. A strong ETag gets
+    the encoding appended, since the encoded body is a different representation.
+    """
+    @app.after_request
+    def compress_response(response):
+        min_size = app.config['COMPRESSION_MIN_SIZE']
+        if (min_size <= 0
+                or response.status_code < 200 or response.status_code == 204
+                or response.direct_passthrough or response.is_streamed
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'Content-Encoding' in response.headers):
+            return response
+        
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        
+        level = app.config['BROTLI_QUALITY'] if encoding == 'br' else app.config['GZIP_LEVEL']
+        response.set_data(compress(data, encoding, level))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f'{etag}-{encoding}')
+        return response
@@ -0,0 +1,30 @@
+import hashlib
+from flask import request, current_app
+
+# suffixes the compression hook appends to the ETag of an encoded body
+ENCODING_SUFFIXES = ('', '-gzip', '-br')
+
+def make_etag(*parts):
+    """Strong ETag value derived from the given values"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:24]
+
+def matching_etag(etag):
+    """
+    Return the tag of If-None-Match that matches etag in any content encoding,
+    or None
+    """
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    for suffix in ENCODING_SUFFIXES:
+        if if_none_match.contains(etag + suffix):
+            return etag + suffix
+    if if_none_match.star_tag:
+        return etag
+    return None
+
+def not_modified(etag):
+    """Empty 304 response carrying the matched ETag"""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
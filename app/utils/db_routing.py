@@ -0,0 +1,134 @@
+from contextlib import contextmanager
+from functools import wraps
+import math
+import time
+from flask import g, request, current_app, has_request_context
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+PRIMARY = 'primary'
+STICKY_COOKIE = 'primary_until'
+
+class StickyPrimary:
+    """
+    Users who wrote recently, whose reads stay on the primary until the replica
+    has caught up.
+
+    Kept per process: a client that does not send back the sticky cookie is
+    only covered while its requests reach the worker that served its write.
+    """
+
+    max_size = 10000
+
+    def __init__(self):
+        self._until = {}
+
+    def stick(self, user_id, seconds):
+        if len(self._until) >= self.max_size:
+            self._until.clear()
+        self._until[user_id] = time.time() + seconds
+
+    def is_sticky(self, user_id):
+        until = self._until.get(user_id)
+        return until is not None and until > time.time()
+
+    def clear(self):
+        self._until.clear()
+
+sticky_primary = StickyPrimary()
+
+class RoutingSession(Session):
+    """
+    Session that sends reads of replica-enabled requests to the replica bind.
+
+    A statement goes to the replica only when:
+    - a replica bind is configured
+    - the request is marked with read_replica or runs inside db_target(REPLICA_BIND)
+    - the request has not written anything yet, so it reads its own writes
+    - its user is not sticky after a recent write (per process, or through the
+      primary_until cookie)
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary and pin the
+    rest of the request to it.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or getattr(clause, 'is_dml', False):
+                pin_primary()
+            elif _replica_allowed():
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def _replica_allowed():
+    if g.get('db_target') != REPLICA_BIND or g.get('db_wrote'):
+        return False
+
+    user_id = g.get('principal_id')
+    if user_id is not None and sticky_primary.is_sticky(user_id):
+        return False
+
+    until = request.cookies.get(STICKY_COOKIE)
+    if until:
+        try:
+            return float(until) <= time.time()
+        except ValueError:
+            pass
+    return True
+
+def replica_enabled():
+    return REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {})
+
+def pin_primary():
+    """Send every remaining statement of the current request to the primary"""
+    if has_request_context():
+        g.db_wrote = True
+
+@contextmanager
+def db_target(target):
+    """Route the reads inside the block to REPLICA_BIND or PRIMARY"""
+    previous = g.get('db_target')
+    g.db_target = target
+    try:
+        yield
+    finally:
+        g.db_target = previous
+
+def read_replica(f):
+    """Decorator letting a read-only route read from the replica"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.db_target = REPLICA_BIND
+        return f(*args, **kwargs)
+
+    return decorated
+
+def init_db_routing(app):
+    """
+    Make the users of requests that wrote to the primary sticky to it for
+    REPLICA_STICKY_SECONDS, in this process and through a cookie
+    """
+    @app.before_request
+    def reset_routing():
+        # g outlives the request when the app context was pushed beforehand
+        for name in ('db_target', 'db_wrote', 'principal_id'):
+            g.pop(name, None)
+
+    @app.after_request
+    def remember_write(response):
+        seconds = app.config['REPLICA_STICKY_SECONDS']
+        if not g.get('db_wrote') or seconds <= 0 or not replica_enabled():
+            return response
+
+        user_id = g.get('principal_id')
+        if user_id is not None:
+            sticky_primary.stick(user_id, seconds)
+        response.set_cookie(
+            STICKY_COOKIE,
+            f'{time.time() + seconds:.3f}',
+            max_age=math.ceil(seconds),
+            httponly=True,
+            samesite='Lax'
+        )
+        return response
@@ -0,0 +1,77 @@
+import json
+import re
+import secrets
+from flask.json.provider import DefaultJSONProvider
+from app.utils.metrics import JSON_SECONDS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class RawJSON:
+    """
+    Already serialized JSON text, such as a stored scores column, to be spliced
+    into a response as is instead of being decoded and encoded again
+    """
+    __slots__ = ('text',)
+    
+    def __init__(self, text):
+        self.text = text
+    
+    def __repr__(self):
+        return f'<RawJSON {self.text[:40]!r}>'
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that serializes with orjson when it is installed and with the
+    standard library otherwise, or when JSON_BACKEND is set to 'json'.
+    
+    RawJSON values are written out verbatim: while the document is serialized
+    each one is replaced by a placeholder string that embeds a random nonce,
+    and the quoted placeholders are then substituted with the raw text in a
+    single pass over the output.
+    """
+    
+    def __init__(self, app):
+        super().__init__(app)
+        backend = app.config.get('JSON_BACKEND', 'auto')
+        self.backend = 'orjson' if orjson is not None and backend in ('auto', 'orjson') else 'json'
+    
+    def dumps(self, obj, **kwargs):
+        with JSON_SECONDS.time():
+            return self._dumps(obj, **kwargs)
+    
+    def _dumps(self, obj, **kwargs):
+        raw = []
+        nonce = None
+        
+        def default(value):
+            nonlocal nonce
+            if isinstance(value, RawJSON):
+                if nonce is None:
+                    nonce = secrets.token_hex(8)
+                raw.append(value.text)
+                return f'rawjson-{nonce}-{len(raw) - 1}'
+            return self.default(value)
+        
+        if self.backend == 'orjson':
+            option = orjson.OPT_NON_STR_KEYS
+            if kwargs.get('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            text = orjson.dumps(obj, default=default, option=option).decode('utf-8')
+        else:
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            text = json.dumps(obj, default=default, **kwargs)
+        
+        if raw:
+            text = re.sub(f'"rawjson-{nonce}-(\\d+)"', lambda match: raw[int(match.group(1))], text)
+        return text
+    
+    def loads(self, s, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
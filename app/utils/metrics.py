@@ -0,0 +1,121 @@
+import time
+from flask import g, request, has_request_context
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Buckets for operations that usually take well under a millisecond
+FINE_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, float('inf')
+)
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    'Request latency by endpoint',
+    ['endpoint', 'method', 'status']
+)
+DB_QUERIES = Histogram(
+    'db_queries_per_request',
+    'Database queries issued by a request',
+    ['endpoint'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, float('inf'))
+)
+DB_SECONDS = Histogram(
+    'db_query_duration_seconds_per_request',
+    'Time a request spent executing database queries',
+    ['endpoint'],
+    buckets=FINE_BUCKETS
+)
+ANALYZE_PHASE_SECONDS = Histogram(
+    'analyze_phase_duration_seconds',
+    'Time spent in each phase of text analysis',
+    ['phase'],
+    buckets=FINE_BUCKETS
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    'password_hash_duration_seconds',
+    'Time spent in bcrypt, excluding the wait for a hashing thread',
+    ['operation'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf'))
+)
+JSON_SECONDS = Histogram(
+    'json_serialization_duration_seconds',
+    'Time spent serializing JSON documents',
+    buckets=FINE_BUCKETS
+)
+
+DICTIONARY_CACHE_LOOKUPS = Counter(
+    'dictionary_cache_lookups',
+    'Compiled dictionary lookups, by whether they had to load or compile it',
+    ['result']
+)
+DICTIONARY_REBUILDS = Counter(
+    'dictionary_rebuilds',
+    'Compiled dictionary rebuilds, by whether they ran in a request or a background thread',
+    ['mode']
+)
+DICTIONARY_MAPPED_LOADS = Counter(
+    'dictionary_mapped_loads',
+    'Compiled dictionaries loaded from the memory-mapped file instead of compiled'
+)
+DICTIONARY_REBUILD_SECONDS = Histogram(
+    'dictionary_rebuild_duration_seconds',
+    'Time spent compiling the dictionary tables',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'))
+)
+SCORE_MEMO_LOOKUPS = Counter(
+    'score_memo_lookups',
+    'Analysis memo lookups by where the scores came from',
+    ['result']
+)
+SCORE_MEMO_EVICTIONS = Counter(
+    'score_memo_evictions',
+    'Entries evicted from the in-process analysis memo'
+)
+
+DICTIONARY_LOAD_SECONDS = ANALYZE_PHASE_SECONDS.labels(phase='dictionary_load')
+TOKENIZE_SECONDS = ANALYZE_PHASE_SECONDS.labels(phase='tokenize')
+COUNT_SECONDS = ANALYZE_PHASE_SECONDS.labels(phase='count')
+HASH_SECONDS = PASSWORD_HASH_SECONDS.labels(operation='hash')
+CHECK_SECONDS = PASSWORD_HASH_SECONDS.labels(operation='check')
+DICTIONARY_HITS = DICTIONARY_CACHE_LOOKUPS.labels(result='hit')
+DICTIONARY_MISSES = DICTIONARY_CACHE_LOOKUPS.labels(result='miss')
+MEMO_HITS = SCORE_MEMO_LOOKUPS.labels(result='hit')
+MEMO_DATABASE_HITS = SCORE_MEMO_LOOKUPS.labels(result='database_hit')
+MEMO_MISSES = SCORE_MEMO_LOOKUPS.labels(result='miss')
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_request_context() and 'request_started' in g:
+        context._metrics_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_metrics_started', None)
+    if started is not None and has_request_context():
+        g.db_queries += 1
+        g.db_seconds += time.perf_counter() - started
+
+def init_metrics(app):
+    """
+    Record the latency of every request and the number and total duration of
+    the database queries it issued, labelled by endpoint
+    """
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.db_queries = 0
+        g.db_seconds = 0.0
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_SECONDS.labels(endpoint, request.method, response.status_code).observe(time.perf_counter() - started)
+        DB_QUERIES.labels(endpoint).observe(g.db_queries)
+        DB_SECONDS.labels(endpoint).observe(g.db_seconds)
+        return response
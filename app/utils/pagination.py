@@ -0,0 +1,32 @@
+import base64
+import json
+from datetime import datetime
+
+def encode_cursor(created_at, journal_id):
+    """Encode the (created_at, id) keyset position of a row as an opaque cursor"""
+    payload = json.dumps([created_at.isoformat(), journal_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, journal_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(journal_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+def parse_limit(value, default, maximum):
+    """
+    Parse a page size query parameter, clamped to maximum.
+    Raises ValueError if it is not a positive integer.
+    """
+    if value is None:
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, maximum)
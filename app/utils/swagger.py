@@ -1,9 +1,11 @@
 from apispec import APISpec
 from apispec.ext.marshmallow import MarshmallowPlugin
 from apispec_webframeworks.flask import FlaskPlugin
-from flask import Flask, jsonify, render_template, Blueprint
+from flask import Flask, jsonify, render_template, Blueprint, Response
 from flask_swagger_ui import get_swaggerui_blueprint
 import json
+import os
+from app.utils.conditional import make_etag, matching_etag, not_modified
 
 def create_swagger_spec(app):
     """Create an APISpec object with the Flask app"""
@@ -28,25 +30,46 @@ def create_swagger_spec(app):
     with app.test_request_context():
         # Health endpoint
         spec.path(view=app.view_functions['health.health_check'])
+        if 'metrics.get_metrics' in app.view_functions:
+            spec.path(view=app.view_functions['metrics.get_metrics'])
         # Auth endpoints
         spec.path(view=app.view_functions['auth.register_user'])
         spec.path(view=app.view_functions['auth.login'])
         # Journal endpoints
         spec.path(view=app.view_functions['journal.create_journal'])
+        spec.path(view=app.view_functions['journal.create_journals_batch'])
+        spec.path(view=app.view_functions['journal.get_journal_stats'])
         spec.path(view=app.view_functions['journal.get_journal_score'])
         spec.path(view=app.view_functions['journal.get_user_journals'])
+        spec.path(view=app.view_functions['journal.delete_journal'])
+        spec.path(view=app.view_functions['journal.get_user_trends'])
+        # Dictionary endpoints
+        spec.path(view=app.view_functions['dictionary.get_dictionary'])
+        spec.path(view=app.view_functions['dictionary.edit_dictionary_words'])
     
     return spec
 
 def setup_swagger(app: Flask):
-    """Setup Swagger documentation for the Flask app"""
+    """
+    Setup Swagger documentation for the Flask app
+    
+    The spec is read, serialized and hashed once at startup; requests whose
+    If-None-Match carries that hash get a 304.
+    """
     swagger_bp = Blueprint('swagger', __name__)
     
+    with open(os.path.join(app.root_path, 'static', 'swagger.json'), 'r') as f:
+        spec_body = json.dumps(json.load(f), separators=(',', ':')).encode('utf-8')
+    spec_etag = make_etag('swagger', spec_body)
+    
     @swagger_bp.route('/api/swagger.json')
     def create_swagger_spec_endpoint():
-        with open('app/static/swagger.json', 'r') as f:
-            swagger_spec = json.load(f)
-        return jsonify(swagger_spec)
+        tag = matching_etag(spec_etag)
+        if tag:
+            return not_modified(tag)
+        response = Response(spec_body, mimetype='application/json')
+        response.set_etag(spec_etag)
+        return response
     
     app.register_blueprint(swagger_bp)
     
@@ -0,0 +1,78 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def summarize(latencies, elapsed=None, size=None):
+    """
+    Summary of per-operation latencies in seconds:
+    - runs, ops_per_s and mean/p50/p90/p99/max latency in milliseconds
+    - mb_per_s when each operation processed size bytes
+    """
+    latencies = sorted(latencies)
+    elapsed = elapsed if elapsed is not None else sum(latencies)
+    summary = {
+        'runs': len(latencies),
+        'ops_per_s': len(latencies) / elapsed if elapsed else 0.0,
+        'mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p90_ms': percentile(latencies, 0.9) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0
+    }
+    if size:
+        summary['mb_per_s'] = size * len(latencies) / elapsed / 1e6 if elapsed else 0.0
+    return summary
+
+def measure(operation, min_time=1.0, min_runs=5, max_runs=1000, warmup=1):
+    """
+    Call operation() until it has run at least min_runs times and min_time
+    seconds, or max_runs times, after warmup calls; returns the latencies
+    """
+    for _ in range(warmup):
+        operation()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_runs:
+        if len(latencies) >= min_runs and time.perf_counter() - started >= min_time:
+            break
+        call_started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - call_started)
+    return latencies
+
+@contextmanager
+def sqlite_app(prefix, **config):
+    """
+    Yield an app on a throwaway SQLite database with its tables created, inside
+    an app context; config values are applied on top of the defaults
+    """
+    directory = tempfile.mkdtemp(prefix=prefix)
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+
+    from app import create_app, db
+
+    app = create_app()
+    app.config.update({'SCORING_WORKERS': 0, **config})
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
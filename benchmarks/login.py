@@ -0,0 +1,77 @@
+"""
+Login throughput benchmark.
+
+Creates a user in a throwaway SQLite database and sends logins from
+concurrent client threads through the WSGI app, then reports throughput,
+p50/p99 latency and how many logins were rejected with 503 because the
+password hashing queue was full.
+
+    python benchmarks/login.py --concurrency 16 --requests 400 --rounds 12 --hash-workers 2
+"""
+import argparse
+import json
+import threading
+import time
+from common import percentile, sqlite_app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=16, help='Client threads')
+    parser.add_argument('--requests', type=int, default=400, help='Total logins')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost factor')
+    parser.add_argument('--hash-workers', type=int, default=2, help='PASSWORD_HASH_WORKERS')
+    parser.add_argument('--max-pending', type=int, default=16, help='PASSWORD_HASH_MAX_PENDING')
+    args = parser.parse_args()
+
+    with sqlite_app(
+        'login-benchmark-',
+        BCRYPT_LOG_ROUNDS=args.rounds,
+        PASSWORD_HASH_WORKERS=args.hash_workers,
+        PASSWORD_HASH_MAX_PENDING=args.max_pending
+    ) as app:
+        run(app, args)
+
+def run(app, args):
+    from app import db
+    from app.models.user import User
+
+    db.session.add(User(username='benchmark', password='benchmark-password'))
+    db.session.commit()
+
+    body = json.dumps({'username': 'benchmark', 'password': 'benchmark-password'})
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    remaining = iter(range(args.requests))
+
+    def client_thread():
+        client = app.test_client()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            started = time.perf_counter()
+            response = client.post('/login', data=body, content_type='application/json')
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client_thread) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{args.requests} logins, {args.concurrency} clients, cost {args.rounds}, "
+          f"{args.hash_workers} hash workers, {args.max_pending} max pending")
+    print(f"throughput: {statuses.get(200, 0) / elapsed:.1f} successful logins/s")
+    print(f"latency p50: {percentile(latencies, 0.5) * 1000:.1f} ms, p99: {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"status codes: {dict(sorted(statuses.items()))}")
+
+if __name__ == '__main__':
+    main()
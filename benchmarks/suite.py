@@ -0,0 +1,277 @@
+"""
+Benchmark suite for the analyzer and HTTP hot paths.
+
+Runs against a throwaway SQLite database, so it needs no running services:
+- tokenize: LIWCAnalyzer.tokenize_text over texts of 1 KB to 10 MB
+- analyze: LIWCAnalyzer.analyze_text over the same texts against synthetic
+  dictionaries of 200 to 50k words (exact words, stems and phrases), with the
+  score memo disabled; compile records the time to build each dictionary
+- analyze_many: LIWCAnalyzer.analyze_many over a batch of 1,000 texts of 1 KB
+  against the same dictionaries
+- http: POST /journals, GET /journals and POST /login through the test client
+
+Results (throughput and latency percentiles) are written to a JSON file. Pass
+an earlier file with --compare to fail when a benchmark's p50 latency grew by
+more than --threshold:
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --output after.json --compare before.json --threshold 0.10
+
+--quick limits the texts to 1 MB and the dictionaries to 5k words.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import string
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from common import measure, summarize, sqlite_app
+
+TEXT_SIZES = [('1kb', 1_000), ('100kb', 100_000), ('1mb', 1_000_000), ('10mb', 10_000_000)]
+DICTIONARY_SIZES = [200, 5_000, 50_000]
+QUICK_TEXT_SIZES = TEXT_SIZES[:3]
+QUICK_DICTIONARY_SIZES = DICTIONARY_SIZES[:2]
+CATEGORIES = 16
+FILLER_WORDS = 5_000
+HIT_RATIO = 0.3
+BATCH_TEXTS = 1_000
+BATCH_TEXT_SIZE = 1_000
+
+def random_word(rng, short=3, long=10):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(short, long)))
+
+def synthetic_dictionary(size, seed=0):
+    """
+    {category: [entries]} with size entries: about 85% exact words, 10% stems
+    and 5% two-word phrases, some of them listed under two categories
+    """
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add(random_word(rng, 4, 10))
+    words = sorted(words)
+    rng.shuffle(words)
+
+    dictionary = {f'category_{index:02d}': [] for index in range(CATEGORIES)}
+    names = list(dictionary)
+    for index, word in enumerate(words):
+        kind = index % 20
+        if kind in (0, 1):
+            entry = word[:max(3, len(word) - 3)] + '*'
+        elif kind == 2:
+            entry = f'{word} {words[index - 1].rstrip("*")}'
+        else:
+            entry = word
+        dictionary[names[index % CATEGORIES]].append(entry)
+        if index % 7 == 0:
+            dictionary[names[(index + 1) % CATEGORIES]].append(entry)
+    return dictionary
+
+def synthetic_text(size, dictionary, seed=0):
+    """About size bytes of text where HIT_RATIO of the words are dictionary entries"""
+    rng = random.Random(seed)
+    entries = [entry.replace('*', 'ing') for words in dictionary.values() for entry in words]
+    filler = [random_word(rng) for _ in range(FILLER_WORDS)]
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(entries) if rng.random() < HIT_RATIO else rng.choice(filler)
+        if rng.random() < 0.08:
+            word = word.capitalize() + rng.choice('.,!?')
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts)[:size]
+
+def load_dictionary(dictionary):
+    """Replace the categories/words tables with dictionary"""
+    from sqlalchemy import delete, insert
+    from app import db
+    from app.models.category import Category, Word
+
+    db.session.execute(delete(Word))
+    db.session.execute(delete(Category))
+    for name, entries in dictionary.items():
+        category = Category(name=name)
+        db.session.add(category)
+        db.session.flush()
+        rows = [{'text': text, 'category_id': category.id} for text in dict.fromkeys(entries)]
+        if rows:
+            db.session.execute(insert(Word), rows)
+    db.session.commit()
+
+def bench_analyzer(app, results, text_sizes, dictionary_sizes, min_time, selected):
+    from app.services.liwc_analyzer import LIWCAnalyzer
+
+    app.config['SCORE_MEMO_SIZE'] = 0
+    base = synthetic_dictionary(dictionary_sizes[0])
+    texts = {label: synthetic_text(size, base) for label, size in text_sizes}
+
+    for label, size in text_sizes:
+        name = f'tokenize.{label}'
+        if selected(name):
+            text = texts[label]
+            results[name] = summarize(measure(lambda: LIWCAnalyzer.tokenize_text(text), min_time), size=size)
+            report(name, results[name])
+
+    for words in dictionary_sizes:
+        names = [f'analyze.{label}.{words}w' for label, _ in text_sizes]
+        batch_name = f'analyze_many.{words}w'
+        if not any(selected(name) for name in names + [f'compile.{words}w', batch_name]):
+            continue
+        dictionary = synthetic_dictionary(words)
+        load_dictionary(dictionary)
+        LIWCAnalyzer.clear_cache()
+
+        started = time.perf_counter()
+        LIWCAnalyzer.snapshot()
+        name = f'compile.{words}w'
+        results[name] = summarize([time.perf_counter() - started])
+        report(name, results[name])
+
+        for (label, size), name in zip(text_sizes, names):
+            if selected(name):
+                text = synthetic_text(size, dictionary)
+                results[name] = summarize(measure(lambda: LIWCAnalyzer.analyze_text(text), min_time), size=size)
+                report(name, results[name])
+
+        if selected(batch_name):
+            text = synthetic_text(BATCH_TEXTS * BATCH_TEXT_SIZE, dictionary)
+            batch = [text[start:start + BATCH_TEXT_SIZE] for start in range(0, len(text), BATCH_TEXT_SIZE)]
+            results[batch_name] = summarize(measure(lambda: LIWCAnalyzer.analyze_many(batch), min_time), size=len(text))
+            report(batch_name, results[batch_name])
+
+def bench_http(app, results, min_time, selected, journals=500):
+    from app import db
+    from app.models.journal import Journal
+    from app.models.user import User
+    from app.services.liwc_analyzer import LIWCAnalyzer
+
+    load_dictionary(LIWCAnalyzer.load_dictionary())
+    LIWCAnalyzer.clear_cache()
+    db.session.add(User(username='benchmark', password='benchmark-password'))
+    db.session.commit()
+
+    client = app.test_client()
+    credentials = json.dumps({'username': 'benchmark', 'password': 'benchmark-password'})
+    response = client.post('/login', data=credentials, content_type='application/json')
+    headers = {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+    dictionary = LIWCAnalyzer.load_dictionary()
+    text = synthetic_text(1_000, dictionary)
+    counter = iter(range(sys.maxsize))
+
+    def post_journal():
+        # A distinct text per request, so the score memo does not answer it
+        body = json.dumps({'text': f'{text} {next(counter)}'})
+        response = client.post('/journals', data=body, headers=headers, content_type='application/json')
+        assert response.status_code == 201, response.status_code
+
+    if selected('http.post_journal'):
+        results['http.post_journal'] = summarize(measure(post_journal, min_time))
+        report('http.post_journal', results['http.post_journal'])
+
+    existing = db.session.query(Journal).count()
+    for index in range(existing, journals):
+        client.post('/journals', data=json.dumps({'text': f'{text} {index}'}),
+                    headers=headers, content_type='application/json')
+
+    def get_journals():
+        response = client.get('/journals?limit=50', headers=headers)
+        assert response.status_code == 200, response.status_code
+
+    def login():
+        response = client.post('/login', data=credentials, content_type='application/json')
+        assert response.status_code == 200, response.status_code
+
+    for name, operation in (('http.get_journals', get_journals), ('http.login', login)):
+        if selected(name):
+            results[name] = summarize(measure(operation, min_time))
+            report(name, results[name])
+
+def report(name, summary):
+    line = f"{name:<28} {summary['ops_per_s']:>10.1f} ops/s  p50 {summary['p50_ms']:>9.3f} ms  p99 {summary['p99_ms']:>9.3f} ms"
+    if 'mb_per_s' in summary:
+        line += f"  {summary['mb_per_s']:>7.1f} MB/s"
+    print(line, flush=True)
+
+def metadata(args):
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'quick': args.quick,
+        'bcrypt_rounds': args.bcrypt_rounds
+    }
+
+def compare(results, baseline, threshold):
+    """
+    Print the p50 change of every benchmark present in both runs and return the
+    names of those that slowed down by more than threshold
+    """
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'} (threshold {threshold:.0%}):")
+    for name, summary in results.items():
+        previous = baseline['results'].get(name)
+        if not previous or not previous['p50_ms']:
+            continue
+        change = summary['p50_ms'] / previous['p50_ms'] - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<28} p50 {previous['p50_ms']:>9.3f} -> {summary['p50_ms']:>9.3f} ms  {change:+7.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default='benchmark-results.json', help='JSON file to write the results to')
+    parser.add_argument('--compare', help='Results file of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Allowed p50 slowdown before failing, 0.10 = 10%%')
+    parser.add_argument('--quick', action='store_true', help='Skip the 10 MB texts and the 50k-word dictionary')
+    parser.add_argument('--min-time', type=float, default=1.0, help='Seconds to repeat each benchmark for')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4, help='bcrypt cost used by the login benchmark')
+    parser.add_argument('--filter', action='append', default=[], help='Only run benchmarks whose name contains this')
+    args = parser.parse_args()
+
+    def selected(name):
+        return not args.filter or any(pattern in name for pattern in args.filter)
+
+    text_sizes = QUICK_TEXT_SIZES if args.quick else TEXT_SIZES
+    dictionary_sizes = QUICK_DICTIONARY_SIZES if args.quick else DICTIONARY_SIZES
+    results = {}
+
+    with sqlite_app('benchmark-suite-') as app:
+        bench_analyzer(app, results, text_sizes, dictionary_sizes, args.min_time, selected)
+    if any(selected(name) for name in ('http.post_journal', 'http.get_journals', 'http.login')):
+        with sqlite_app('benchmark-suite-', BCRYPT_LOG_ROUNDS=args.bcrypt_rounds) as app:
+            bench_http(app, results, args.min_time, selected)
+
+    output = {'meta': metadata(args), 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slowed down by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
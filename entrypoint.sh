@@ -19,7 +19,7 @@ fi
 
 sleep 3
 
-echo "Initializing database..."
+echo "Applying migrations and initializing database..."
 python init_db.py
 
 echo "Verifying database schema..."
@@ -33,5 +33,5 @@ if [ "$FLASK_DEBUG" = "1" ]; then
   exec flask run --host=0.0.0.0 --port=5000 --reload
 else
   echo "Starting Gunicorn production server..."
-  exec gunicorn --bind 0.0.0.0:5000 app:app
+  exec gunicorn --config gunicorn.conf.py
 fi
@@ -0,0 +1,81 @@
+"""
+Gunicorn settings, all overridable through environment variables.
+
+- GUNICORN_BIND: address to listen on (0.0.0.0:5000)
+- GUNICORN_WORKERS: worker processes (2 x CPU count + 1)
+- GUNICORN_WORKER_CLASS: gthread (default), sync, or an async class such as gevent
+- GUNICORN_THREADS: threads per gthread worker (4); keep DB_POOL_SIZE at least this
+- GUNICORN_PRELOAD: load the app and the compiled LIWC dictionary once in the
+  master so workers share them (1)
+- GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER: recycle a worker
+  gracefully after this many requests, staggered by the jitter (1000 / 100)
+- GUNICORN_TIMEOUT / GUNICORN_GRACEFUL_TIMEOUT / GUNICORN_KEEPALIVE: seconds
+  (30 / 30 / 5)
+- PROMETHEUS_MULTIPROC_DIR: directory where workers write their metrics so
+  /metrics can aggregate them; emptied when gunicorn starts
+  (<tmp>/liwc-prometheus)
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Emptied and set before the app, and with it prometheus_client, is loaded
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'liwc-prometheus'))
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir)
+
+wsgi_app = 'wsgi:app'
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+def when_ready(server):
+    """
+    With preload_app, compile or map the LIWC dictionary in the master before
+    workers are forked so they inherit it, then close the master's database
+    connections so no worker shares a socket with it.
+    """
+    if not preload_app:
+        return
+
+    from wsgi import app
+    from app import db
+    from app.services.liwc_analyzer import LIWCAnalyzer
+
+    try:
+        with app.app_context():
+            compiled = LIWCAnalyzer.snapshot()
+            server.log.info(f"Preloaded LIWC dictionary {compiled.version} ({compiled.source})")
+    except Exception as e:
+        server.log.warning(f"Could not preload the LIWC dictionary: {e}")
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+
+def post_fork(server, worker):
+    """Drop any pooled connection inherited from the master without closing it"""
+    if not preload_app:
+        return
+
+    from app import db
+    from wsgi import app
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+def child_exit(server, worker):
+    """Retire the metrics files of a worker that exited"""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
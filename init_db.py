@@ -2,7 +2,10 @@ from app import create_app, db
 from app.models.user import User
 from app.models.journal import Journal
 from app.models.category import Category, Word
+from app.models.rollup import DailyRollup, DailyCategoryRollup
+from app.models.score_memo import StoredScore
 from app.services.liwc_analyzer import LIWCAnalyzer
+from app.services.migrations import run_migrations
 from sqlalchemy import inspect
 import sys
 
@@ -14,8 +17,8 @@ def check_if_table_exists(table_name):
     return table_name in inspector.get_table_names()
 
 with app.app_context():
-    print("Creating/Updating database tables...")
-    db.create_all()
+    print("Applying database migrations...")
+    run_migrations()
     print("Database tables ready!")
     
     try:
@@ -27,3 +30,9 @@ with app.app_context():
             print("LIWC dictionary initialization complete!")
     except Exception as e:
         print(f"Error checking LIWC dictionary: {e}")
+    
+    try:
+        print("Compiling LIWC dictionary file...")
+        LIWCAnalyzer.build_dictionary_file()
+    except Exception as e:
+        print(f"Error compiling LIWC dictionary file: {e}")
@@ -0,0 +1,9 @@
+"""
+WSGI entry point for gunicorn (see gunicorn.conf.py).
+
+The app/ package shadows app.py, so `gunicorn app:app` cannot find the app
+object; this module exposes it instead.
+"""
+from app import create_app
+
+app = create_app()